@@ -0,0 +1,64 @@
+# Import dependencies
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from backend.functions.athletes import load_athlete_registry
+from backend.functions.data_functions import Variables
+import subprocess
+import argparse
+import warnings
+import logging
+import sys
+import os
+
+def collect_athlete_data(athlete: str) -> None:
+    """
+    Run collect_data.py for a single athlete of the athlete registry, in a fresh Python process of its own
+    """
+    subprocess.run([sys.executable, "-m", "backend.collect_data", "--athlete", athlete], check=True)
+
+
+if __name__ == "__main__":
+
+    # Ignore warnings
+    warnings.filterwarnings("ignore")
+
+    # Configure Logger
+    logger = logging.getLogger('CLUB')
+    logger.setLevel(logging.INFO)
+    log_handler = logging.StreamHandler()
+    log_handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+    logger.addHandler(log_handler)
+
+    # Parse command line arguments
+    parser = argparse.ArgumentParser(description="Collect Strava data for every athlete of the athlete registry")
+    parser.add_argument("--athlete", action="append",
+                        help="Collect data for this athlete only (repeatable), defaults to every registered athlete")
+    parser.add_argument("--processes", type=int,
+                        help="Number of athletes collected concurrently, defaults to the number of cores")
+    args = parser.parse_args()
+
+    # Collect registered athletes
+    vars = Variables()
+    if vars.athlete_registry is None:
+        sys.exit("No athlete registry is configured, set the athlete_registry environment variable")
+    athletes = args.athlete or list(load_athlete_registry(vars.athlete_registry))
+    processes = min(args.processes or os.cpu_count() or 1, len(athletes))
+    logger.info(f"Collecting data for {len(athletes)} athletes across {processes} processes \n")
+
+    # Collect each athlete in a fresh process of its own, so every athlete has its own api service (and so rate
+    # limit accounting, connection pools and circuit breaker) and a failing athlete does not stop the others. Each
+    # thread of the pool only waits on the process of the athlete it is collecting
+    failed = []
+    with ThreadPoolExecutor(max_workers=processes) as executor:
+        futures = {executor.submit(collect_athlete_data, athlete): athlete for athlete in athletes}
+        for future in as_completed(futures):
+            try:
+                future.result()
+                logger.info(f"Data collected for {futures[future]}")
+            except Exception as error:
+                logger.error(f"Data collection failed for {futures[future]}: {error!r}")
+                failed.append(futures[future])
+
+    # Fail the job if any athlete failed, once every other athlete has been collected
+    if failed:
+        sys.exit(f"Data collection failed for {len(failed)} of {len(athletes)} athletes: {', '.join(sorted(failed))}")
+    logger.info(f"Data collected for all {len(athletes)} athletes")
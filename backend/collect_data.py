@@ -1,7 +1,19 @@
 # Import dependencies
 from backend.functions.data_functions import ApiService, Variables
+from backend.functions.best_efforts import best_effort_progression
+from backend.functions.authentication import TokenCache
+from backend.functions.storage import upload_blob
+from backend.functions.metrics import RunMetrics
+from backend.functions.journal import RunJournal
+from backend.functions.pipeline import Pipeline
+from azure.storage.blob import ContentSettings
+from datetime import datetime, timezone
+import pandas as pd
+import argparse
 import warnings
 import logging
+import json
+import sys
 
 # Ignore warnings
 warnings.filterwarnings("ignore")
@@ -14,8 +26,35 @@ log_handler = logging.StreamHandler()
 log_handler.setFormatter(formatter)
 logger.addHandler(log_handler)
 
-# Collect codebase variables
+# Parse command line arguments
+parser = argparse.ArgumentParser(description="Collect Strava data and publish it to blob storage")
+parser.add_argument("--stage", action="append",
+                    help="Run only this stage and the stages it depends on, without publishing (repeatable)")
+parser.add_argument("--athlete",
+                    help="Collect data for this athlete of the athlete registry, under their blob prefix")
+args = parser.parse_args()
+
+# Label log messages with the athlete data is collected for
+if args.athlete:
+    log_handler.setFormatter(logging.Formatter(f'%(asctime)s - {args.athlete} - %(message)s'))
+
+# Record latency, bytes, status and rate limit usage of every request made during the run
+run_metrics = RunMetrics().activate()
+
+# Collect codebase variables, configured for the requested athlete
 vars = Variables()
+if args.athlete:
+    vars = vars.for_athlete(args.athlete)
+
+# Load run journal, resuming the previous run if it failed before publishing. Stage-only runs are never published,
+# so they keep a journal of their own, leaving the stages of a full run to be run (and published) by that run
+if args.stage:
+    journal = RunJournal(connection_string=vars.storage_account_conneciton_string, container=vars.container,
+                         logger=logger, journal_filename='runs/stage_journal.json',
+                         staging_prefix='runs/stage_staging/')
+else:
+    journal = RunJournal(connection_string=vars.storage_account_conneciton_string, container=vars.container,
+                         logger=logger)
 
 # Configure API service class
 logger.info("Configuring API service application...")
@@ -23,7 +62,10 @@ app = ApiService(
     client_id=vars.client_id,
     client_secret=vars.client_secret,
     refresh_token=vars.refresh_token,
-    logger=logger
+    logger=logger,
+    api_url=vars.strava_api_url,
+    journal=journal,
+    token_cache=TokenCache(connection_string=vars.storage_account_conneciton_string, container=vars.container)
 )
 logger.info("Api service configured \n")
 
@@ -32,48 +74,137 @@ logger.info("Collecting access token...")
 app.collect_access_token()
 logger.info("Access token collected \n")
 
-# Collect activity data
-logger.info("Collecting activity data...")
-activity_data = app.collect_all_activity_data()
-logger.info("Activity Data collected \n")
-
-# Collect stream data for pb effort data
-logger.info("Collecting stream data for pb efforts...")
-app.collect_activity_stream_data(activity_data=activity_data, vars=vars)
-logger.info("Stream data collected and exported for pb efforts \n")
-
-# Collect and export pb effort data
-logger.info("Collecting and exporting pb effort data...")
-pb_effort_data = app.collect_pb_effort_activities(activity_data=activity_data)
-app.export_data_as_csv(df=pb_effort_data,
-                       vars=vars,
-                       container='strava',
-                       output_filename='pb_effort_data.csv')
-logger.info("PB effort data exported \n")
-
-# Filter out activity data
-logger.info("Filter out coastal path activities...")
-costal_path_data = app.filter_out_coastal_path_data(activity_data=activity_data)
-logger.info("Coastal path data filtered out \n")
-
-# Export activity data to blob storage
-logger.info("Exporting activity data...")
-app.export_activity_data(data=activity_data,
-                         vars=vars,
-                         container='strava',
-                         output_filename='activity_data.csv')
-logger.info("Data exported to blob storage \n")
-
-# Export coastal path data to blob storage
-logger.info("Exporting coastal path data...")
-app.export_activity_data(data=costal_path_data,
-                         vars=vars,
-                         container='strava',
-                         output_filename='coastal_path_data.csv')
-logger.info("Data exported to blob storage \n")
-
-# Export Coastal Path segment data
-logger.info("Collecting coastal path segment data...")
-wcp_segments_df = app.collect_wcp_segments()
-app.export_data_as_csv(df=wcp_segments_df, vars=vars, container="strava", output_filename="wcp_segments.csv")
-logger.info("Coastal Path segment data collected \n")
+# Define collection pipeline, each stage declaring the values it consumes and produces
+pipeline = Pipeline(logger=logger, journal=journal)
+
+@pipeline.stage(name='activity_sync', outputs=['activity_data', 'sync_state'])
+def collect_activity_data() -> dict:
+    """
+    Collect activity data, only fetching new activities unless a full sync is due
+    """
+    logger.info("Collecting activity data...")
+    activity_data = app.sync_activity_data(vars=vars,
+                                           container=vars.container,
+                                           output_filename='activity_data.csv',
+                                           state_filename='sync_state.json',
+                                           full_sync=vars.force_full_sync,
+                                           window=4)
+    logger.info("Activity Data collected \n")
+
+    return {"activity_data": activity_data, "sync_state": app.sync_state}
+
+@pipeline.stage(name='streams', inputs=['activity_data'], outputs=['best_efforts'])
+def collect_stream_data(activity_data: list) -> dict:
+    """
+    Collect stream data for pb efforts and runs, detecting the best efforts in every stream
+    """
+    logger.info("Collecting stream data for pb efforts and runs...")
+    best_efforts = app.collect_activity_stream_data(activity_data=activity_data,
+                                                    vars=vars,
+                                                    backfill_limit=vars.stream_backfill_limit)
+    logger.info("Stream data collected and exported for pb efforts and runs \n")
+
+    return {"best_efforts": best_efforts}
+
+@pipeline.stage(name='pb_efforts', inputs=['activity_data', 'best_efforts'])
+def collect_pb_effort_data(activity_data: list, best_efforts: dict) -> None:
+    """
+    Collect official pb effort data, combine it with best efforts detected in streams and export it
+    """
+    logger.info("Collecting and exporting pb effort data...")
+    official_efforts = app.collect_pb_effort_activities(activity_data=activity_data, vars=vars)
+    detected_efforts = best_effort_progression(activity_data=activity_data, best_efforts=best_efforts)
+    app.export_data_as_csv(df=pd.concat([official_efforts, detected_efforts], ignore_index=True),
+                           vars=vars,
+                           container=vars.container,
+                           output_filename='pb_effort_data.csv')
+    logger.info("PB effort data exported \n")
+
+@pipeline.stage(name='activity_export', inputs=['activity_data'])
+def export_activity_data(activity_data: list) -> None:
+    """
+    Export activity data to blob storage
+    """
+    logger.info("Exporting activity data...")
+    app.export_activity_data(data=activity_data,
+                             vars=vars,
+                             container=vars.container,
+                             output_filename='activity_data.csv')
+    logger.info("Activity data exported to blob storage \n")
+
+@pipeline.stage(name='coastal_path_export', inputs=['activity_data'])
+def export_coastal_path_data(activity_data: list) -> None:
+    """
+    Filter out coastal path activities and export them to blob storage
+    """
+    logger.info("Filtering and exporting coastal path data...")
+    costal_path_data = app.filter_out_coastal_path_data(activity_data=activity_data)
+    app.export_activity_data(data=costal_path_data,
+                             vars=vars,
+                             container=vars.container,
+                             output_filename='coastal_path_data.csv')
+    logger.info("Coastal path data exported to blob storage \n")
+
+@pipeline.stage(name='rollups_export', inputs=['activity_data'])
+def export_rollup_data(activity_data: list) -> None:
+    """
+    Export yearly, monthly and weekly activity rollups to blob storage
+    """
+    logger.info("Exporting activity rollups...")
+    app.export_rollups(data=activity_data, vars=vars, container=vars.container)
+    logger.info("Activity rollups exported to blob storage \n")
+
+@pipeline.stage(name='routes_export', inputs=['activity_data'])
+def export_route_data(activity_data: list) -> None:
+    """
+    Export decoded and simplified activity routes to blob storage
+    """
+    logger.info("Exporting activity routes...")
+    app.export_routes(data=activity_data, vars=vars, container=vars.container, output_filename='routes/routes.arrow')
+    logger.info("Activity routes exported to blob storage \n")
+
+@pipeline.stage(name='wcp_segments')
+def collect_wcp_segment_data() -> None:
+    """
+    Collect and export Coastal Path segment data
+    """
+    logger.info("Collecting coastal path segment data...")
+    wcp_segments_df = app.collect_wcp_segments(vars=vars)
+    app.export_data_as_csv(df=wcp_segments_df, vars=vars, container=vars.container, output_filename="wcp_segments.csv")
+    logger.info("Coastal Path segment data collected \n")
+
+
+# Run selected stages (and the stages they depend on) without publishing, if requested
+if args.stage:
+    pipeline.run(args.stage)
+    sys.exit(0)
+
+# Run every stage, independent stages running concurrently
+outputs = pipeline.run()
+app.sync_state = outputs["sync_state"]
+
+# Publish staged artifacts now every stage has succeeded, followed by the sync state they were collected with
+logger.info("Publishing exported data...")
+journal.publish()
+app.export_sync_state(vars=vars, container=vars.container, output_filename='sync_state.json')
+logger.info("Exported data published \n")
+
+# Report which artifacts changed in this run
+changed = [name for name, is_changed in app.artifact_changes.items() if is_changed]
+unchanged = [name for name, is_changed in app.artifact_changes.items() if not is_changed]
+logger.info(f"Artifacts changed: {', '.join(changed) or 'none'}")
+logger.info(f"Artifacts unchanged: {', '.join(unchanged) or 'none'}")
+
+# Report per-activity units of work that failed, they are retried by the next run
+for unit, failures in app.failures.items():
+    logger.warning(f"{len(failures)} {unit} units failed: {', '.join(failures)}")
+
+# Write machine-readable run report, so regressions can be tracked across runs
+report = run_metrics.report(run_id=journal.state["run_id"],
+                            stage_timings={stage: round(seconds, 3) for stage, seconds in pipeline.timings.items()},
+                            artifacts=app.artifact_changes,
+                            failures=app.failures)
+upload_blob(vars.storage_account_conneciton_string, vars.container,
+            f"runs/reports/{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}.json", json.dumps(report, indent=2),
+            content_settings=ContentSettings(content_type="application/json"))
+logger.info(f"Run completed in {report['wall_time']:.1f}s, report written to runs/reports/")
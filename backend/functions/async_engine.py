@@ -0,0 +1,76 @@
+from backend.functions.metrics import in_current_context
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable
+import asyncio
+
+class AsyncIngestionEngine:
+    """
+    A bounded thread pool that fans per-activity units of work out concurrently.
+
+    `map` applies a function to every item of a collection on the pool, by running the
+    `map_async` coroutine to completion with `asyncio.run`, and blocks until every item has
+    finished. The pool is shared by every stage, so the total number of in-flight units never
+    exceeds `max_concurrency` however many stages call `map` at once. The units themselves are
+    ordinary blocking calls (API requests through the ApiService's pooled HTTP session and rate
+    limit scheduler, and blob uploads through the pooled blob client).
+
+    Attributes:
+        max_concurrency (int): Maximum number of units of work executing at once.
+        executor (ThreadPoolExecutor): Worker pool shared by every unit of work.
+    """
+    def __init__(self, max_concurrency: int = 8) -> None:
+        """
+        Initializes the engine and its shared worker pool.
+
+        Args:
+            max_concurrency (int): Maximum number of units of work executing at once.
+        """
+        self.max_concurrency = max_concurrency
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='ingestion')
+
+    async def map_async(self, function: Callable, items: Iterable) -> list:
+        """
+        Applies a function to every item concurrently on the shared worker pool.
+
+        The function must not itself call `map`, as it would wait on the pool it is running on.
+
+        Args:
+            function (Callable): Function applied to each item.
+            items (Iterable): Items to process.
+
+        Returns:
+            list: Results in the same order as the items.
+
+        Raises:
+            Exception: The first error raised by any item, once every item has finished.
+        """
+        loop = asyncio.get_running_loop()
+
+        # Run items in the caller's context, so units of work are attributed to the caller's stage
+        function = in_current_context(function)
+
+        # Wait for every item to finish, so no work is still running when an error is raised
+        results = await asyncio.gather(*(loop.run_in_executor(self.executor, function, item) for item in items),
+                                       return_exceptions=True)
+
+        # Raise first error encountered
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+        return results
+
+    def map(self, function: Callable, items: Iterable) -> list:
+        """
+        Applies a function to every item concurrently on the shared worker pool, blocking until every
+        item has finished. Runs `map_async` with `asyncio.run`, so it must not be called from within a
+        running event loop.
+
+        Args:
+            function (Callable): Function applied to each item.
+            items (Iterable): Items to process.
+
+        Returns:
+            list: Results in the same order as the items.
+        """
+        return asyncio.run(self.map_async(function, items))
@@ -0,0 +1,63 @@
+import json
+import os
+import re
+
+# Define blob prefix, within the data container, each athlete's data is stored under
+ATHLETE_PREFIX = 'athletes'
+
+# Define pattern of valid athlete names, which are used in blob prefixes
+ATHLETE_NAME_PATTERN = r'[A-Za-z0-9_-]+'
+
+# Define credentials held for every athlete of the registry
+athlete_credentials = ['client_id', 'client_secret', 'refresh_token']
+
+def load_athlete_registry(source: str) -> dict:
+    """
+    Loads the athlete registry, holding the Strava credentials of every athlete of a club.
+
+    The registry is a JSON object mapping each athlete's name to their `client_id`,
+    `client_secret` and `refresh_token`, e.g.
+    `{"rhys": {"client_id": "...", "client_secret": "...", "refresh_token": "..."}}`. It can be
+    given as the JSON document itself (e.g. from a secret) or as the path of a JSON file.
+
+    Args:
+        source (str): The registry JSON document, or the path of a registry JSON file.
+
+    Returns:
+        dict: The credentials of each athlete, keyed by athlete name.
+
+    Raises:
+        ValueError: If the registry is empty, an athlete name is not made up of letters, digits,
+                    `_` and `-`, or an athlete is missing credentials.
+    """
+    # Read registry file, if a path is given
+    if os.path.isfile(source):
+        with open(source) as file:
+            source = file.read()
+
+    registry = json.loads(source)
+    if not isinstance(registry, dict) or len(registry) == 0:
+        raise ValueError('The athlete registry must map at least one athlete name to their credentials')
+
+    # Validate athlete names and credentials
+    for athlete, credentials in registry.items():
+        if not re.fullmatch(ATHLETE_NAME_PATTERN, athlete):
+            raise ValueError(f'Invalid athlete name {athlete!r}, names may only contain letters, digits, _ and -')
+        missing = [key for key in athlete_credentials if not credentials.get(key)]
+        if missing:
+            raise ValueError(f'Athlete {athlete} is missing credentials: {", ".join(missing)}')
+
+    return registry
+
+def athlete_container(container: str, athlete: str) -> str:
+    """
+    Returns the container path an athlete's data is stored under (see `storage.split_container_path`).
+
+    Args:
+        container (str): The name of the data container.
+        athlete (str): The athlete name.
+
+    Returns:
+        str: The container path, e.g. `strava/athletes/<athlete>`.
+    """
+    return f'{container}/{ATHLETE_PREFIX}/{athlete}'
@@ -1,5 +1,11 @@
-from typing import Optional
+from backend.functions.storage import upload_blob, download_blob, acquire_blob_lease
+from azure.storage.blob import ContentSettings
+from typing import Callable, Optional
+import threading
 import requests
+import hashlib
+import json
+import time
 
 def exchange_code_for_token(client_id: str,
                             client_secret: str,
@@ -35,3 +41,181 @@ def exchange_code_for_token(client_id: str,
         return response.json()
     else:
         return None
+
+def hash_refresh_token(refresh_token: str) -> str:
+    """
+    Hashes a refresh token, so the refresh token a token cache was populated from can be recognised
+    without persisting it.
+
+    Args:
+        refresh_token (str): The refresh token.
+
+    Returns:
+        str: The SHA-256 hex digest of the refresh token.
+    """
+    return hashlib.sha256(refresh_token.encode()).hexdigest()
+
+class TokenCache:
+    """
+    A blob backed cache of the Strava access token, shared by every run and worker.
+
+    Strava access tokens are valid for six hours (`expires_at`), and refreshing one may rotate
+    the refresh token. The cache persists the access token, its expiry and the latest refresh
+    token to a blob, so short consecutive runs (and local tooling) reuse a valid token instead of
+    refreshing it, and refresh with the most recent refresh token. A hash of the configured refresh
+    token is cached alongside it, so the cached refresh token is discarded once the configured one
+    changes (e.g. the athlete re-authorized), and the configured refresh token is used if the
+    cached one is rejected.
+
+    Refreshes are serialized: threads within a process share a lock, and processes hold a lease
+    on the cache blob while refreshing. Once the lease is acquired the cache is read again, so a
+    worker that waited on another worker's refresh reuses its token rather than refreshing again.
+
+    The cache holds credentials, so it must only be kept in a private container.
+
+    Attributes:
+        connection_string (str): Azure Blob Storage connection string.
+        container (str): The name of the Azure Blob Storage container.
+        blob_name (str): The blob path of the token cache JSON file.
+        expiry_margin (float): Seconds before expiry at which a cached token is no longer reused.
+    """
+    def __init__(
+            self,
+            connection_string: str,
+            container: str,
+            blob_name: str = 'auth/token_cache.json',
+            expiry_margin: float = 600) -> None:
+        """
+        Initializes the cache.
+
+        Args:
+            connection_string (str): Azure Blob Storage connection string.
+            container (str): The name of the Azure Blob Storage container.
+            blob_name (str): The blob path of the token cache JSON file.
+            expiry_margin (float): Seconds before expiry at which a cached token is no longer reused, so
+                                   a token obtained at the start of a run is not about to expire. Tokens
+                                   that expire later in a run (e.g. while requests are paused for rate limit
+                                   budget) are renewed once rejected (see `rejected_access_token`).
+        """
+        self.connection_string = connection_string
+        self.container = container
+        self.blob_name = blob_name
+        self.expiry_margin = expiry_margin
+        self._lock = threading.Lock()
+
+    def get(
+            self,
+            refresh_token: str,
+            refresh: Callable[[str], dict],
+            rejected_access_token: Optional[str] = None) -> dict:
+        """
+        Returns a valid token, refreshing it only if the cached token is missing, about to expire,
+        was obtained with a different configured refresh token, or has been rejected.
+
+        Args:
+            refresh_token (str): The configured refresh token, used if the cache holds none, the cache was
+                                 populated from a different configured refresh token, or the cached refresh
+                                 token is rejected.
+            refresh (Callable): Function exchanging a refresh token for a token response holding
+                                `access_token`, `expires_at` and (optionally) `refresh_token`.
+            rejected_access_token (Optional[str]): An access token rejected by the Strava API (e.g. one
+                                                   that expired mid-run), which is never returned.
+
+        Returns:
+            dict: The cached token, with `access_token`, `expires_at`, `refresh_token` and
+                  `configured_token_hash` keys.
+        """
+        configured_token_hash = hash_refresh_token(refresh_token)
+        with self._lock:
+            tokens = self.read()
+            if self.is_valid(tokens, configured_token_hash, rejected_access_token):
+                return tokens
+
+            lease = acquire_blob_lease(self.connection_string, self.container, self.blob_name)
+            try:
+                # Reuse token refreshed by another worker while the lease was awaited
+                tokens = self.read()
+                if self.is_valid(tokens, configured_token_hash, rejected_access_token):
+                    return tokens
+
+                # Refresh with the latest refresh token, persisting the rotated refresh token. The cached refresh
+                # token is only used while the configured refresh token is unchanged (e.g. not re-authorized)
+                latest_refresh_token = refresh_token
+                cached_token_hash = (tokens or {}).get('configured_token_hash', configured_token_hash)
+                if tokens is not None and cached_token_hash == configured_token_hash:
+                    latest_refresh_token = tokens.get('refresh_token') or refresh_token
+
+                try:
+                    tokens = self.refresh(latest_refresh_token, refresh)
+                except (requests.RequestException, KeyError, ValueError):
+                    # Retry with the configured refresh token if the cached one is rejected (e.g. revoked)
+                    if latest_refresh_token == refresh_token:
+                        raise
+                    tokens = self.refresh(refresh_token, refresh)
+                tokens['configured_token_hash'] = configured_token_hash
+
+                upload_blob(self.connection_string, self.container, self.blob_name, json.dumps(tokens),
+                            lease=lease, content_settings=ContentSettings(content_type="application/json"))
+
+                return tokens
+
+            finally:
+                lease.release()
+
+    def refresh(self, refresh_token: str, refresh: Callable[[str], dict]) -> dict:
+        """
+        Exchanges a refresh token for a new token.
+
+        Args:
+            refresh_token (str): The refresh token to exchange.
+            refresh (Callable): Function exchanging a refresh token for a token response.
+
+        Returns:
+            dict: The new token, with `access_token`, `expires_at` and `refresh_token` keys.
+
+        Raises:
+            KeyError: If the token response holds no access token or expiry.
+        """
+        response = refresh(refresh_token)
+
+        return {
+            'access_token': response['access_token'],
+            'expires_at': response['expires_at'],
+            'refresh_token': response.get('refresh_token') or refresh_token
+        }
+
+    def read(self) -> Optional[dict]:
+        """
+        Reads the cached token.
+
+        Returns:
+            Optional[dict]: The cached token, or None if nothing has been cached yet.
+        """
+        data = download_blob(self.connection_string, self.container, self.blob_name)
+
+        return json.loads(data) if data else None
+
+    def is_valid(
+            self,
+            tokens: Optional[dict],
+            configured_token_hash: str,
+            rejected_access_token: Optional[str] = None) -> bool:
+        """
+        Checks whether a cached token can be reused.
+
+        Args:
+            tokens (Optional[dict]): The cached token.
+            configured_token_hash (str): Hash of the configured refresh token (see `hash_refresh_token`).
+            rejected_access_token (Optional[str]): An access token rejected by the Strava API.
+
+        Returns:
+            bool: True if the token expires more than `expiry_margin` seconds from now, was obtained
+                  with the configured refresh token (or predates the hash being cached) and has not
+                  been rejected.
+        """
+        if tokens is None or tokens['access_token'] == rejected_access_token:
+            return False
+        if tokens.get('configured_token_hash', configured_token_hash) != configured_token_hash:
+            return False
+
+        return tokens['expires_at'] - self.expiry_margin > time.time()
@@ -0,0 +1,65 @@
+import pandas as pd
+
+# Define distances searched for best efforts in every run stream, in metres keyed by pb distance
+best_effort_distances = {
+    '1km': 1000,
+    '5km': 5000,
+    '10km': 10000,
+    'HM': 21097.5
+}
+
+# Define columns of the pb effort data export
+pb_effort_columns = ['id', 'name', 'start_date', 'time', 'pb_distance', 'source']
+
+def format_effort_time(seconds: float) -> str:
+    """
+    Formats an effort's elapsed time as the `H:MM:SS` string used for official pb effort times.
+
+    Args:
+        seconds (float): The elapsed time in seconds.
+
+    Returns:
+        str: The elapsed time, rounded to the nearest second.
+    """
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+
+    return f'{hours}:{minutes:02d}:{seconds:02d}'
+
+def best_effort_progression(activity_data: list, best_efforts: dict) -> pd.DataFrame:
+    """
+    Builds the progression of best efforts detected in run streams as pb effort records.
+
+    Activities are ordered by start date and an activity's detected effort is kept for a
+    distance when it is faster than every earlier activity's, so each distance holds the
+    chronological progression of personal bests. Efforts of activities tagged with the same
+    distance count towards the progression, but are left out of the records as the tagged
+    activity's official time is exported instead.
+
+    Args:
+        activity_data (list): Activity records carrying the tag index.
+        best_efforts (dict): Elapsed time in seconds of each activity's best efforts (None if the
+                             activity is shorter than the distance), keyed by activity id (as a
+                             string) and then pb distance.
+
+    Returns:
+        pd.DataFrame: The detected pb effort records, with the columns of `pb_effort_columns` and
+                      `source` set to 'stream'.
+    """
+    # Collect detected effort times of activities with best efforts, ordered by start date
+    df = pd.DataFrame([record for record in activity_data if str(record['id']) in best_efforts],
+                      columns=['id', 'name', 'start_date', 'pb_distance'])
+    df = df.sort_values('start_date', key=lambda dates: pd.to_datetime(dates, utc=True), kind='stable')
+    times = pd.DataFrame([best_efforts[str(id)] for id in df['id']], index=df.index,
+                         columns=list(best_effort_distances), dtype=float)
+
+    # Keep efforts faster than every earlier effort at each distance, other than efforts with an official time
+    records = []
+    for distance in best_effort_distances:
+        earlier = times[distance].fillna(float('inf')).cummin().shift(fill_value=float('inf'))
+        personal_bests = (times[distance] < earlier) & (df['pb_distance'] != distance)
+        records.append(df[personal_bests].assign(time=times.loc[personal_bests, distance].map(format_effort_time),
+                                                 pb_distance=distance,
+                                                 source='stream'))
+
+    return pd.concat(records, ignore_index=True).reindex(columns=pb_effort_columns)
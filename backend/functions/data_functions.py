@@ -1,15 +1,77 @@
-from azure.storage.blob import BlobServiceClient, ContentSettings
+from backend.functions.stream_functions import stream_table, write_stream_table, read_stream_table, stream_best_efforts
+from backend.functions.storage import download_blob, open_blob_writer, upload_blob_chunks, BlockBlobWriter
+from backend.functions.tags import add_activity_tags, pb_effort_ids, coastal_path_activities, tag_columns
+from backend.functions.storage import blob_content_matches, content_hash, CONTENT_HASH_KEY
+from backend.functions.rollups import build_rollup, rollup_filename, rollup_periods
+from backend.functions.athletes import load_athlete_registry, athlete_container
+from backend.functions.scheduler import RateLimitScheduler, CircuitOpenError
+from backend.functions.route_functions import route_table, read_route_table
+from backend.functions.best_efforts import best_effort_distances
+from backend.functions.async_engine import AsyncIngestionEngine
+from backend.functions.metrics import in_current_context
+from backend.functions.authentication import TokenCache
+from concurrent.futures import ThreadPoolExecutor
+from backend.functions.journal import RunJournal
+from azure.storage.blob import ContentSettings
+from datetime import datetime, timezone
+from typing import Callable, Optional
 from dotenv import load_dotenv
-from typing import Optional
-from io import StringIO
+from io import BytesIO
+import pyarrow.parquet as pq
+import pyarrow as pa
 import pandas as pd
 import requests
+import hashlib
+import threading
 import logging
+import copy
 import json
 import os
 
 load_dotenv()
 
+# Define base url of the Strava API
+strava_api_url = 'https://www.strava.com/api/v3'
+
+# Define columns exported as part of the activity data
+activity_columns = [
+    'id',
+    'name',
+    'distance',
+    'moving_time',
+    'total_elevation_gain',
+    'type',
+    'start_date',
+    'kudos_count',
+    'comment_count',
+    'athlete_count',
+    'map'
+]
+
+# Define stream processing parameters, changing these invalidates previously exported streams
+stream_parameters = {
+    'keys': 'time,velocity_smooth,distance,heartrate',
+    'format': 'arrow'
+}
+
+# Define column types of the activity data Parquet export
+activity_parquet_schema = pa.schema([
+    ('id', pa.int64()),
+    ('name', pa.string()),
+    ('distance', pa.float64()),
+    ('moving_time', pa.int64()),
+    ('total_elevation_gain', pa.float64()),
+    ('type', pa.dictionary(pa.int32(), pa.string())),
+    ('start_date', pa.timestamp('ns', tz='UTC')),
+    ('kudos_count', pa.int64()),
+    ('comment_count', pa.int64()),
+    ('athlete_count', pa.int64()),
+    ('map', pa.string()),
+    ('pb_distance', pa.dictionary(pa.int32(), pa.string())),
+    ('is_wcp', pa.bool_()),
+    ('wcp_distance', pa.float64())
+])
+
 class Variables:
     """
     A container class for storing application-wide constants and configuration variables.
@@ -23,6 +85,20 @@ class Variables:
         refresh_token (str): The OAuth refresh token, loaded from the 'refresh_token' environment variable.
         storage_account_connection_string (str): Azure Blob Storage connection string,
             loaded from the 'blob_connection_string' environment variable.
+        force_full_sync (bool): Whether to ignore the stored sync state and re-download every activity,
+            loaded from the 'force_full_sync' environment variable (default False).
+        full_sync_interval_days (int): Maximum number of days between full activity re-syncs,
+            loaded from the 'full_sync_interval_days' environment variable (default 28, a multiple of
+            the weekly schedule of the data collection workflow).
+        strava_api_url (str): Base url of the Strava API, loaded from the 'strava_api_url'
+            environment variable (defaults to the public Strava API).
+        stream_backfill_limit (int): Maximum number of untagged run streams collected per run to backfill
+            best efforts, loaded from the 'stream_backfill_limit' environment variable (default 100).
+        container (str): The container path data is read from and written to ('strava', or an athlete's
+            blob prefix within it once configured with `for_athlete`).
+        athlete (Optional[str]): The athlete data is collected for, None outside of multi-athlete ingestion.
+        athlete_registry (Optional[str]): The athlete registry (see `load_athlete_registry`), loaded from
+            the 'athlete_registry' environment variable.
     """
     def __init__(self):
 
@@ -30,9 +106,55 @@ class Variables:
         self.client_id = os.getenv('client_id')
         self.client_secret = os.getenv('client_secret')
         self.refresh_token = os.getenv('refresh_token')
+        self.strava_api_url = os.getenv('strava_api_url', strava_api_url)
 
         # Storage account variables
         self.storage_account_conneciton_string = os.getenv('blob_connection_string')
+        self.container = 'strava'
+
+        # Activity sync variables
+        self.force_full_sync = os.getenv('force_full_sync', 'false').lower() == 'true'
+        self.full_sync_interval_days = int(os.getenv('full_sync_interval_days', 28))
+
+        # Activity stream variables
+        self.stream_backfill_limit = int(os.getenv('stream_backfill_limit', 100))
+
+        # Multi-athlete variables
+        self.athlete = None
+        self.athlete_registry = os.getenv('athlete_registry')
+
+    def for_athlete(self, athlete: str) -> 'Variables':
+        """
+        Returns a copy of the variables configured for an athlete of the athlete registry.
+
+        The copy holds the athlete's Strava credentials in place of the configured ones, and
+        reads and writes data under the athlete's blob prefix (`strava/athletes/<athlete>`).
+
+        Args:
+            athlete (str): The athlete name.
+
+        Returns:
+            Variables: The athlete's variables.
+
+        Raises:
+            ValueError: If no athlete registry is configured or the athlete is not registered.
+        """
+        if self.athlete_registry is None:
+            raise ValueError('No athlete registry is configured, set the athlete_registry environment variable')
+
+        registry = load_athlete_registry(self.athlete_registry)
+        if athlete not in registry:
+            raise ValueError(f'Athlete {athlete} is not in the athlete registry')
+
+        # Copy variables, replacing credentials and scoping storage to the athlete
+        athlete_vars = copy.copy(self)
+        athlete_vars.client_id = registry[athlete]['client_id']
+        athlete_vars.client_secret = registry[athlete]['client_secret']
+        athlete_vars.refresh_token = registry[athlete]['refresh_token']
+        athlete_vars.athlete = athlete
+        athlete_vars.container = athlete_container(self.container, athlete)
+
+        return athlete_vars
 
 
 class ApiService:
@@ -40,14 +162,21 @@ class ApiService:
     A service class responsible for managing API authentication credentials.
 
     Stores the client ID, client secret, and refresh token required to authenticate
-    requests to the API.
+    requests to the API. Every request is sent through a shared `RateLimitScheduler`,
+    so concurrent callers share a single rate limit budget, timeouts, retries and circuit
+    breaker. Per-activity units of work that still fail are recorded in `failures` rather
+    than failing their stage, unless the circuit breaker has opened.
     """
     def __init__(
             self,
             client_id: str,
             client_secret: str,
             refresh_token: str,
-            logger: logging.Logger) -> None:
+            logger: logging.Logger,
+            pool_size: int = 10,
+            api_url: str = strava_api_url,
+            journal: Optional[RunJournal] = None,
+            token_cache: Optional[TokenCache] = None) -> None:
         """
         Initializes the ApiService with the necessary authentication credentials.
 
@@ -55,42 +184,157 @@ class ApiService:
             client_id (str): The client ID for API authentication.
             client_secret (str): The client secret for API authentication.
             refresh_token (str): The refresh token used to obtain new access tokens.
+            pool_size (int): Maximum number of keep-alive connections held by the shared HTTP session,
+                             also used as the maximum number of concurrent requests and units of work.
+            api_url (str): Base url of the Strava API (e.g. a local stand-in when benchmarking).
+            journal (Optional[RunJournal]): Run journal used to checkpoint units of work and stage final
+                                            artifacts until the run is published. If None, artifacts are
+                                            uploaded directly.
+            token_cache (Optional[TokenCache]): Cache of the access token shared across runs. If None, the
+                                                access token is refreshed every time it is collected.
+
+        Attributes:
+            artifact_changes (dict): Whether each exported artifact (keyed `<container>/<blob name>`)
+                                     changed in this run, for the run report.
+            failures (dict): Error messages of failed per-activity units of work, keyed by unit type
+                             and then item id, for the run report.
         """
         self.client_id = client_id
         self.client_secret = client_secret
         self.refresh_token = refresh_token
         self.logger = logger
+        self.api_url = api_url.rstrip('/')
+        self.session = create_http_session(pool_size=pool_size)
+        self.scheduler = RateLimitScheduler(session=self.session, logger=logger, max_concurrency=pool_size)
+        self.engine = AsyncIngestionEngine(max_concurrency=pool_size)
+        self.journal = journal
+        self.token_cache = token_cache
+        self.access_token = None
+        self._token_lock = threading.Lock()
+        self.artifact_changes = {}
+        self.failures = {}
 
     def collect_access_token(self) -> Optional[str]:
         """
-        Refreshes and retrieves a new access token from the Strava API using the refresh token.
+        Retrieves an access token for the Strava API, refreshing it using the refresh token if required.
 
-        Sends a POST request to Strava's OAuth token endpoint with the stored client credentials
-        and refresh token, then extracts and stores the new access token.
+        When a token cache is in use, the cached access token is reused until shortly before it
+        expires and refreshes (with the latest, possibly rotated, refresh token) are serialized
+        across workers. Otherwise a new access token is requested every time.
 
         Returns:
-            Optional[str]: The new access token if the request is successful; otherwise, None.
+            Optional[str]: The access token if the request is successful; otherwise, None.
 
         Side Effects:
-            Sets the instance attribute `self.access_token` with the newly obtained token.
+            Sets the instance attribute `self.access_token` with the obtained token.
         """
-        response = requests.post('https://www.strava.com/api/v3/oauth/token',
-                                 data={
-                                     'client_id': self.client_id,
-                                     'client_secret': self.client_secret,
-                                     'grant_type': 'refresh_token',
-                                     'refresh_token': self.refresh_token})
+        if self.token_cache is not None:
+            tokens = self.token_cache.get(refresh_token=self.refresh_token, refresh=self.refresh_access_token)
+        else:
+            tokens = self.refresh_access_token(self.refresh_token)
 
-        tokens = response.json()
         self.access_token = tokens['access_token']
 
         return self.access_token, tokens
 
+    def renew_access_token(self, rejected_access_token: str) -> str:
+        """
+        Renews an access token rejected by the Strava API, e.g. one that expired mid-run while
+        requests were paused for rate limit budget.
+
+        Units of work rejected with the same access token share a single renewal: once one of them
+        has renewed the token, the others reuse it.
+
+        Args:
+            rejected_access_token (str): The access token rejected by the Strava API.
+
+        Returns:
+            str: The renewed access token.
+
+        Side Effects:
+            Sets the instance attribute `self.access_token` with the renewed token.
+        """
+        with self._token_lock:
+            # Reuse access token renewed by another unit of work since the token was rejected
+            if self.access_token is not None and self.access_token != rejected_access_token:
+                return self.access_token
+
+            self.logger.info('Access token rejected, renewing it')
+            if self.token_cache is not None:
+                tokens = self.token_cache.get(refresh_token=self.refresh_token, refresh=self.refresh_access_token,
+                                              rejected_access_token=rejected_access_token)
+            else:
+                tokens = self.refresh_access_token(self.refresh_token)
+            self.access_token = tokens['access_token']
+
+            return self.access_token
+
+    def authorized_request(
+            self,
+            method: str,
+            url: str,
+            access_token: Optional[str] = None,
+            **kwargs) -> requests.Response:
+        """
+        Sends a Strava API request authorized with an access token through the rate limit scheduler.
+
+        If the access token is rejected (401 Unauthorized), it is renewed (see `renew_access_token`)
+        and the request is retried once with the renewed token.
+
+        Args:
+            method (str): The HTTP method (e.g. 'GET').
+            url (str): The request url.
+            access_token (Optional[str]): The access token for authorization. If None, uses the
+                                          instance's stored access token.
+            **kwargs: Additional keyword arguments passed to `RateLimitScheduler.request`.
+
+        Returns:
+            requests.Response: The successful response.
+        """
+        if access_token is None:
+            access_token = self.access_token
+
+        try:
+            return self.scheduler.request(method, url=url, headers={'Authorization': 'Bearer ' + access_token},
+                                          **kwargs)
+        except requests.HTTPError as error:
+            if error.response is None or error.response.status_code != 401:
+                raise
+
+        # Retry once with a renewed access token
+        access_token = self.renew_access_token(rejected_access_token=access_token)
+
+        return self.scheduler.request(method, url=url, headers={'Authorization': 'Bearer ' + access_token}, **kwargs)
+
+    def refresh_access_token(self, refresh_token: str) -> dict:
+        """
+        Refreshes an access token from the Strava API.
+
+        Sends a POST request to Strava's OAuth token endpoint with the stored client credentials
+        and the refresh token provided.
+
+        Args:
+            refresh_token (str): The refresh token to exchange.
+
+        Returns:
+            dict: The token response, including `access_token`, `expires_at` and `refresh_token`.
+        """
+        response = self.scheduler.request('POST',
+                                          f'{self.api_url}/oauth/token',
+                                          data={
+                                              'client_id': self.client_id,
+                                              'client_secret': self.client_secret,
+                                              'grant_type': 'refresh_token',
+                                              'refresh_token': refresh_token})
+
+        return response.json()
+
     def get_activity_data(
             self,
             access_token: Optional[str] = None,
             per_page: int = 200,
-            page: int = 1) -> list:
+            page: int = 1,
+            after: Optional[int] = None) -> list:
         """
         Retrieves a list of athlete activities from the Strava API.
 
@@ -101,24 +345,25 @@ class ApiService:
                                         uses the instance's stored access token.
             per_page (int): Number of activities to retrieve per page (default is 200).
             page (int): Page number to retrieve (default is 1).
+            after (Optional[int]): Epoch timestamp; only activities starting after this time
+                                   are returned. If None, all activities are listed.
 
         Returns:
             list: A list of activity records represented as dictionaries.
         """
-        if access_token is None:
-            access_token = self.access_token
-
         # Define activity url
-        activities_url = "https://www.strava.com/api/v3/athlete/activities"
+        activities_url = f"{self.api_url}/athlete/activities"
 
-        # Define request header and parameters
-        header = {'Authorization': 'Bearer ' + access_token}
+        # Define request parameters
         param = {'per_page': per_page, 'page': page}
+        if after is not None:
+            param['after'] = after
 
         # Execute request
-        data = requests.get(
+        data = self.authorized_request(
+            'GET',
             url=activities_url,
-            headers=header,
+            access_token=access_token,
             params=param
         ).json()
 
@@ -127,42 +372,165 @@ class ApiService:
     def collect_all_activity_data(
             self,
             access_token: Optional[str] = None,
-            per_page: int = 200) -> list:
+            per_page: int = 200,
+            after: Optional[int] = None,
+            window: int = 1) -> list:
         """
         Retrieves all athlete activity data from the Strava API by paginating through results.
 
-        This method continuously fetches activity data page by page until no more activities
-        are returned, aggregating all results into a single list.
+        This method continuously fetches activity data until no more activities are returned,
+        aggregating all results into a single list. Pages are requested speculatively in windows
+        (pages N..N+window-1) on a bounded thread pool sharing the pooled HTTP session, so a full
+        backfill costs roughly one round trip per window rather than one per page. Collection
+        stops at the first empty page and results are kept in page order.
 
         Args:
             access_token (Optional[str]): The access token for API authorization. If None,
                                         the instance's stored access token will be used.
             per_page (int): Number of activities to retrieve per API request (default is 200).
+            after (Optional[int]): Epoch timestamp; if provided, only activities starting after
+                                   this time are collected.
+            window (int): Number of pages fetched concurrently (default is 1, i.e. sequential).
 
         Returns:
             list: A complete list of all activity records retrieved from the API.
         """
-        if access_token is None:
-            access_token = self.access_token
+
+        # Define function to fetch data for a specific page, within the caller's context (and stage)
+        @in_current_context
+        def fetch_page(page: int) -> list:
+            return self.get_activity_data(access_token=access_token, per_page=per_page, page=page, after=after)
+
         page = 1
         data = []
-        page_data = ['']
-        while len(page_data) > 0:
-            self.logger.info(f'Collecting data from page: {page}')
+        with ThreadPoolExecutor(max_workers=window) as executor:
+            while True:
+                self.logger.info(f'Collecting data from pages: {page} to {page + window - 1}')
 
-            # Fetch data for specific page
-            page_data = self.get_activity_data(
-                access_token=access_token,
-                per_page=per_page,
-                page=page)
+                # Fetch a window of pages concurrently, results are returned in page order
+                for page_data in executor.map(fetch_page, range(page, page + window)):
 
-            # Append page data to previous data already collected
-            data.extend(page_data)
+                    # Stop at the first empty page
+                    if len(page_data) == 0:
+                        return data
 
-            # Increment page number
-            page = page + 1
+                    # Append page data to previous data already collected
+                    data.extend(page_data)
 
-        return data
+                # Move on to the next window of pages
+                page = page + window
+
+    def sync_activity_data(
+            self,
+            vars: Variables,
+            container: str,
+            output_filename: str,
+            state_filename: str,
+            full_sync: bool = False,
+            window: int = 1,
+            access_token: Optional[str] = None) -> list:
+        """
+        Collects activity data incrementally using the sync state stored in blob storage.
+
+        The sync state records the newest `start_date` and activity id seen on the previous run.
+        Only activities started after that point are requested from the API (using the `after`
+        parameter) and merged by `id` into the existing activity data export. A full re-sync is
+        performed when requested, when no sync state or previous export exists, or when the last
+        full sync is older than `vars.full_sync_interval_days`, so that edited and deleted
+        activities are eventually picked up.
+
+        The updated sync state is held on `self.sync_state` and must be persisted with
+        `export_sync_state` once the activity data has been exported.
+
+        Args:
+            vars (Variables): An instance of the Variables class containing storage account credentials.
+            container (str): The name of the Azure Blob Storage container holding the exports.
+            output_filename (str): The name of the previously exported activity data CSV file.
+            state_filename (str): The name of the sync state JSON file.
+            full_sync (bool): Force a full re-sync regardless of the stored sync state.
+            window (int): Number of activity pages fetched concurrently during a full sync.
+            access_token (Optional[str]): The access token for API authorization. If None,
+                                        the instance's stored access token will be used.
+
+        Returns:
+            list: The complete, merged list of activity records (with flattened map polylines).
+        """
+        # Collect sync state and previously exported activity data
+        state = self.collect_sync_state(vars=vars, container=container, state_filename=state_filename)
+        existing_data = self.read_blob_data(vars=vars, container=container, blob_name=output_filename)
+
+        # Decide whether a full re-sync is required
+        if full_sync or existing_data is None or requires_full_sync(state, vars.full_sync_interval_days):
+            self.logger.info('Performing full activity sync')
+            activity_df = format_activity_data(
+                self.collect_all_activity_data(access_token=access_token, window=window))
+            last_full_sync = datetime.now(timezone.utc).isoformat()
+
+        # Otherwise, only collect activities started after the high-water mark
+        else:
+            self.logger.info(f"Performing incremental activity sync after {state['latest_start_date']}")
+            after = int(pd.Timestamp(state['latest_start_date']).timestamp()) - 1
+            new_activity_df = format_activity_data(
+                self.collect_all_activity_data(access_token=access_token, after=after))
+            self.logger.info(f'Collected {len(new_activity_df)} new activities')
+
+            activity_df = add_activity_tags(merge_activity_data(
+                existing_df=pd.read_csv(BytesIO(existing_data)),
+                new_df=new_activity_df))
+            last_full_sync = state['last_full_sync']
+
+        # Record the new high-water mark ready to be exported
+        self.sync_state = build_sync_state(df=activity_df, last_full_sync=last_full_sync)
+
+        return activity_df.to_dict(orient='records')
+
+    def collect_sync_state(self, vars: Variables, container: str, state_filename: str) -> Optional[dict]:
+        """
+        Reads the activity sync state from Azure Blob Storage.
+
+        Args:
+            vars (Variables): An instance of the Variables class containing storage account credentials.
+            container (str): The name of the Azure Blob Storage container.
+            state_filename (str): The name of the sync state JSON file.
+
+        Returns:
+            Optional[dict]: The stored sync state, or None if no state has been exported yet.
+        """
+        data = self.read_blob_data(vars=vars, container=container, blob_name=state_filename)
+
+        return json.loads(data) if data is not None else None
+
+    def export_sync_state(self, vars: Variables, container: str, output_filename: str) -> None:
+        """
+        Exports the sync state recorded by `sync_activity_data` to Azure Blob Storage.
+
+        This should only be called once the merged activity data has been exported, so that a
+        failed run never advances the high-water mark past data that was not persisted.
+
+        Args:
+            vars (Variables): An instance of the Variables class containing storage account credentials.
+            container (str): The name of the Azure Blob Storage container.
+            output_filename (str): The name of the sync state JSON file.
+        """
+        self.export_data_as_json(data=self.sync_state, vars=vars, container=container,
+                                 output_filename=output_filename)
+
+    def read_blob_data(self, vars: Variables, container: str, blob_name: str) -> Optional[bytes]:
+        """
+        Downloads the contents of a blob from Azure Blob Storage.
+
+        Args:
+            vars (Variables): An instance of the Variables class containing storage account credentials.
+            container (str): The name of the Azure Blob Storage container.
+            blob_name (str): The name of the blob to download.
+
+        Returns:
+            Optional[bytes]: The blob contents, or None if the blob does not exist.
+        """
+        # Download blob through the pooled client, returning None if it has not been created yet
+        return download_blob(connection_string=vars.storage_account_conneciton_string,
+                             container=container,
+                             blob_name=blob_name)
 
     def filter_out_coastal_path_data(
             self,
@@ -170,9 +538,8 @@ class ApiService:
         """
         Filters activity data to extract entries related to the coastal path.
 
-        This method scans the input DataFrame and returns a list of records where
-        the activity name contains the 'WCP' tag, indicating it is part of the Wales
-        Coast Path.
+        This method returns the records whose tag index marks them as part of the Wales
+        Coast Path (activity names containing the 'WCP' tag).
 
         Parameters:
         ----------
@@ -184,18 +551,25 @@ class ApiService:
         list
             A list of activity records (as dictionaries) related to the coastal path.
         """
-        # Filter out coastal path data based on WCP tag in activity name
-        coastal_path_data = [data for data in activity_data if 'WCP' in data['name']]
+        # Filter out coastal path data based on the tag index
+        coastal_path_data = coastal_path_activities(activity_data)
 
         return coastal_path_data
 
-    def collect_pb_effort_activities(self, activity_data: list, access_token: Optional[str] = None) -> pd.DataFrame:
+    def collect_pb_effort_activities(
+            self,
+            activity_data: list,
+            access_token: Optional[str] = None,
+            vars: Optional[Variables] = None,
+            previous_filename: str = 'pb_effort_data.csv'
+    ) -> pd.DataFrame:
         """
         Extract personal-best effort activities from Strava activity data and return them as a DataFrame.
 
         Filters activities matching target distances (5km, 10km, HM), fetches full
         activity details from the Strava API, extracts key fields, and compiles the
-        results into a pandas DataFrame.
+        results into a pandas DataFrame. Activities that fail to be collected keep their
+        previously published official result (see `previous_failed_rows`).
 
         Parameters
         ----------
@@ -203,152 +577,372 @@ class ApiService:
             List of activity metadata dictionaries.
         access_token : str, optional
             Strava API access token; defaults to the instance token.
+        vars : Variables, optional
+            Configuration object containing storage connection string. If None, previously
+            published results are not carried forward.
+        previous_filename : str, optional
+            The blob path of the previously published pb effort data CSV file.
 
         Returns
         -------
         pd.DataFrame
             DataFrame containing filtered PB effort activity details.
         """
-        # Collect pb effort activity ids
-        pb_efforts_ids = [k['id'] for k in activity_data
-                          if any(dist in k['name'] for dist in ['[5km]', '[10km]', '[HM]'])]
+        # Collect pb effort activity ids from the tag index
+        pb_efforts_ids = pb_effort_ids(activity_data)
 
-        # Manage access token
-        if access_token is None:
-            access_token = self.access_token
+        pb_distances = {k['id']: k['pb_distance'] for k in activity_data}
 
-        # Define request header
-        header = {'Authorization': 'Bearer ' + access_token}
-
-        # Iterate through each pb effort activity
-        pb_effort_data = []
-        for activity_id in pb_efforts_ids:
+        # Define function to collect the details of a single pb effort activity
+        def collect_pb_effort_activity(activity_id: int) -> dict:
             # Define activity url
-            activities_url = f"https://www.strava.com/api/v3/activities/{activity_id}"
+            activities_url = f"{self.api_url}/activities/{activity_id}"
 
             # Execute request
-            data = requests.get(
+            data = self.authorized_request(
+                'GET',
                 url=activities_url,
-                headers=header,
+                access_token=access_token,
             ).json()
 
-            # Fetch official time from data
-            data["time"] = data['description'].split("[")[-1].split("]")[0].split(" - ")[-1]
+            # Fetch official time from data, failing activities whose description holds no result
+            description = data.get('description') or ''
+            if '[' not in description:
+                raise ValueError(f'Activity {activity_id} has no official result in its description')
+            data["time"] = description.split("[")[-1].split("]")[0].split(" - ")[-1]
+            data["pb_distance"] = pb_distances[activity_id]
+            data["source"] = "official"
 
             # Filter down data to keys of interest
-            keys_to_keep = {"id", "name", "start_date", "time"}
-            filtered_data = {k: data[k] for k in keys_to_keep if k in data}
+            keys_to_keep = {"id", "name", "start_date", "time", "pb_distance", "source"}
+            return {k: data[k] for k in keys_to_keep if k in data}
+
+        # Skip pb effort activities already collected by a previous attempt at this run
+        completed = self.journal.completed_units('pb_efforts') if self.journal is not None else {}
+        pending_ids = [activity_id for activity_id in pb_efforts_ids if str(activity_id) not in completed]
+
+        # Define function to collect a pending pb effort activity and record it in the run journal
+        def collect_pending_activity(activity_id: int) -> None:
+            completed[str(activity_id)] = collect_pb_effort_activity(activity_id)
+            if self.journal is not None:
+                self.journal.complete_unit('pb_efforts', activity_id, completed[str(activity_id)])
+
+        # Collect each pending pb effort activity concurrently, checkpointing progress even if a request fails
+        try:
+            self.engine.map(self.isolate_failures('pb_efforts', collect_pending_activity), pending_ids)
+
+        finally:
+            if self.journal is not None:
+                self.journal.save()
 
-            # Append activity data to list
-            pb_effort_data.append(filtered_data)
+        df = pd.DataFrame([completed[str(activity_id)] for activity_id in pb_efforts_ids
+                           if str(activity_id) in completed])
 
-        return pd.DataFrame(pb_effort_data)
+        # Keep the previously published official results of activities that failed to be collected
+        if vars is not None:
+            previous = self.previous_failed_rows(unit='pb_efforts', vars=vars, container=vars.container,
+                                                 blob_name=previous_filename)
+            if 'source' in previous:
+                previous = previous[previous['source'] != 'stream']
+            df = pd.concat([df, previous], ignore_index=True)
+
+        return df
 
     def collect_activity_stream_data(
             self,
             activity_data: list,
             vars: Variables,
-            access_token: Optional[str] = None
-    ) -> pd.DataFrame:
+            access_token: Optional[str] = None,
+            manifest_filename: str = 'stream/manifest.json',
+            backfill_limit: int = 100
+    ) -> dict:
         """
-        Collect activity stream data for PB efforts and export splits as JSON to blob storage.
-
-        Fetches distance, heartrate, and time streams from Strava for activities tagged with
-        [5km], [10km], or [HM]. Computes 1km splits with timing and average heart rate,
-        then exports each activity's splits as JSON to Azure Blob Storage.
+        Collect activity stream data for PB efforts and runs, export it to blob storage and detect best efforts.
+
+        Fetches time, velocity, distance, and heartrate streams from Strava for activities tagged
+        with [5km], [10km], or [HM] and for every run, and exports each activity's streams at full
+        resolution as an Arrow IPC file (`stream/<id>.arrow`) to Azure Blob Storage. Splits and
+        downsampled views are derived from the stored streams on demand (see `stream_functions`).
+        The fastest window of each distance in `best_effort_distances` is detected in every stream
+        as it is collected (see `compute_best_efforts`).
+
+        Historical streams never change, so a manifest blob records which activities already
+        have exported streams along with a hash of the stream processing parameters, and the
+        best efforts detected in them. Only new activities, or those exported with different
+        parameters, are collected. Tagged activities are always collected, whilst untagged runs are
+        backfilled newest first, at most `backfill_limit` per run, to stay within the Strava rate
+        limits. Activities without a stream (e.g. manual activities, which respond 404 or with no
+        streams) or with an invalid stream response are recorded as unavailable in the manifest, so
+        they are not collected again with the same parameters and do not hold up the backfill. Best
+        efforts missing from the manifest (e.g. after the effort distances change) are detected again
+        from the stored streams, without hitting the Strava API.
 
         Parameters
         ----------
         activity_data : list
-            List of activity metadata dictionaries.
+            List of activity metadata dictionaries, newest first.
         vars : Variables
             Configuration object containing storage connection string.
         access_token : str, optional
             Strava API access token; defaults to the instance token.
+        manifest_filename : str, optional
+            The blob path of the stream manifest JSON file.
+        backfill_limit : int, optional
+            Maximum number of untagged run streams collected from the Strava API.
 
         Returns
         -------
-        None
-            This method performs data collection and export but does not return a value.
+        dict
+            Elapsed time in seconds of the best efforts detected in each activity's stream (None for
+            distances longer than the activity), keyed by activity id (as a string) and pb distance.
         """
-        # Collect pb effort activity ids
-        pb_efforts_ids = [k['id'] for k in activity_data
-                          if any(dist in k['name'] for dist in ['[5km]', '[10km]', '[HM]'])]
+        # Collect stream manifest, discarding best efforts detected for different effort distances
+        manifest = self.collect_stream_manifest(vars=vars, container=vars.container,
+                                                manifest_filename=manifest_filename)
+        if manifest.get("best_effort_distances") != best_effort_distances:
+            manifest["best_efforts"] = {}
+        manifest.setdefault("unavailable", {})
+
+        # Determine which activities require stream collection and which only require best effort detection
+        parameters_hash = stream_parameters_hash()
+        pending_ids, detect_ids = select_stream_activities(activity_data=activity_data,
+                                                           manifest=manifest,
+                                                           parameters_hash=parameters_hash,
+                                                           backfill_limit=backfill_limit)
+        self.logger.info(f'{len(pending_ids)} activity streams require collection, '
+                         f'{len(detect_ids)} stored streams require best effort detection')
+
+        # Return early if every stream has already been exported and searched
+        if len(pending_ids) == 0 and len(detect_ids) == 0:
+            return manifest["best_efforts"]
+
+        # Define function to record the elapsed time of each best effort in an activity stream
+        def record_best_efforts(activity_id: int, table: pa.Table) -> None:
+            efforts = stream_best_efforts(table, effort_distances=best_effort_distances)
+            manifest["best_efforts"][str(activity_id)] = {
+                distance: round(effort["elapsed_time"], 1) if effort is not None else None
+                for distance, effort in efforts.items()
+            }
 
-        # Manage access token
-        if access_token is None:
-            access_token = self.access_token
+        # Define function to collect, export and record the stream of a single activity and its best efforts
+        def collect_stream(activity_id: int) -> None:
+            table = self.export_activity_stream(activity_id=activity_id, vars=vars, manifest=manifest,
+                                                parameters_hash=parameters_hash, access_token=access_token)
+            if table is not None:
+                record_best_efforts(activity_id, table)
+
+        # Define function to detect best efforts in an activity stream already exported to blob
+        def detect_stored_best_efforts(activity_id: int) -> None:
+            data = self.read_blob_data(vars=vars, container=vars.container, blob_name=f"stream/{activity_id}.arrow")
+            if data is not None:
+                record_best_efforts(activity_id, read_stream_table(data, columns=['distance', 'time']))
+
+        # Collect pending streams and search stored streams concurrently, recording progress even if a request fails
+        try:
+            self.engine.map(self.isolate_failures('best_efforts', detect_stored_best_efforts), detect_ids)
+            self.engine.map(self.isolate_failures('streams', collect_stream), pending_ids)
+
+        finally:
+            # Export updated manifest
+            manifest["parameters"] = stream_parameters
+            manifest["best_effort_distances"] = best_effort_distances
+            self.export_data_as_json(data=manifest, vars=vars, container=vars.container,
+                                     output_filename=manifest_filename)
+
+        return manifest["best_efforts"]
+
+    def export_activity_stream(
+            self,
+            activity_id: int,
+            vars: Variables,
+            manifest: dict,
+            parameters_hash: str,
+            access_token: Optional[str] = None) -> Optional[pa.Table]:
+        """
+        Collect the stream of a single activity, export it to blob storage and record it in the stream manifest.
 
-        # Define request header
-        header = {'Authorization': 'Bearer ' + access_token}
+        Activities without a stream, or with an invalid stream response, are recorded as unavailable
+        with the current parameters hash, so they are not collected again in future runs.
 
-        # Iterate through each pb effort activity
-        for activity_id in pb_efforts_ids:
-            # Define activity url
-            activities_url = f"https://www.strava.com/api/v3/activities/{activity_id}/" + \
-                "streams?keys=time,velocity_smooth,distance,heartrate"
+        Parameters
+        ----------
+        activity_id : int
+            The Strava activity id.
+        vars : Variables
+            Configuration object containing storage connection string.
+        manifest : dict
+            The stream manifest (see `collect_stream_manifest`), updated in place.
+        parameters_hash : str
+            Hash of the current stream processing parameters.
+        access_token : str, optional
+            Strava API access token; defaults to the instance token.
 
-            # Define request parameters
-            params = {
-                "keys": "distance,heartrate,time",
-                "key_by_type": "true"
-            }
+        Returns
+        -------
+        pa.Table or None
+            The exported stream table, or None if the activity has no stream.
 
-            # Execute request
-            data = requests.get(
-                url=activities_url,
-                headers=header,
-                params=params
-            ).json()
+        Raises
+        ------
+        ValueError
+            If the stream response is invalid.
+        """
+        # Collect activity stream, recording activities whose stream response is invalid
+        try:
+            table = self.collect_available_stream(activity_id=activity_id, access_token=access_token)
+        except ValueError:
+            manifest["unavailable"][str(activity_id)] = parameters_hash
+            raise
+
+        # Record activities without a stream
+        if table is None:
+            self.logger.info(f'Activity {activity_id} has no stream, skipping it in future runs')
+            manifest["unavailable"][str(activity_id)] = parameters_hash
+            return None
+
+        # Export stream table to blob and record it in manifest
+        self.export_stream_table(table=table, vars=vars, container=vars.container,
+                                 output_filename=f"stream/{activity_id}.arrow")
+        manifest["activities"][str(activity_id)] = parameters_hash
+
+        return table
+
+    def collect_available_stream(self, activity_id: int, access_token: Optional[str] = None) -> Optional[pa.Table]:
+        """
+        Collect the full resolution stream data of a single activity, if the activity has any.
+
+        Activities without streams (e.g. manual activities) respond 404 Not Found or with no streams.
+
+        Parameters
+        ----------
+        activity_id : int
+            The Strava activity id.
+        access_token : str, optional
+            Strava API access token; defaults to the instance token.
+
+        Returns
+        -------
+        pa.Table or None
+            The activity's streams (see `collect_activity_stream`), or None if it has none.
+        """
+        try:
+            table = self.collect_activity_stream(activity_id=activity_id, access_token=access_token)
+        except requests.HTTPError as error:
+            if error.response is None or error.response.status_code != 404:
+                raise
+            return None
+
+        return table if table.num_columns > 0 else None
+
+    def collect_activity_stream(self, activity_id: int, access_token: Optional[str] = None) -> pa.Table:
+        """
+        Collect the full resolution stream data of a single activity.
+
+        Parameters
+        ----------
+        activity_id : int
+            The Strava activity id.
+        access_token : str, optional
+            Strava API access token; defaults to the instance token.
+
+        Returns
+        -------
+        pa.Table
+            The activity's streams, one int32 or float32 column per stream type.
+        """
+        # Define activity url
+        activities_url = f"{self.api_url}/activities/{activity_id}/" + \
+            f"streams?keys={stream_parameters['keys']}"
+
+        # Define request parameters
+        params = {
+            "keys": "distance,heartrate,time",
+            "key_by_type": "true"
+        }
+
+        # Execute request
+        data = self.authorized_request(
+            'GET',
+            url=activities_url,
+            access_token=access_token,
+            params=params
+        ).json()
+
+        # Validate response, which maps each stream type to its data
+        if not isinstance(data, dict) or not all(isinstance(value, dict) and 'data' in value
+                                                 for value in data.values()):
+            raise ValueError(f'Invalid stream response for activity {activity_id}')
+
+        # Collect raw data as typed columns
+        return stream_table({key: value["data"] for key, value in data.items()})
+
+    def export_stream_table(self, table: pa.Table, vars: Variables, container: str, output_filename: str) -> None:
+        """
+        Export a stream table as an Arrow IPC file to Azure Blob Storage.
+
+        The file is streamed into block blob staging uncompressed, so it can be memory-mapped or
+        read without copying once downloaded (see `read_stream_table`).
+
+        Parameters
+        ----------
+        table : pa.Table
+            The stream table to export.
+        vars : Variables
+            Configuration object containing the storage account connection string.
+        container : str
+            The name of the Azure Blob Storage container.
+        output_filename : str
+            The blob path/filename for the uploaded Arrow file.
+
+        Returns
+        -------
+        None
+        """
+        # Stream Arrow file to Azure Blob Storage through the pooled client
+        writer = open_blob_writer(connection_string=vars.storage_account_conneciton_string,
+                                  container=container,
+                                  blob_name=output_filename,
+                                  content_settings=ContentSettings(content_type="application/vnd.apache.arrow.file"))
+        with writer:
+            write_stream_table(table, writer)
+
+    def collect_stream_manifest(self, vars: Variables, container: str, manifest_filename: str) -> dict:
+        """
+        Reads the stream manifest from Azure Blob Storage.
+
+        Parameters
+        ----------
+        vars : Variables
+            Configuration object containing storage connection string.
+        container : str
+            The name of the Azure Blob Storage container.
+        manifest_filename : str
+            The blob path of the stream manifest JSON file.
+
+        Returns
+        -------
+        dict
+            The manifest, mapping activity ids (as strings) to the parameters hash their streams
+            were exported with (or found unavailable with) and the best efforts detected in them. An
+            empty manifest is returned if none has been exported yet.
+        """
+        data = self.read_blob_data(vars=vars, container=container, blob_name=manifest_filename)
 
-            # Fetch distance, HR and time data from request response
-            distance = data.get("distance", {}).get("data", [])
-            heartrate = data.get("heartrate", {}).get("data", [])
-            time = data.get("time", {}).get("data", [])
-
-            # Remap raw data to fit structure generated for split data
-            remapped_data = [
-                {key: value["data"][i] for key, value in data.items()}
-                for i in range(len(next(iter(data.values()))["data"]))
-            ]
-
-            # Smooth out raw data
-            remapped_data = downsample_mean(remapped_data, factor=round(len(remapped_data) / 50))
-
-            # Iterate through raw data and generate aggregated split data
-            splits = []
-            current_split_start_idx = 0
-            split_distance = 1000
-            for i in range(1, len(distance)):
-                if distance[i] - distance[current_split_start_idx] >= split_distance:
-                    split = {
-                        "split_number": len(splits) + 1,
-                        "start_time": time[current_split_start_idx],
-                        "end_time": time[i],
-                        "split_time": time[i] - time[current_split_start_idx],
-                        "avg_hr": (
-                            sum(heartrate[current_split_start_idx:i]) / len(heartrate[current_split_start_idx:i])
-                            if heartrate else None
-                        )
-                    }
-                    splits.append(split)
-                    current_split_start_idx = i
-
-            # Generate json payload to store in blob
-            exported_data = {}
-            exported_data["splits"] = splits
-            exported_data["raw"] = remapped_data
-
-            # Export data to blob
-            self.export_data_as_json(data=exported_data, vars=vars, container="strava",
-                                     output_filename=f"stream/{activity_id}.json")
+        return json.loads(data) if data is not None else {"activities": {}, "unavailable": {}, "best_efforts": {}}
 
     def export_data_as_json(self, data: list, vars: Variables, container: str, output_filename: str) -> None:
         """
         Export data as JSON to Azure Blob Storage.
 
         Serializes the provided data to JSON format and uploads it to the specified
-        Azure Blob Storage container with the appropriate content type.
+        Azure Blob Storage container with the appropriate content type. The JSON is encoded
+        incrementally and streamed into block blob staging, so the serialized document is
+        never held in memory in full, and is stored gzip compressed with a `gzip` content
+        encoding (decoded transparently by `download_blob`).
+
+        The SHA-256 hash of the JSON is stored in the blob metadata, and the upload is skipped
+        when the existing blob already holds the same content. Whether the blob changed is
+        recorded in `artifact_changes` for the run report.
 
         Parameters
         ----------
@@ -365,34 +959,39 @@ class ApiService:
         -------
         None
         """
-        # Serialize to JSON
-        json_data = json.dumps(data)
-
-        # Connect to blob storage account
-        blob_service_client = BlobServiceClient.from_connection_string(
-            vars.storage_account_conneciton_string
-        )
-
-        # Connect to container within the storage account
-        blob_client = blob_service_client.get_blob_client(
+        # Hash serialized JSON, skipping the upload if the blob is unchanged
+        digest = content_hash(iter_json_chunks(data))
+        if self.artifact_unchanged(vars=vars, container=container, blob_name=output_filename, digest=digest):
+            return
+
+        # Stream JSON to Azure Blob Storage through the pooled client as it is serialized
+        upload_blob_chunks(
+            connection_string=vars.storage_account_conneciton_string,
             container=container,
-            blob=output_filename
+            blob_name=output_filename,
+            chunks=iter_json_chunks(data),
+            compress=True,
+            content_settings=ContentSettings(content_type="application/json"),
+            metadata={CONTENT_HASH_KEY: digest}
         )
 
-        # Upload JSON to Azure Blob Storage
-        blob_client.upload_blob(
-            json_data,
-            overwrite=True,
-            content_settings=ContentSettings(content_type="application/json")
-        )
-
-    def export_data_as_csv(self, df: pd.DataFrame, vars: Variables, container: str, output_filename: str) -> None:
+    def export_data_as_csv(
+            self,
+            df: pd.DataFrame,
+            vars: Variables,
+            container: str,
+            output_filename: str,
+            chunk_size: int = 10000) -> None:
         """
         Export a pandas DataFrame as a CSV file to an Azure Blob Storage container.
 
-        This method converts the provided DataFrame into an in-memory CSV string,
-        connects to the Azure Blob Storage account specified in `vars`, and uploads
-        the CSV content to the designated container and blob path.
+        This method renders the provided DataFrame to CSV in chunks of rows and streams each
+        chunk into block blob staging in the container and blob path specified, so the rendered
+        CSV is never held in memory in full. The CSV is stored gzip compressed with a `gzip`
+        content encoding (decoded transparently by `download_blob`).
+
+        The CSV is rendered once to compute its SHA-256 hash, which is stored in the blob metadata,
+        and the upload is skipped when the published CSV already holds the same content.
 
         Parameters:
             df : pd.DataFrame
@@ -404,144 +1003,621 @@ class ApiService:
                 The name of the Azure Blob Storage container where the file will be uploaded.
             output_filename : str
                 The name (including path, if applicable) of the CSV file to create in the blob container.
+            chunk_size : int
+                Number of rows rendered at a time.
 
         Returns: None (This method performs an upload and does not return a value.)
         """
-        # Convert DataFrame to CSV in memory
-        csv_buffer = StringIO()
-        df.to_csv(csv_buffer, index=False)
+        # Hash rendered CSV, skipping the upload if the published artifact is unchanged
+        digest = content_hash(iter_csv_chunks(df, chunk_size=chunk_size))
+        if self.artifact_unchanged(vars=vars, container=container, blob_name=output_filename, digest=digest):
+            return
+
+        # Stream CSV to Azure Blob Storage through the pooled client, one chunk of rows at a time
+        with self.open_artifact(vars=vars, container=container, blob_name=output_filename, compress=True,
+                                content_settings=ContentSettings(content_type="text/csv"),
+                                metadata={CONTENT_HASH_KEY: digest}) as writer:
+            for chunk in iter_csv_chunks(df, chunk_size=chunk_size):
+                writer.write(chunk)
+
+    def export_activity_data(
+            self,
+            data: list,
+            vars: Variables,
+            container: str,
+            output_filename: str,
+            chunk_size: int = 5000) -> None:
+        """
+        Exports activity data to a CSV file and uploads it to Azure Blob Storage.
 
-        # Connect to blob storage account
-        blob_service_client = BlobServiceClient.from_connection_string(
-            vars.storage_account_conneciton_string)
+        Processes the list of activity dictionaries into the exported activity data structure,
+        renders it as gzip compressed CSV, and uploads the CSV to the specified Azure Blob
+        Storage container.
+        A typed, compressed Parquet copy is published alongside the CSV (with the same name and
+        a `.parquet` extension) for the frontend to load.
 
-        # Connect to container within the storage account
-        blob_client = blob_service_client.get_blob_client(
+        Activities are formatted in chunks, each written as CSV rows and as a Parquet row group
+        streamed into block blob staging, so peak memory is bounded by the chunk size rather than
+        the number of activities.
+
+        The SHA-256 hash of the rendered CSV is stored in the metadata of both blobs (the Parquet
+        copy is derived from the same rows), and both uploads are skipped when the published
+        artifacts already hold the same content.
+
+        Args:
+            data (list): A list of activity data dictionaries to export.
+            vars (Variables): An instance of the Variables class containing storage account credentials.
+            container (str): The name of the Azure Blob Storage container where the file will be uploaded.
+            output_filename (str): The name of the output CSV file in the blob storage.
+            chunk_size (int): Number of activities formatted at a time.
+        """
+        # Hash rendered CSV, skipping both uploads if the published artifacts are unchanged
+        parquet_filename = os.path.splitext(output_filename)[0] + '.parquet'
+        digest = content_hash(df.to_csv(index=False, header=start == 0)
+                              for start, df in iter_activity_frames(data, chunk_size=chunk_size))
+        csv_unchanged = self.artifact_unchanged(vars=vars, container=container, blob_name=output_filename,
+                                                digest=digest)
+        parquet_unchanged = self.artifact_unchanged(vars=vars, container=container, blob_name=parquet_filename,
+                                                    digest=digest)
+        if csv_unchanged and parquet_unchanged:
+            return
+
+        # Open CSV and Parquet writers
+        csv_writer = self.open_artifact(vars=vars, container=container, blob_name=output_filename, compress=True,
+                                        content_settings=ContentSettings(content_type="text/csv"),
+                                        metadata={CONTENT_HASH_KEY: digest})
+        parquet_writer = self.open_artifact(
+            vars=vars,
             container=container,
-            blob=output_filename)
+            blob_name=parquet_filename,
+            content_settings=ContentSettings(content_type="application/vnd.apache.parquet"),
+            metadata={CONTENT_HASH_KEY: digest})
+
+        with csv_writer, parquet_writer, \
+                pq.ParquetWriter(parquet_writer, activity_parquet_schema, compression='zstd') as row_group_writer:
+            for start, df in iter_activity_frames(data, chunk_size=chunk_size):
 
-        # Upload CSV to Azure Blob Storage
-        blob_client.upload_blob(csv_buffer.getvalue(), overwrite=True)
+                # Write chunk as CSV rows and a Parquet row group
+                csv_writer.write(df.to_csv(index=False, header=start == 0))
+                row_group_writer.write_table(activity_parquet_table(df))
 
-    def export_activity_data(self, data: list, vars: Variables, container: str, output_filename: str) -> None:
+    def export_rollups(self, data: list, vars: Variables, container: str) -> None:
         """
-        Exports activity data to a CSV file and uploads it to Azure Blob Storage.
+        Exports yearly, monthly and weekly rollups of the activity data to Azure Blob Storage.
 
-        Processes the list of activity dictionaries into a pandas DataFrame, selects
-        relevant columns, cleans up the map polyline data, converts the DataFrame
-        to CSV format, and uploads the CSV to the specified Azure Blob Storage container.
+        Each rollup holds the activity count and summed distance, elevation gain, moving time and
+        kudos count per period and activity type (see `build_rollup`), so frontend pages read a
+        few KB table rather than aggregating the full activity history. Rollups are exported as
+        CSV files (see `rollup_filename`), skipping those that are unchanged.
 
         Args:
-            data (list): A list of activity data dictionaries to export.
+            data (list): A list of activity data dictionaries.
             vars (Variables): An instance of the Variables class containing storage account credentials.
-            container (str): The name of the Azure Blob Storage container where the file will be uploaded.
-            output_filename (str): The name of the output CSV file in the blob storage.
+            container (str): The name of the Azure Blob Storage container.
         """
-        # Generate pandas dataframe from data collected
-        df = pd.DataFrame(data)
+        df = pd.DataFrame(data, columns=activity_columns)
+        for resolution in rollup_periods:
+            self.export_data_as_csv(df=build_rollup(df, resolution), vars=vars, container=container,
+                                    output_filename=rollup_filename(resolution))
 
-        # Remove unwanted columns
-        df = df[['id',
-                 'name',
-                 'distance',
-                 'moving_time',
-                 'total_elevation_gain',
-                 'type',
-                 'start_date',
-                 'kudos_count',
-                 'comment_count',
-                 'athlete_count',
-                 'map']]
+    def export_routes(self, data: list, vars: Variables, container: str, output_filename: str) -> None:
+        """
+        Exports the decoded and simplified route of every activity to Azure Blob Storage.
 
-        # Clean up polyline data from map column in dataframe
-        df['map'] = df['map'].apply(lambda x: x['summary_polyline'])
+        The summary polyline of each activity with GPS data is decoded and simplified with
+        Douglas-Peucker at every detail level in `route_tolerances`, and the routes are exported as
+        an Arrow IPC file keyed by activity id (see `route_table`), so heatmaps are rendered from a
+        slice of pre-decoded coordinates. Routes whose polyline is unchanged are copied from the
+        previously exported file rather than decoded again, and the upload is skipped when the
+        file is unchanged.
 
-        self.export_data_as_csv(df=df, vars=vars, container=container, output_filename=output_filename)
+        Args:
+            data (list): A list of activity data dictionaries.
+            vars (Variables): An instance of the Variables class containing storage account credentials.
+            container (str): The name of the Azure Blob Storage container.
+            output_filename (str): The blob path of the route file.
+        """
+        # Collect polylines of activities with GPS data
+        routes = {int(record['id']): record['map'] for record in data
+                  if record['distance'] > 0 and isinstance(record['map'], str) and record['map']}
+
+        # Decode and simplify new and changed routes, reusing those already exported
+        previous = self.read_blob_data(vars=vars, container=container, blob_name=output_filename)
+        table = route_table(routes, previous=read_route_table(previous) if previous is not None else None)
+
+        # Serialize route table as a single record batch, so unchanged routes produce an unchanged file
+        sink = pa.BufferOutputStream()
+        write_stream_table(table.combine_chunks(), sink)
+        contents = sink.getvalue().to_pybytes()
+
+        # Export route file, skipping the upload if it is unchanged
+        digest = content_hash([contents])
+        if self.artifact_unchanged(vars=vars, container=container, blob_name=output_filename, digest=digest):
+            return
+
+        with self.open_artifact(vars=vars, container=container, blob_name=output_filename,
+                                content_settings=ContentSettings(content_type="application/vnd.apache.arrow.file"),
+                                metadata={CONTENT_HASH_KEY: digest}) as writer:
+            writer.write(contents)
+
+    def artifact_unchanged(self, vars: Variables, container: str, blob_name: str, digest: str) -> bool:
+        """
+        Checks whether a published artifact already holds content with a hash, recording the result
+        in `artifact_changes`.
 
-    def collect_wcp_segments(
-        self,
-        access_token: Optional[str] = None,
-        per_page: int = 200,
-        page: int = 1
-    ) -> pd.DataFrame:
+        Args:
+            vars (Variables): An instance of the Variables class containing storage account credentials.
+            container (str): The name of the Azure Blob Storage container.
+            blob_name (str): The published name of the artifact.
+            digest (str): The SHA-256 hash of the artifact content about to be exported.
+
+        Returns:
+            bool: True if the published artifact is unchanged and need not be uploaded.
         """
+        unchanged = blob_content_matches(vars.storage_account_conneciton_string, container, blob_name, digest)
+        self.artifact_changes[f'{container}/{blob_name}'] = not unchanged
+        if unchanged:
+            self.logger.info(f'{blob_name} unchanged, skipping upload')
+
+        return unchanged
+
+    def isolate_failures(self, unit: str, function: Callable) -> Callable:
         """
-        if access_token is None:
-            access_token = self.access_token
+        Wraps a per-activity unit of work so a failure is recorded rather than failing its stage.
 
-        # Define activity url
-        activities_url = "https://www.strava.com/api/v3/segments/starred"
+        Failed requests (once the scheduler's retries are exhausted), invalid responses and
+        responses missing expected fields are logged and recorded in `self.failures`, and the
+        unit returns None. An open circuit breaker is still raised, so a stage stops quickly
+        when Strava is unavailable.
+
+        Args:
+            unit (str): The type of unit of work (e.g. 'streams'), used to group failures.
+            function (Callable): Function performing the unit of work for a single item.
 
-        # Define request header and parameters
-        header = {'Authorization': 'Bearer ' + access_token}
+        Returns:
+            Callable: The wrapped function.
+        """
+        def run(item):
+            try:
+                return function(item)
+            except CircuitOpenError:
+                raise
+            except (requests.RequestException, KeyError, ValueError) as error:
+                self.logger.warning(f'Failed to collect {unit} for {item}: {error!r}')
+                self.failures.setdefault(unit, {})[str(item)] = repr(error)
+
+        return run
+
+    def previous_failed_rows(self, unit: str, vars: Variables, container: str, blob_name: str) -> pd.DataFrame:
+        """
+        Reads the previously published rows of items whose unit of work failed in this run.
+
+        Artifacts rebuilt in full on every run carry these rows forward, so a transient failure
+        does not remove previously published data.
+
+        Args:
+            unit (str): The type of unit of work (e.g. 'pb_efforts'), whose failures are keyed by item id.
+            vars (Variables): An instance of the Variables class containing storage account credentials.
+            container (str): The name of the Azure Blob Storage container.
+            blob_name (str): The name of the previously published CSV file, with an `id` column.
+
+        Returns:
+            pd.DataFrame: The previously published rows of failed items, empty if nothing failed or
+                          the artifact has not been published yet.
+        """
+        failed_ids = self.failures.get(unit, {})
+        if len(failed_ids) == 0:
+            return pd.DataFrame()
+
+        data = self.read_blob_data(vars=vars, container=container, blob_name=blob_name)
+        if data is None:
+            return pd.DataFrame()
+        previous = pd.read_csv(BytesIO(data))
+
+        return previous[previous['id'].astype(str).isin(failed_ids)]
+
+    def open_artifact(self, vars: Variables, container: str, blob_name: str, **kwargs) -> BlockBlobWriter:
+        """
+        Opens a writer for a final artifact, staging it in the run journal when one is in use.
+
+        Staged artifacts are only copied to their published name once every stage of the run
+        has succeeded (see `RunJournal.publish`).
+
+        Args:
+            vars (Variables): An instance of the Variables class containing storage account credentials.
+            container (str): The name of the Azure Blob Storage container.
+            blob_name (str): The published name of the artifact.
+            **kwargs: Additional keyword arguments passed when committing the blob (e.g. content_settings).
+
+        Returns:
+            BlockBlobWriter: The artifact writer, which must be closed to upload the artifact.
+        """
+        if self.journal is not None:
+            return self.journal.open_artifact(container=container, blob_name=blob_name, **kwargs)
+
+        return open_blob_writer(connection_string=vars.storage_account_conneciton_string,
+                                container=container,
+                                blob_name=blob_name,
+                                **kwargs)
+
+    def get_starred_segments(
+            self,
+            access_token: Optional[str] = None,
+            per_page: int = 200,
+            page: int = 1) -> list:
+        """
+        Retrieves a page of the athlete's starred segments from the Strava API.
+
+        Args:
+            access_token (Optional[str]): The access token for authorization. If None,
+                                        uses the instance's stored access token.
+            per_page (int): Number of segments to retrieve per page (default is 200).
+            page (int): Page number to retrieve (default is 1).
+
+        Returns:
+            list: A list of starred segment records represented as dictionaries.
+        """
+        # Define segment url
+        segments_url = f"{self.api_url}/segments/starred"
+
+        # Define request parameters
         param = {'per_page': per_page, 'page': page}
 
         # Execute request
-        data = requests.get(
-            url=activities_url,
-            headers=header,
+        data = self.authorized_request(
+            'GET',
+            url=segments_url,
+            access_token=access_token,
             params=param
         ).json()
 
-        wcp_segments = [segment for segment in data if "WCP" in segment["name"]]
+        return data
 
-        wcp_data = []
-        for wcp_segment in wcp_segments:
+    def collect_wcp_segments(
+        self,
+        vars: Variables,
+        access_token: Optional[str] = None,
+        per_page: int = 200,
+        cache_filename: str = 'segments/polylines.json',
+        previous_filename: str = 'wcp_segments.csv'
+    ) -> pd.DataFrame:
+        """
+        Collects the athlete's starred Wales Coast Path segments along with their polylines.
 
-            wcp_data.append(
-                {
-                    "id": wcp_segment["id"],
-                    "name": wcp_segment["name"],
-                    "polyline": self.collect_wcp_polyline(id=wcp_segment["id"])
-                }
-            )
+        Every page of starred segments is read, stopping at the first page with fewer than
+        `per_page` segments. Segment polylines essentially never change, so they are cached in a
+        blob keyed by segment id and only fetched (concurrently) for newly starred segments. A run
+        without newly starred WCP segments therefore costs a single listing request. Segments
+        whose polyline fails to be collected keep their previously published row, if any.
 
-        return pd.DataFrame(wcp_data)
+        Parameters
+        ----------
+        vars : Variables
+            Configuration object containing storage connection string.
+        access_token : str, optional
+            Strava API access token; defaults to the instance token.
+        per_page : int, optional
+            Number of starred segments to retrieve per API request.
+        cache_filename : str, optional
+            The blob path of the segment polyline cache JSON file.
+        previous_filename : str, optional
+            The blob path of the previously published WCP segment CSV file.
 
-    def collect_wcp_polyline(self, id: int, access_token: Optional[str] = None) -> str:
+        Returns
+        -------
+        pd.DataFrame
+            DataFrame containing the id, name and polyline of each WCP segment.
         """
+        # Collect every page of starred segments
+        page = 1
+        segments = []
+        while True:
+            page_data = self.get_starred_segments(access_token=access_token, per_page=per_page, page=page)
+            segments.extend(page_data)
+
+            # Stop at the last (partially filled) page
+            if len(page_data) < per_page:
+                break
+            page = page + 1
+
+        wcp_segments = [segment for segment in segments if "WCP" in segment["name"]]
+
+        # Collect polyline cache and determine which segments require polyline collection
+        data = self.read_blob_data(vars=vars, container=vars.container, blob_name=cache_filename)
+        polylines = json.loads(data) if data is not None else {}
+        pending_ids = [segment["id"] for segment in wcp_segments if str(segment["id"]) not in polylines]
+        self.logger.info(f'{len(pending_ids)} of {len(wcp_segments)} WCP segment polylines require collection')
+
+        # Collect polylines of newly starred segments concurrently and export updated cache
+        if len(pending_ids) > 0:
+            pending_polylines = self.engine.map(
+                self.isolate_failures('wcp_polylines',
+                                      lambda id: self.collect_wcp_polyline(id=id, access_token=access_token)),
+                pending_ids)
+            polylines.update({str(id): polyline for id, polyline in zip(pending_ids, pending_polylines)
+                              if polyline is not None})
+            self.export_data_as_json(data=polylines, vars=vars, container=vars.container,
+                                     output_filename=cache_filename)
+
+        wcp_data = [
+            {
+                "id": wcp_segment["id"],
+                "name": wcp_segment["name"],
+                "polyline": polylines[str(wcp_segment["id"])]
+            }
+            for wcp_segment in wcp_segments
+            if str(wcp_segment["id"]) in polylines
+        ]
+
+        # Keep the previously published rows of segments whose polyline failed to be collected
+        previous = self.previous_failed_rows(unit='wcp_polylines', vars=vars, container=vars.container,
+                                             blob_name=previous_filename)
+
+        return pd.concat([pd.DataFrame(wcp_data, columns=["id", "name", "polyline"]), previous],
+                         ignore_index=True).reindex(columns=["id", "name", "polyline"])
+
+    def collect_wcp_polyline(self, id: int, access_token: Optional[str] = None) -> str:
         """
-        if access_token is None:
-            access_token = self.access_token
+        Retrieves the encoded polyline of a segment from the Strava API.
 
-        # Define activity url
-        activities_url = f"https://www.strava.com/api/v3/segments/{id}"
+        Args:
+            id (int): The Strava segment id.
+            access_token (Optional[str]): The access token for authorization. If None,
+                                        uses the instance's stored access token.
 
-        # Define request header and parameters
-        header = {'Authorization': 'Bearer ' + access_token}
+        Returns:
+            str: The segment's encoded polyline.
+        """
+        # Define activity url
+        activities_url = f"{self.api_url}/segments/{id}"
 
         # Execute request
-        data = requests.get(
+        data = self.authorized_request(
+            'GET',
             url=activities_url,
-            headers=header
+            access_token=access_token
         ).json()
 
         return data["map"]["polyline"]
 
-def downsample_mean(rows, factor):
+def stream_parameters_hash() -> str:
+    """
+    Generates a short hash of the stream processing parameters.
+
+    Returns:
+        str: Hash used to invalidate exported streams when the processing parameters change.
+    """
+    return hashlib.sha256(json.dumps(stream_parameters, sort_keys=True).encode()).hexdigest()[:16]
+
+def select_stream_activities(activity_data: list, manifest: dict, parameters_hash: str, backfill_limit: int) -> tuple:
     """
-    Downsample a list of dict-like rows by averaging values over fixed-size chunks.
+    Selects the activities whose streams require collection, and those whose stored streams only
+    require best effort detection.
 
     Args:
-        rows (list[dict]): Sequence of rows with identical numeric keys.
-        factor (int): Number of consecutive rows to average into one.
+        activity_data (list): Activity records carrying the tag index, newest first.
+        manifest (dict): The stream manifest (see `ApiService.collect_stream_manifest`).
+        parameters_hash (str): Hash of the current stream processing parameters.
+        backfill_limit (int): Maximum number of untagged runs selected for stream collection.
 
     Returns:
-        list[dict]: Downsampled rows where each value is the mean over a chunk.
+        tuple: The ids of activities requiring stream collection (tagged activities first, then
+               untagged runs newest first) and the ids of activities with stored streams missing
+               best efforts. Activities recorded as unavailable with the current parameters are
+               not selected.
     """
-    # Assume all rows share the same keys
-    keys = rows[0].keys()
-    result = []
-
-    # Process rows in chunks of size `factor`
-    for i in range(0, len(rows), factor):
-        chunk = rows[i:i + factor]
-
-        # Compute mean for each key within the chunk
-        averaged = {
-            k: sum(row[k] for row in chunk) / len(chunk)
-            for k in keys
-        }
-        result.append(averaged)
+    # Collect tagged pb effort activities and untagged runs
+    tagged_ids = pb_effort_ids(activity_data)
+    run_ids = [record['id'] for record in activity_data
+               if 'Run' in str(record['type']) and pd.isna(record['pb_distance'])]
+
+    # Locate streams exported, or found unavailable, with the current parameters
+    is_exported = {id: manifest["activities"].get(str(id)) == parameters_hash for id in tagged_ids + run_ids}
+    is_unavailable = {id: manifest.get("unavailable", {}).get(str(id)) == parameters_hash for id in is_exported}
+    is_missing = {id: not (is_exported[id] or is_unavailable[id]) for id in is_exported}
+
+    # Select missing tagged streams, and missing untagged run streams up to the backfill limit
+    pending_ids = [id for id in tagged_ids if is_missing[id]]
+    pending_ids += [id for id in run_ids if is_missing[id]][:backfill_limit]
+
+    # Select stored streams without best efforts
+    detect_ids = [id for id, exported in is_exported.items() if exported and str(id) not in manifest["best_efforts"]]
+
+    return pending_ids, detect_ids
+
+def create_http_session(pool_size: int = 10) -> requests.Session:
+    """
+    Creates a keep-alive HTTP session shared by every request made by the ApiService.
+
+    Args:
+        pool_size (int): Maximum number of connections kept open per host.
+
+    Returns:
+        requests.Session: Session with a connection pool large enough for concurrent requests.
+    """
+    # Mount a pooled adapter so concurrent requests reuse open connections
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+    return session
+
+def format_activity_data(data: list) -> pd.DataFrame:
+    """
+    Converts a list of activity records into the exported activity data structure.
+
+    Selects the exported columns, flattens the map column down to its summary polyline and
+    builds the activity tag index (see `add_activity_tags`). Records that have already been
+    formatted (e.g. read back from a previous export) are left unchanged.
+
+    Args:
+        data (list): A list of activity data dictionaries.
+
+    Returns:
+        pd.DataFrame: The formatted activity data.
+    """
+    # Generate pandas dataframe from data collected
+    df = pd.DataFrame(data, columns=activity_columns + tag_columns)
+
+    # Clean up polyline data from map column in dataframe
+    df['map'] = df['map'].apply(lambda x: x['summary_polyline'] if isinstance(x, dict) else x)
+
+    # Parse activity name tags into the tag index
+    return add_activity_tags(df)
+
+def iter_activity_frames(data: list, chunk_size: int = 5000):
+    """
+    Formats activity data in chunks of activities.
+
+    Args:
+        data (list): A list of activity data dictionaries.
+        chunk_size (int): Number of activities formatted at a time.
+
+    Yields:
+        tuple: The index of the chunk's first activity and the formatted chunk (at least one,
+               possibly empty, chunk is produced).
+    """
+    for start in range(0, max(len(data), 1), chunk_size):
+        yield start, format_activity_data(data[start:start + chunk_size])
+
+def iter_csv_chunks(df: pd.DataFrame, chunk_size: int = 10000):
+    """
+    Renders a DataFrame as CSV in chunks of rows, the first chunk including the header.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to render.
+        chunk_size (int): Number of rows rendered at a time.
+
+    Yields:
+        str: Consecutive pieces of the CSV document.
+    """
+    for start in range(0, max(len(df), 1), chunk_size):
+        yield df.iloc[start:start + chunk_size].to_csv(index=False, header=start == 0)
+
+def iter_json_chunks(data, chunk_size: int = 1000):
+    """
+    Serializes data to JSON incrementally, producing the same document as `json.dumps`.
+
+    Dictionaries are serialized one value at a time and lists `chunk_size` items at a time, each
+    piece with the C accelerated `json.dumps`, so only one piece of the document is held in
+    memory at once (`json.JSONEncoder.iterencode` falls back to a much slower pure python
+    encoder). Non-string dictionary keys are converted with `str`.
+
+    Args:
+        data: The JSON serialisable data.
+        chunk_size (int): Number of list items serialized per piece.
+
+    Yields:
+        str: Consecutive pieces of the JSON document.
+    """
+    if isinstance(data, dict):
+        yield '{'
+        for i, (key, value) in enumerate(data.items()):
+            yield (', ' if i > 0 else '') + json.dumps(str(key)) + ': '
+            yield from iter_json_chunks(value, chunk_size=chunk_size)
+        yield '}'
+
+    elif isinstance(data, list):
+        yield '['
+        for start in range(0, len(data), chunk_size):
+            yield (', ' if start > 0 else '') + json.dumps(data[start:start + chunk_size])[1:-1]
+        yield ']'
+
+    else:
+        yield json.dumps(data)
+
+def activity_parquet_table(df: pd.DataFrame) -> pa.Table:
+    """
+    Converts formatted activity data into a typed Arrow table for the Parquet export.
+
+    The `start_date` column is normalised to UTC timestamps and the `type` and `pb_distance`
+    columns are dictionary encoded (read back as categoricals), so readers do not need to
+    re-parse dates or hold repeated strings.
+
+    Args:
+        df (pd.DataFrame): The formatted activity data.
+
+    Returns:
+        pa.Table: The activity data with the `activity_parquet_schema` column types.
+    """
+    df = df.assign(start_date=pd.to_datetime(df['start_date'], utc=True))
+
+    return pa.Table.from_pandas(df, schema=activity_parquet_schema, preserve_index=False)
+
+def merge_activity_data(existing_df: pd.DataFrame, new_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Merges newly collected activities into previously exported activity data.
+
+    Activities are matched on `id`, with the newly collected record taking precedence, and
+    the result is ordered newest first to match the Strava listing order. The tag index of
+    previously exported activities is kept, so only new and changed activities (whose newly
+    collected records replace them) are tagged by `add_activity_tags`.
+
+    Args:
+        existing_df (pd.DataFrame): The previously exported activity data.
+        new_df (pd.DataFrame): The newly collected, formatted activity data.
+
+    Returns:
+        pd.DataFrame: The merged activity data.
+    """
+    # Combine data, keeping the most recent copy of each activity along with its tag index
+    df = pd.concat([existing_df.reindex(columns=activity_columns + tag_columns), new_df], ignore_index=True)
+    df = df.drop_duplicates(subset='id', keep='last')
+
+    # Order activities newest first
+    df = df.sort_values('start_date', ascending=False, key=pd.to_datetime, kind='stable')
+
+    return df.reset_index(drop=True)
+
+def build_sync_state(df: pd.DataFrame, last_full_sync: str) -> dict:
+    """
+    Builds the sync state blob from the merged activity data.
+
+    Args:
+        df (pd.DataFrame): The merged activity data.
+        last_full_sync (str): ISO timestamp of the most recent full sync.
+
+    Returns:
+        dict: Sync state containing the newest `start_date`, its activity id and the
+              timestamp of the last full sync.
+    """
+    # Handle athletes with no activities
+    if len(df) == 0:
+        return {'latest_start_date': None, 'latest_activity_id': None, 'last_full_sync': last_full_sync}
+
+    # Locate newest activity
+    latest = df.loc[pd.to_datetime(df['start_date']).idxmax()]
+
+    return {
+        'latest_start_date': latest['start_date'],
+        'latest_activity_id': int(latest['id']),
+        'last_full_sync': last_full_sync
+    }
+
+def requires_full_sync(
+        state: Optional[dict],
+        full_sync_interval_days: int,
+        slack: pd.Timedelta = pd.Timedelta(hours=12)) -> bool:
+    """
+    Determines whether the stored sync state calls for a full activity re-sync.
+
+    Args:
+        state (Optional[dict]): The stored sync state, or None if there is none.
+        full_sync_interval_days (int): Maximum number of days between full re-syncs.
+        slack (pd.Timedelta): Margin by which a full sync may be early, so scheduled runs starting
+                              slightly less than the interval after the last full sync (e.g. a
+                              weekly run started earlier than the last) still perform one.
+
+    Returns:
+        bool: True if a full re-sync should be performed.
+    """
+    # Full sync required when there is no usable high-water mark
+    if state is None or state.get('latest_start_date') is None or state.get('last_full_sync') is None:
+        return True
+
+    # Full sync required when the previous full sync is too old
+    last_full_sync = pd.Timestamp(state['last_full_sync'])
+    age = pd.Timestamp(datetime.now(timezone.utc)) - last_full_sync
 
-    return result
+    return age >= pd.Timedelta(days=full_sync_interval_days) - slack
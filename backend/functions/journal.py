@@ -0,0 +1,243 @@
+from backend.functions.storage import upload_blob, download_blob, open_blob_writer, copy_blob, BlockBlobWriter
+from azure.storage.blob import ContentSettings
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable
+import threading
+import logging
+import gzip
+import json
+import uuid
+
+class RunJournal:
+    """
+    A run journal that checkpoints ingestion progress to blob storage so a failed run can resume.
+
+    The journal records which stages and per-activity units of work have completed, along with
+    their outputs. A rerun after a failure loads the journal, skips completed stages (returning
+    their recorded outputs) and only performs units of work that have not completed yet.
+
+    Final artifacts are not written to their published blob names while the run is in progress.
+    They are staged under `staging_prefix` and only copied into place by `publish`, once every
+    stage has succeeded, so the frontend never sees a mix of artifacts from different runs.
+    Once published the journal is closed and the next run starts afresh.
+
+    Attributes:
+        connection_string (str): Azure Blob Storage connection string.
+        container (str): The name of the Azure Blob Storage container.
+        journal_filename (str): The blob path of the journal JSON file.
+        staging_prefix (str): Blob path prefix used for stage outputs and staged artifacts.
+        checkpoint_interval (int): Number of completed units between journal checkpoints.
+        state (dict): The journal contents.
+    """
+    def __init__(
+            self,
+            connection_string: str,
+            container: str,
+            logger: logging.Logger,
+            journal_filename: str = 'runs/journal.json',
+            staging_prefix: str = 'runs/staging/',
+            checkpoint_interval: int = 25,
+            max_age_hours: float = 24) -> None:
+        """
+        Initializes the journal, resuming an unpublished run if one was recorded recently.
+
+        Args:
+            connection_string (str): Azure Blob Storage connection string.
+            container (str): The name of the Azure Blob Storage container.
+            logger (logging.Logger): Logger used to report resumed stages.
+            journal_filename (str): The blob path of the journal JSON file.
+            staging_prefix (str): Blob path prefix used for stage outputs and staged artifacts.
+            checkpoint_interval (int): Number of completed units between journal checkpoints.
+            max_age_hours (float): Maximum age of an unpublished run that will be resumed.
+        """
+        self.connection_string = connection_string
+        self.container = container
+        self.logger = logger
+        self.journal_filename = journal_filename
+        self.staging_prefix = staging_prefix
+        self.checkpoint_interval = checkpoint_interval
+        self._lock = threading.RLock()
+        self._pending_units = 0
+
+        # Resume previous run if it failed before publishing, otherwise start a new run
+        data = download_blob(connection_string, container, journal_filename)
+        previous = json.loads(data) if data is not None else None
+        if previous is not None and is_resumable(previous, max_age_hours):
+            self.logger.info(f"Resuming run {previous['run_id']} started at {previous['started_at']}")
+            self.state = previous
+        else:
+            self.state = {
+                "run_id": uuid.uuid4().hex,
+                "started_at": datetime.now(timezone.utc).isoformat(),
+                "status": "running",
+                "stages": {},
+                "units": {},
+                "artifacts": {}
+            }
+
+    def is_complete(self, stage: str) -> bool:
+        """
+        Checks whether a stage completed in this run.
+
+        Args:
+            stage (str): The stage name.
+
+        Returns:
+            bool: True if the stage has completed.
+        """
+        return stage in self.state["stages"]
+
+    def run_stage(self, stage: str, function: Callable[[], Any]) -> Any:
+        """
+        Runs a stage unless it has already completed, recording its output.
+
+        Args:
+            stage (str): The stage name.
+            function (Callable): Zero argument function performing the stage.
+
+        Returns:
+            Any: The stage output, read back from the journal if the stage had already completed.
+        """
+        if self.is_complete(stage):
+            self.logger.info(f'Stage {stage} already completed, skipping')
+            return self.stage_output(stage)
+
+        output = function()
+        self.complete_stage(stage, output)
+
+        return output
+
+    def complete_stage(self, stage: str, output: Any = None) -> None:
+        """
+        Records a stage as completed, storing any output in its own (gzip compressed) blob.
+
+        Args:
+            stage (str): The stage name.
+            output (Any): JSON serialisable stage output.
+        """
+        output_filename = None
+        if output is not None:
+            output_filename = f'{self.staging_prefix}{stage}.json'
+            upload_blob(self.connection_string, self.container, output_filename,
+                        gzip.compress(json.dumps(output).encode()),
+                        content_settings=ContentSettings(content_type="application/json", content_encoding="gzip"))
+
+        with self._lock:
+            self.state["stages"][stage] = {"completed_at": datetime.now(timezone.utc).isoformat(),
+                                           "output": output_filename}
+            self.save()
+
+    def stage_output(self, stage: str) -> Any:
+        """
+        Reads the output recorded for a completed stage.
+
+        Args:
+            stage (str): The stage name.
+
+        Returns:
+            Any: The stage output, or None if the stage produced no output.
+        """
+        output_filename = self.state["stages"][stage]["output"]
+        if output_filename is None:
+            return None
+
+        return json.loads(download_blob(self.connection_string, self.container, output_filename))
+
+    def completed_units(self, stage: str) -> dict:
+        """
+        Returns the units of work completed for a stage.
+
+        Args:
+            stage (str): The stage name.
+
+        Returns:
+            dict: Mapping of unit key (as a string) to its recorded output.
+        """
+        with self._lock:
+            return dict(self.state["units"].get(stage, {}))
+
+    def complete_unit(self, stage: str, key: Any, output: Any = None) -> None:
+        """
+        Records a unit of work as completed, checkpointing the journal every `checkpoint_interval` units.
+
+        Args:
+            stage (str): The stage the unit belongs to.
+            key (Any): Key identifying the unit (e.g. an activity id).
+            output (Any): JSON serialisable unit output.
+        """
+        with self._lock:
+            self.state["units"].setdefault(stage, {})[str(key)] = output
+            self._pending_units += 1
+            if self._pending_units >= self.checkpoint_interval:
+                self.save()
+
+    def open_artifact(self, container: str, blob_name: str, compress: bool = False, **kwargs) -> BlockBlobWriter:
+        """
+        Opens a writer that streams a final artifact into the staging area, ready to be published
+        once the run succeeds.
+
+        Args:
+            container (str): The container the artifact is published to.
+            blob_name (str): The published name of the artifact.
+            compress (bool): Whether to gzip compress the artifact.
+            **kwargs: Additional keyword arguments passed when committing the blob (e.g. content_settings).
+
+        Returns:
+            BlockBlobWriter: The artifact writer, which must be closed to stage the artifact.
+        """
+        # Record artifact along with the content settings and metadata it should be published with
+        content_settings = kwargs.get('content_settings')
+        with self._lock:
+            self.state["artifacts"][f'{container}/{blob_name}'] = {
+                "container": container,
+                "blob_name": blob_name,
+                "content_type": getattr(content_settings, 'content_type', None),
+                "content_encoding": 'gzip' if compress else getattr(content_settings, 'content_encoding', None),
+                "metadata": kwargs.get('metadata')
+            }
+            self.save()
+
+        return open_blob_writer(self.connection_string, self.container, self.staging_prefix + blob_name,
+                                compress=compress, **kwargs)
+
+    def publish(self) -> None:
+        """
+        Copies every staged artifact to its published name and closes the run.
+        """
+        for artifact in self.state["artifacts"].values():
+            copy_blob(self.connection_string, self.container, self.staging_prefix + artifact["blob_name"],
+                      artifact["container"], artifact["blob_name"],
+                      content_settings=ContentSettings(content_type=artifact["content_type"],
+                                                       content_encoding=artifact["content_encoding"]),
+                      metadata=artifact.get("metadata"))
+            self.logger.info(f"Published {artifact['blob_name']}")
+
+        with self._lock:
+            self.state["status"] = "published"
+            self.state["published_at"] = datetime.now(timezone.utc).isoformat()
+            self.save()
+
+    def save(self) -> None:
+        """
+        Checkpoints the journal to blob storage.
+        """
+        with self._lock:
+            upload_blob(self.connection_string, self.container, self.journal_filename, json.dumps(self.state),
+                        content_settings=ContentSettings(content_type="application/json"))
+            self._pending_units = 0
+
+def is_resumable(state: dict, max_age_hours: float) -> bool:
+    """
+    Checks whether a recorded run failed before publishing recently enough to be resumed.
+
+    Args:
+        state (dict): The recorded journal contents.
+        max_age_hours (float): Maximum age of a run that will be resumed.
+
+    Returns:
+        bool: True if the run should be resumed.
+    """
+    started_at = datetime.fromisoformat(state["started_at"])
+
+    return state["status"] != "published" and \
+        datetime.now(timezone.utc) - started_at <= timedelta(hours=max_age_hours)
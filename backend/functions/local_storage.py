@@ -0,0 +1,386 @@
+from azure.core.exceptions import ResourceNotFoundError, ResourceExistsError
+from azure.storage.blob import ContentSettings
+from typing import Iterator, Optional, Union
+import threading
+import tempfile
+import shutil
+import gzip
+import json
+import time
+import uuid
+import os
+
+# Define connection string prefix routed to the filesystem blob stand-in
+LOCAL_CONNECTION_PREFIX = 'file://'
+
+class LocalBlobServiceClient:
+    """
+    A filesystem stand-in for `BlobServiceClient`, used to run the backend without Azure.
+
+    Connection strings of the form `file://<directory>` are routed here by the storage module.
+    Each container is a sub-directory and each blob a file (blob names containing `/` are nested
+    directories), and the subset of the blob client API used by the storage module is provided.
+    Uncommitted blocks are staged under a hidden `.blocks` directory, each blob's content
+    type, content encoding and metadata are kept in a sidecar file under `.properties`, and
+    blob leases are held as lock files under `.leases`.
+
+    Attributes:
+        root (str): Directory holding every container.
+        bytes_uploaded (int): Total number of bytes uploaded through this client.
+        upload_count (int): Total number of blobs uploaded through this client.
+    """
+    def __init__(self, root: str) -> None:
+        """
+        Initializes the client, creating the root directory if it does not exist.
+
+        Args:
+            root (str): Directory holding every container.
+        """
+        self.root = root
+        self.bytes_uploaded = 0
+        self.upload_count = 0
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    @classmethod
+    def from_connection_string(cls, connection_string: str) -> 'LocalBlobServiceClient':
+        """
+        Creates a client from a `file://<directory>` connection string.
+
+        Args:
+            connection_string (str): The local connection string.
+
+        Returns:
+            LocalBlobServiceClient: Client rooted at the connection string's directory.
+        """
+        return cls(connection_string[len(LOCAL_CONNECTION_PREFIX):])
+
+    def get_container_client(self, container: str) -> 'LocalContainerClient':
+        """
+        Returns a client for a container.
+
+        Args:
+            container (str): The name of the container.
+
+        Returns:
+            LocalContainerClient: Client for the container directory.
+        """
+        return LocalContainerClient(service_client=self, container=container)
+
+    def record_upload(self, size: int, count: int = 1) -> None:
+        """
+        Records an upload in the client's transfer totals.
+
+        Args:
+            size (int): Number of bytes uploaded.
+            count (int): Number of blobs uploaded.
+        """
+        with self._lock:
+            self.bytes_uploaded += size
+            self.upload_count += count
+
+class LocalContainerClient:
+    """
+    A filesystem stand-in for `ContainerClient`.
+    """
+    def __init__(self, service_client: LocalBlobServiceClient, container: str) -> None:
+        """
+        Initializes the container client.
+
+        Args:
+            service_client (LocalBlobServiceClient): The owning service client.
+            container (str): The name of the container.
+        """
+        self.service_client = service_client
+        self.container_name = container
+        self.path = os.path.join(service_client.root, container)
+
+    def get_blob_client(self, blob_name: str) -> 'LocalBlobClient':
+        """
+        Returns a client for a blob within the container.
+
+        Args:
+            blob_name (str): The name of the blob.
+
+        Returns:
+            LocalBlobClient: Client for the blob file.
+        """
+        return LocalBlobClient(container_client=self, blob_name=blob_name)
+
+class LocalBlobClient:
+    """
+    A filesystem stand-in for `BlobClient`.
+    """
+    def __init__(self, container_client: LocalContainerClient, blob_name: str) -> None:
+        """
+        Initializes the blob client.
+
+        Args:
+            container_client (LocalContainerClient): The owning container client.
+            blob_name (str): The name of the blob.
+        """
+        self.container_client = container_client
+        self.blob_name = blob_name
+        self.path = os.path.join(container_client.path, *blob_name.split('/'))
+        self.blocks_path = os.path.join(container_client.service_client.root, '.blocks',
+                                        container_client.container_name, *blob_name.split('/'))
+        self.properties_path = os.path.join(container_client.service_client.root, '.properties',
+                                            container_client.container_name, *blob_name.split('/')) + '.json'
+        self.lease_path = os.path.join(container_client.service_client.root, '.leases',
+                                       container_client.container_name, *blob_name.split('/')) + '.lease'
+
+    def upload_blob(self, data: Union[str, bytes], overwrite: bool = False, **kwargs) -> None:
+        """
+        Writes data to the blob file atomically, so concurrent readers never see a partial blob.
+
+        Args:
+            data (Union[str, bytes]): The content to upload.
+            overwrite (bool): Whether to replace an existing blob.
+            **kwargs: Additional blob client keyword arguments, content_settings and metadata are
+                      persisted and any others ignored.
+
+        Raises:
+            ResourceExistsError: If the blob exists and overwrite is False.
+        """
+        if not overwrite and os.path.exists(self.path):
+            raise ResourceExistsError(f'Blob {self.blob_name} already exists')
+
+        # Encode text content
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+
+        # Write to a temporary file before moving it into place
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(self.path), delete=False) as file:
+            file.write(data)
+        os.replace(file.name, self.path)
+        self._write_properties(**kwargs)
+
+        self.container_client.service_client.record_upload(len(data))
+
+    def stage_block(self, block_id: str, data: Union[str, bytes], **kwargs) -> None:
+        """
+        Stages an uncommitted block.
+
+        Args:
+            block_id (str): The block id.
+            data (Union[str, bytes]): The block content.
+            **kwargs: Additional blob client keyword arguments, which are ignored.
+        """
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+
+        os.makedirs(self.blocks_path, exist_ok=True)
+        with open(os.path.join(self.blocks_path, block_id.encode().hex()), 'wb') as file:
+            file.write(data)
+
+        self.container_client.service_client.record_upload(len(data), count=0)
+
+    def commit_block_list(self, block_list: list, **kwargs) -> None:
+        """
+        Commits staged blocks, in order, as the blob content and discards any other staged blocks.
+
+        Args:
+            block_list (list): The `BlobBlock`s (or block ids) to commit.
+            **kwargs: Additional blob client keyword arguments, content_settings and metadata are
+                      persisted and any others ignored.
+        """
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(self.path), delete=False) as file:
+            for block in block_list:
+                block_id = getattr(block, 'id', block)
+                with open(os.path.join(self.blocks_path, block_id.encode().hex()), 'rb') as block_file:
+                    shutil.copyfileobj(block_file, file)
+        os.replace(file.name, self.path)
+        shutil.rmtree(self.blocks_path, ignore_errors=True)
+        self._write_properties(**kwargs)
+
+        self.container_client.service_client.record_upload(0)
+
+    def download_blob(self, decompress: bool = True, **kwargs) -> 'LocalBlobDownloader':
+        """
+        Opens the blob for download.
+
+        As with the Azure SDK, blobs stored with a `gzip` content encoding are decompressed
+        unless `decompress` is False.
+
+        Args:
+            decompress (bool): Whether to decode the blob's content encoding.
+            **kwargs: Additional blob client keyword arguments, which are ignored.
+
+        Returns:
+            LocalBlobDownloader: Downloader holding the blob contents.
+
+        Raises:
+            ResourceNotFoundError: If the blob does not exist.
+        """
+        try:
+            with open(self.path, 'rb') as file:
+                content = file.read()
+        except FileNotFoundError:
+            raise ResourceNotFoundError(f'Blob {self.blob_name} does not exist')
+
+        properties = self.get_blob_properties()
+        if decompress and properties.content_settings.content_encoding == 'gzip':
+            content = gzip.decompress(content)
+
+        return LocalBlobDownloader(content, properties=properties)
+
+    def get_blob_properties(self) -> 'LocalBlobProperties':
+        """
+        Returns the blob's properties.
+
+        Returns:
+            LocalBlobProperties: The blob size, content settings and metadata.
+
+        Raises:
+            ResourceNotFoundError: If the blob does not exist.
+        """
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            raise ResourceNotFoundError(f'Blob {self.blob_name} does not exist')
+
+        # Read persisted properties, defaulting for blobs written outside of the stand-in
+        try:
+            with open(self.properties_path) as file:
+                properties = json.load(file)
+        except FileNotFoundError:
+            properties = {}
+
+        return LocalBlobProperties(
+            name=self.blob_name,
+            size=size,
+            content_settings=ContentSettings(content_type=properties.get('content_type'),
+                                             content_encoding=properties.get('content_encoding')),
+            metadata=properties.get('metadata') or {})
+
+    def acquire_lease(self, lease_duration: int = -1, **kwargs) -> 'LocalBlobLeaseClient':
+        """
+        Acquires an exclusive lease on the blob, held as a lock file until released or expired.
+
+        Args:
+            lease_duration (int): Lease duration in seconds, or -1 for a lease that never expires.
+            **kwargs: Additional blob client keyword arguments, which are ignored.
+
+        Returns:
+            LocalBlobLeaseClient: The acquired lease.
+
+        Raises:
+            ResourceNotFoundError: If the blob does not exist.
+            ResourceExistsError: If the blob already has an active lease (status code 409).
+        """
+        if not os.path.exists(self.path):
+            raise ResourceNotFoundError(f'Blob {self.blob_name} does not exist')
+
+        # Break an expired lease
+        try:
+            with open(self.lease_path) as file:
+                expires_at = json.load(file)['expires_at']
+            if expires_at is not None and expires_at <= time.time():
+                os.remove(self.lease_path)
+        except (FileNotFoundError, ValueError):
+            pass
+
+        # Create lock file, failing if another lease is active
+        lease = LocalBlobLeaseClient(blob_client=self)
+        os.makedirs(os.path.dirname(self.lease_path), exist_ok=True)
+        try:
+            with open(self.lease_path, 'x') as file:
+                json.dump({'id': lease.id,
+                           'expires_at': time.time() + lease_duration if lease_duration > 0 else None}, file)
+        except FileExistsError:
+            error = ResourceExistsError(f'There is already a lease present on blob {self.blob_name}')
+            error.status_code = 409
+            raise error
+
+        return lease
+
+    def _write_properties(
+            self,
+            content_settings: Optional[ContentSettings] = None,
+            metadata: Optional[dict] = None,
+            **kwargs) -> None:
+        """
+        Persists the content settings and metadata of a newly written blob, atomically so concurrent
+        readers (in other threads or processes) never see a partial sidecar file.
+        """
+        os.makedirs(os.path.dirname(self.properties_path), exist_ok=True)
+        with tempfile.NamedTemporaryFile('w', dir=os.path.dirname(self.properties_path), delete=False) as file:
+            json.dump({'content_type': getattr(content_settings, 'content_type', None),
+                       'content_encoding': getattr(content_settings, 'content_encoding', None),
+                       'metadata': metadata}, file)
+        os.replace(file.name, self.properties_path)
+
+class LocalBlobLeaseClient:
+    """
+    A filesystem stand-in for `BlobLeaseClient`.
+    """
+    def __init__(self, blob_client: LocalBlobClient) -> None:
+        """
+        Initializes the lease.
+
+        Args:
+            blob_client (LocalBlobClient): Client for the leased blob.
+        """
+        self.blob_client = blob_client
+        self.id = str(uuid.uuid4())
+
+    def release(self, **kwargs) -> None:
+        """
+        Releases the lease, if it is still held.
+        """
+        try:
+            with open(self.blob_client.lease_path) as file:
+                if json.load(file)['id'] != self.id:
+                    return
+            os.remove(self.blob_client.lease_path)
+        except (FileNotFoundError, ValueError):
+            pass
+
+class LocalBlobProperties:
+    """
+    A stand-in for `BlobProperties`.
+    """
+    def __init__(self, name: str, size: int, content_settings: ContentSettings, metadata: dict) -> None:
+        """
+        Initializes the blob properties.
+
+        Args:
+            name (str): The name of the blob.
+            size (int): The blob size in bytes.
+            content_settings (ContentSettings): The blob content type and encoding.
+            metadata (dict): The blob metadata.
+        """
+        self.name = name
+        self.size = size
+        self.content_settings = content_settings
+        self.metadata = metadata
+
+class LocalBlobDownloader:
+    """
+    A stand-in for `StorageStreamDownloader` holding the downloaded blob contents.
+    """
+    def __init__(self, content: bytes, properties: LocalBlobProperties) -> None:
+        """
+        Initializes the downloader.
+
+        Args:
+            content (bytes): The blob contents.
+            properties (LocalBlobProperties): The blob properties.
+        """
+        self.content = content
+        self.properties = properties
+
+    def readall(self) -> bytes:
+        """
+        Returns the blob contents.
+        """
+        return self.content
+
+    def chunks(self, chunk_size: int = 4 * 1024 * 1024) -> Iterator[bytes]:
+        """
+        Iterates over the blob contents in chunks.
+        """
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
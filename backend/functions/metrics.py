@@ -0,0 +1,198 @@
+from datetime import datetime, timezone
+from contextlib import contextmanager
+from typing import Callable, Optional
+import numpy as np
+import contextvars
+import threading
+import time
+
+# Define context variable holding the name of the pipeline stage a unit of work belongs to
+_current_stage = contextvars.ContextVar('stage', default=None)
+
+# Define the run metrics collector instrumented calls are recorded in, if any
+_active_metrics = None
+
+class RunMetrics:
+    """
+    A thread-safe collector of per-request ingestion metrics, aggregated per pipeline stage.
+
+    Every Strava API request (through `RateLimitScheduler`) and blob operation (through the
+    storage module) records its latency, bytes transferred and status while a collector is
+    active, along with retries and rate limit usage for API requests. Samples are attributed to
+    the pipeline stage they ran in (see `stage`), which is propagated to worker threads by
+    `in_current_context`. `report` summarises the samples into a machine-readable run report.
+
+    Attributes:
+        started_at (str): ISO timestamp at which the collector was created.
+        samples (dict): Recorded samples, keyed by (stage, kind, operation).
+        rate_limit (dict): Highest rate limit usage and limits observed per stage.
+    """
+    def __init__(self) -> None:
+        """
+        Initializes an empty collector.
+        """
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.samples = {}
+        self.rate_limit = {}
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def activate(self) -> 'RunMetrics':
+        """
+        Activates the collector, so instrumented calls are recorded in it.
+
+        Returns:
+            RunMetrics: The collector.
+        """
+        global _active_metrics
+        _active_metrics = self
+        return self
+
+    def deactivate(self) -> None:
+        """
+        Deactivates the collector, if it is active.
+        """
+        global _active_metrics
+        if _active_metrics is self:
+            _active_metrics = None
+
+    def __enter__(self) -> 'RunMetrics':
+        return self.activate()
+
+    def __exit__(self, *exc_info) -> None:
+        self.deactivate()
+
+    def record(
+            self,
+            kind: str,
+            operation: str,
+            latency: float,
+            size: int = 0,
+            status: Optional[int] = None,
+            retry: bool = False,
+            rate_limit: Optional[tuple] = None) -> None:
+        """
+        Records a single request.
+
+        Args:
+            kind (str): The kind of request ('http' or 'blob').
+            operation (str): The operation performed (e.g. 'GET /activities/{id}' or 'upload').
+            latency (float): Request latency in seconds.
+            size (int): Number of bytes transferred.
+            status (Optional[int]): The response status code, if any.
+            retry (bool): Whether the request was a retry of a throttled or failed request.
+            rate_limit (Optional[tuple]): Rate limit usage and limits (15 minute and daily) after the request.
+        """
+        stage = _current_stage.get()
+        with self._lock:
+            sample = self.samples.setdefault((stage, kind, operation),
+                                             {'latencies': [], 'bytes': 0, 'retries': 0, 'statuses': {}})
+            sample['latencies'].append(latency)
+            sample['bytes'] += size
+            sample['retries'] += int(retry)
+            sample['statuses'][str(status)] = sample['statuses'].get(str(status), 0) + 1
+
+            # Track highest rate limit usage
+            if rate_limit is not None:
+                usage, limits = rate_limit
+                recorded = self.rate_limit.setdefault(stage, {'usage': [0, 0], 'limits': list(limits)})
+                recorded['usage'] = [max(a, b) for a, b in zip(recorded['usage'], usage)]
+                recorded['limits'] = list(limits)
+
+    def report(self, **fields) -> dict:
+        """
+        Summarises the recorded samples into a JSON serialisable run report.
+
+        For every stage and operation the report holds the number of requests, retries, bytes
+        transferred, status code counts and latency percentiles (in milliseconds).
+
+        Args:
+            **fields: Additional top level report fields (e.g. stage timings, changed artifacts).
+
+        Returns:
+            dict: The run report.
+        """
+        with self._lock:
+            stages = {}
+            for (stage, kind, operation), sample in self.samples.items():
+                latencies = np.asarray(sample['latencies']) * 1000
+                stages.setdefault(stage or 'unstaged', {}).setdefault(kind, {})[operation] = {
+                    'requests': len(latencies),
+                    'retries': sample['retries'],
+                    'bytes': sample['bytes'],
+                    'statuses': dict(sample['statuses']),
+                    'latency_ms': {'total': round(float(latencies.sum()), 1),
+                                   'p50': round(float(np.percentile(latencies, 50)), 1),
+                                   'p95': round(float(np.percentile(latencies, 95)), 1),
+                                   'max': round(float(latencies.max()), 1)}
+                }
+            for stage, rate_limit in self.rate_limit.items():
+                stages.setdefault(stage or 'unstaged', {})['rate_limit'] = dict(rate_limit)
+
+        return {
+            'started_at': self.started_at,
+            'wall_time': round(time.perf_counter() - self._start, 3),
+            'stages': stages,
+            **fields
+        }
+
+def active_metrics() -> Optional[RunMetrics]:
+    """
+    Returns the active run metrics collector.
+
+    Returns:
+        Optional[RunMetrics]: The active collector, or None if instrumentation is disabled.
+    """
+    return _active_metrics
+
+@contextmanager
+def stage(name: str):
+    """
+    Attributes requests made within the block (and units of work it schedules) to a stage.
+
+    Args:
+        name (str): The stage name.
+    """
+    token = _current_stage.set(name)
+    try:
+        yield
+    finally:
+        _current_stage.reset(token)
+
+@contextmanager
+def measure(kind: str, operation: str):
+    """
+    Times the requests made within the block, recording them in the active collector.
+
+    The block receives a dictionary in which it can set the `size`, `status`, `retry` and
+    `rate_limit` of the request. Nothing is recorded if no collector is active.
+
+    Args:
+        kind (str): The kind of request ('http' or 'blob').
+        operation (str): The operation performed.
+    """
+    sample = {}
+    start = time.perf_counter()
+    try:
+        yield sample
+    finally:
+        metrics = _active_metrics
+        if metrics is not None:
+            metrics.record(kind=kind, operation=operation, latency=time.perf_counter() - start, **sample)
+
+def in_current_context(function: Callable) -> Callable:
+    """
+    Wraps a function to run in (a copy of) the calling context, so worker threads inherit the current stage.
+
+    Args:
+        function (Callable): The function to wrap.
+
+    Returns:
+        Callable: The wrapped function, which may be called concurrently from several threads.
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.copy().run(function, *args, **kwargs)
+
+    return run
@@ -0,0 +1,272 @@
+from backend.functions.journal import RunJournal
+from typing import Any, Callable, Iterable, Optional
+from backend.functions import metrics
+import asyncio
+import logging
+import time
+
+class Stage:
+    """
+    A pipeline stage, declaring the values it consumes and produces.
+
+    Attributes:
+        name (str): The stage name, also used as its run journal stage.
+        function (Callable): Function performing the stage, called with each input as a keyword
+                             argument and returning a dictionary holding each output.
+        inputs (tuple): Names of the values the stage consumes.
+        outputs (tuple): Names of the values the stage produces.
+    """
+    def __init__(self, name: str, function: Callable, inputs: Iterable[str] = (), outputs: Iterable[str] = ()) -> None:
+        """
+        Initializes the stage.
+
+        Args:
+            name (str): The stage name, also used as its run journal stage.
+            function (Callable): Function performing the stage.
+            inputs (Iterable[str]): Names of the values the stage consumes.
+            outputs (Iterable[str]): Names of the values the stage produces.
+        """
+        self.name = name
+        self.function = function
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+
+class Pipeline:
+    """
+    A declarative pipeline executor running stages as a dependency graph.
+
+    Stages declare the named values they consume (`inputs`) and produce (`outputs`), and a stage
+    depends on whichever stages produce its inputs. Running the pipeline starts every stage as
+    soon as its dependencies have finished, so independent stages run concurrently (each on its
+    own thread rather than on the worker pool of `AsyncIngestionEngine`, so stages never starve
+    the pool their per-activity units run on). Each stage is timed, and requests made while it runs are
+    attributed to it in the active run metrics (see `metrics.stage`). When a run journal is in use
+    stages run through `RunJournal.run_stage`, so completed stages are skipped with their
+    outputs read back from the journal.
+
+    A subset of stages can be run on their own, along with the stages producing their inputs.
+
+    Attributes:
+        logger (logging.Logger): Logger used to report stage timings.
+        journal (Optional[RunJournal]): Run journal stages are recorded in.
+        stages (dict): The registered stages, keyed by name, in registration order.
+        timings (dict): Wall time in seconds of each stage run, keyed by name.
+    """
+    def __init__(self, logger: logging.Logger, journal: Optional[RunJournal] = None) -> None:
+        """
+        Initializes an empty pipeline.
+
+        Args:
+            logger (logging.Logger): Logger used to report stage timings.
+            journal (Optional[RunJournal]): Run journal stages are recorded in. If None, every
+                                            stage is run.
+        """
+        self.logger = logger
+        self.journal = journal
+        self.stages = {}
+        self.timings = {}
+
+    def add_stage(
+            self,
+            name: str,
+            function: Callable,
+            inputs: Iterable[str] = (),
+            outputs: Iterable[str] = ()) -> Stage:
+        """
+        Registers a stage.
+
+        Args:
+            name (str): The stage name.
+            function (Callable): Function performing the stage, called with each input as a keyword
+                                 argument and returning a dictionary holding each output.
+            inputs (Iterable[str]): Names of the values the stage consumes.
+            outputs (Iterable[str]): Names of the values the stage produces.
+
+        Returns:
+            Stage: The registered stage.
+
+        Raises:
+            ValueError: If the stage name is already registered or an output is already produced
+                        by another stage.
+        """
+        stage = Stage(name=name, function=function, inputs=inputs, outputs=outputs)
+        if name in self.stages:
+            raise ValueError(f'Stage {name} is already registered')
+        for output in stage.outputs:
+            if self.producer(output) is not None:
+                raise ValueError(f'Output {output} is already produced by stage {self.producer(output).name}')
+
+        self.stages[name] = stage
+
+        return stage
+
+    def stage(self, name: Optional[str] = None, inputs: Iterable[str] = (), outputs: Iterable[str] = ()) -> Callable:
+        """
+        Decorator registering a function as a stage.
+
+        Args:
+            name (Optional[str]): The stage name, defaulting to the function name.
+            inputs (Iterable[str]): Names of the values the stage consumes.
+            outputs (Iterable[str]): Names of the values the stage produces.
+
+        Returns:
+            Callable: Decorator returning the function unchanged.
+        """
+        def register(function: Callable) -> Callable:
+            self.add_stage(name=name or function.__name__, function=function, inputs=inputs, outputs=outputs)
+            return function
+
+        return register
+
+    def producer(self, value: str) -> Optional[Stage]:
+        """
+        Returns the stage producing a value.
+
+        Args:
+            value (str): The value name.
+
+        Returns:
+            Optional[Stage]: The producing stage, or None if no stage produces the value.
+        """
+        return next((stage for stage in self.stages.values() if value in stage.outputs), None)
+
+    def dependencies(self, stage: Stage) -> list:
+        """
+        Returns the names of the stages producing a stage's inputs.
+
+        Args:
+            stage (Stage): The stage.
+
+        Returns:
+            list: Names of the stages the stage depends on.
+
+        Raises:
+            ValueError: If an input is not produced by any stage.
+        """
+        dependencies = []
+        for value in stage.inputs:
+            producer = self.producer(value)
+            if producer is None:
+                raise ValueError(f'Input {value} of stage {stage.name} is not produced by any stage')
+            if producer.name not in dependencies:
+                dependencies.append(producer.name)
+
+        return dependencies
+
+    def execution_order(self, targets: Optional[Iterable[str]] = None) -> list:
+        """
+        Resolves the stages required to run the target stages, in dependency order.
+
+        Args:
+            targets (Optional[Iterable[str]]): Names of the stages to run, or None for every stage.
+
+        Returns:
+            list: The stages to run, each after the stages it depends on.
+
+        Raises:
+            KeyError: If a target stage is not registered.
+            ValueError: If the stages contain a dependency cycle.
+        """
+        order, visiting = [], set()
+
+        def visit(name: str) -> None:
+            if name in visiting:
+                raise ValueError(f'Stage {name} depends on itself')
+            if any(stage.name == name for stage in order):
+                return
+
+            visiting.add(name)
+            for dependency in self.dependencies(self.stages[name]):
+                visit(dependency)
+            visiting.remove(name)
+            order.append(self.stages[name])
+
+        for name in (self.stages if targets is None else targets):
+            if name not in self.stages:
+                raise KeyError(f'Stage {name} is not registered')
+            visit(name)
+
+        return order
+
+    async def run_async(self, targets: Optional[Iterable[str]] = None) -> dict:
+        """
+        Runs the target stages, and the stages producing their inputs, as a dependency graph.
+
+        Args:
+            targets (Optional[Iterable[str]]): Names of the stages to run, or None for every stage.
+
+        Returns:
+            dict: Every value produced by the stages run, keyed by name.
+
+        Raises:
+            Exception: The first error raised by any stage, once every running stage has finished.
+                       Stages depending on a failed stage are not run.
+        """
+        values, tasks = {}, {}
+
+        async def execute(stage: Stage) -> None:
+            # Wait for the stages producing this stage's inputs
+            await asyncio.gather(*(tasks[dependency] for dependency in self.dependencies(stage)))
+
+            # Run stage on its own thread
+            output = await asyncio.to_thread(self.run_stage, stage, {value: values[value] for value in stage.inputs})
+            values.update(output)
+
+        # Schedule every stage, each of which starts once its dependencies have finished
+        for stage in self.execution_order(targets):
+            tasks[stage.name] = asyncio.ensure_future(execute(stage))
+
+        # Wait for every stage to finish, so no stage is still running when an error is raised
+        results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+        # Raise first error encountered
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+        return values
+
+    def run(self, targets: Optional[Iterable[str]] = None) -> dict:
+        """
+        Synchronous facade for `run_async`.
+
+        Args:
+            targets (Optional[Iterable[str]]): Names of the stages to run, or None for every stage.
+
+        Returns:
+            dict: Every value produced by the stages run, keyed by name.
+        """
+        return asyncio.run(self.run_async(targets))
+
+    def run_stage(self, stage: Stage, inputs: dict) -> dict:
+        """
+        Runs a single stage, through the run journal when one is in use, and records its timing.
+
+        Args:
+            stage (Stage): The stage to run.
+            inputs (dict): The stage's input values, keyed by name.
+
+        Returns:
+            dict: The stage's output values, keyed by name.
+
+        Raises:
+            ValueError: If the stage does not return every output it declares.
+        """
+        self.logger.info(f'Starting stage {stage.name}')
+        start = time.perf_counter()
+
+        def function() -> Any:
+            with metrics.stage(stage.name):
+                return stage.function(**inputs)
+
+        output = self.journal.run_stage(stage.name, function) if self.journal is not None else function()
+
+        self.timings[stage.name] = time.perf_counter() - start
+        self.logger.info(f'Stage {stage.name} completed in {self.timings[stage.name]:.2f} s')
+
+        # Check every declared output was produced
+        missing = [value for value in stage.outputs if not isinstance(output, dict) or value not in output]
+        if missing:
+            raise ValueError(f'Stage {stage.name} did not produce outputs: {", ".join(missing)}')
+
+        return {value: output[value] for value in stage.outputs}
@@ -0,0 +1,52 @@
+import pandas as pd
+
+# Define rollup resolutions, mapping each to the pandas period frequency activities are grouped by
+rollup_periods = {
+    'yearly': 'Y',
+    'monthly': 'M',
+    'weekly': 'W'
+}
+
+# Define activity metrics summed in every rollup
+rollup_metrics = ['distance', 'total_elevation_gain', 'moving_time', 'kudos_count']
+
+# Define columns of every rollup table
+rollup_columns = ['period', 'type', 'count'] + rollup_metrics
+
+def rollup_filename(resolution: str) -> str:
+    """
+    Returns the blob path a rollup table is published to.
+
+    Args:
+        resolution (str): The rollup resolution ('yearly', 'monthly' or 'weekly').
+
+    Returns:
+        str: The blob path of the rollup CSV file.
+    """
+    return f'rollups/{resolution}.csv'
+
+def build_rollup(df: pd.DataFrame, resolution: str) -> pd.DataFrame:
+    """
+    Aggregates activity data into a rollup table of totals per period and activity type.
+
+    Activities are grouped by the (UTC) calendar year, month or ISO week (Monday to Sunday)
+    they started in, and each row holds the number of activities along with their summed
+    distance (m), elevation gain (m), moving time (s) and kudos count.
+
+    Args:
+        df (pd.DataFrame): Activity data with `start_date`, `type` and rollup metric columns.
+        resolution (str): The rollup resolution ('yearly', 'monthly' or 'weekly').
+
+    Returns:
+        pd.DataFrame: The rollup table, with a row per period (identified by its start date) and
+                      activity type, ordered by period and type.
+    """
+    # Identify the period each activity started in by the period's start date
+    start_dates = pd.to_datetime(df['start_date'], utc=True).dt.tz_localize(None)
+    periods = start_dates.dt.to_period(rollup_periods[resolution]).dt.start_time
+
+    # Sum metrics and count activities per period and type
+    grouped = df.assign(period=periods).groupby(['period', 'type'], observed=True, sort=True)
+    rollup = grouped[rollup_metrics].sum().assign(count=grouped.size()).reset_index()
+
+    return rollup[rollup_columns]
@@ -0,0 +1,218 @@
+from backend.functions.stream_functions import read_stream_table
+from typing import Optional, Union
+import pyarrow.compute as pc
+import pyarrow as pa
+import numpy as np
+import zlib
+
+# Define route detail levels, mapping each to its simplification tolerance in metres (0 keeps every vertex)
+route_tolerances = {
+    'full': 0,
+    'medium': 10,
+    'low': 50
+}
+
+# Define metres per degree of latitude
+METRES_PER_DEGREE = 111320
+
+# Define type of simplified route coordinate columns, a list of (latitude, longitude) pairs per route
+coordinates_type = pa.list_(pa.list_(pa.float32(), 2))
+
+def coordinates_column(level: str) -> str:
+    """
+    Returns the name of the route table column holding routes simplified to a detail level.
+
+    Args:
+        level (str): The detail level (a key of `route_tolerances`).
+
+    Returns:
+        str: The column name.
+    """
+    return f'coordinates_{level}'
+
+def polyline_checksum(encoded_polyline: str) -> int:
+    """
+    Calculates a checksum of an encoded polyline, used to detect routes that need re-simplifying.
+
+    Args:
+        encoded_polyline (str): The encoded polyline.
+
+    Returns:
+        int: The CRC32 checksum of the polyline.
+    """
+    return zlib.crc32(encoded_polyline.encode())
+
+def decode_polylines(encoded_polylines: list, precision: int = 5) -> list:
+    """
+    Decodes encoded polylines (Google's polyline algorithm format) into coordinate arrays.
+
+    Every polyline is decoded at once with vectorised operations: each value is a run of 5 bit
+    chunks (offset by 63, least significant first) ending at a chunk without the continuation
+    bit, and each coordinate is stored as a zigzag encoded difference from the previous one.
+
+    Args:
+        encoded_polylines (list): The encoded polylines.
+        precision (int): Number of decimal places encoded.
+
+    Returns:
+        list: The coordinates of each polyline, as arrays of (latitude, longitude) rows.
+    """
+    data = np.frombuffer(''.join(encoded_polylines).encode(), dtype=np.uint8).astype(np.int64) - 63
+    if len(data) == 0:
+        return [np.empty((0, 2)) for _ in encoded_polylines]
+
+    # Combine the chunks of each value
+    value_ends = np.flatnonzero((data & 0x20) == 0)
+    value_starts = np.concatenate(([0], value_ends[:-1] + 1))
+    positions = np.arange(len(data)) - np.repeat(value_starts, value_ends - value_starts + 1)
+    values = np.add.reduceat((data & 0x1f) << (5 * positions), value_starts)
+    values = np.where(values & 1, ~(values >> 1), values >> 1)
+
+    # Accumulate coordinate differences, restarting at the first coordinate of each polyline
+    value_counts = np.diff(np.searchsorted(value_ends, np.cumsum([len(encoded) for encoded in encoded_polylines])),
+                           prepend=0)
+    coordinate_counts = value_counts // 2
+    totals = np.cumsum(values.reshape(-1, 2), axis=0)
+    starts = np.concatenate(([[0, 0]], totals))[np.cumsum(coordinate_counts) - coordinate_counts]
+    coordinates = (totals - np.repeat(starts, coordinate_counts, axis=0)) / 10 ** precision
+
+    return np.split(coordinates, np.cumsum(coordinate_counts)[:-1])
+
+def simplify_routes(routes: list, tolerance: float) -> list:
+    """
+    Simplifies routes with the Douglas-Peucker algorithm.
+
+    Vertices are projected onto a local equirectangular plane (in metres) around each route's
+    mean latitude, and a vertex is kept if removing it would move its route by more than
+    `tolerance` metres. Rather than recursing segment by segment, every route is simplified at
+    once: each pass measures every unsettled vertex against the segment joining the kept
+    vertices either side of it in a few vectorised operations, keeps the furthest vertex of each
+    segment beyond the tolerance and settles the vertices of every other segment. The number of
+    passes is the depth of the recursion, rather than the number of segments.
+
+    Args:
+        routes (list): Routes, each an array of (latitude, longitude) rows.
+        tolerance (float): Maximum distance in metres between a route and its simplification.
+
+    Returns:
+        list: The kept vertices of each route, always including the first and last.
+    """
+    lengths = np.array([len(route) for route in routes], dtype=int)
+    if tolerance <= 0 or not (lengths > 2).any():
+        return list(routes)
+
+    # Project vertices of every route onto local planes in metres
+    coordinates = np.concatenate([np.asarray(route, dtype=float).reshape(-1, 2) for route in routes])
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+    latitudes = np.repeat(np.add.reduceat(coordinates[:, 0], starts[lengths > 0]) / lengths[lengths > 0],
+                          lengths[lengths > 0])
+    points = coordinates * METRES_PER_DEGREE
+    points[:, 1] *= np.cos(np.radians(latitudes))
+
+    # Keep the ends of every route, every other vertex is unsettled
+    keep = np.zeros(len(coordinates), dtype=bool)
+    keep[starts[lengths > 0]] = True
+    keep[ends[lengths > 0] - 1] = True
+    unsettled = ~keep
+    while unsettled.any():
+        kept = np.flatnonzero(keep)
+        vertices = np.flatnonzero(unsettled)
+
+        # Locate the kept vertices either side of each unsettled vertex, identifying its segment
+        following = np.searchsorted(kept, vertices)
+        first, last = kept[following - 1], kept[following]
+
+        # Calculate the distance of each unsettled vertex from the line joining its segment's ends
+        chords = points[last] - points[first]
+        offsets = points[vertices] - points[first]
+        chord_lengths = np.hypot(chords[:, 0], chords[:, 1])
+        cross_products = np.abs(chords[:, 0] * offsets[:, 1] - chords[:, 1] * offsets[:, 0])
+        distances = np.where(chord_lengths > 0,
+                             cross_products / np.where(chord_lengths > 0, chord_lengths, 1),
+                             np.hypot(offsets[:, 0], offsets[:, 1]))
+
+        # Find the furthest vertex of each segment
+        segment_starts = np.flatnonzero(np.diff(following, prepend=-1))
+        segments = np.repeat(np.arange(len(segment_starts)), np.diff(segment_starts, append=len(vertices)))
+        furthest = np.maximum.reduceat(distances, segment_starts)[segments]
+
+        # Keep the furthest vertex of segments beyond the tolerance, and settle the vertices of every other segment
+        splitting = furthest > tolerance
+        candidates = np.flatnonzero(splitting & (distances == furthest))
+        split_vertices = vertices[candidates[np.diff(segments[candidates], prepend=-1) != 0]]
+        keep[split_vertices] = True
+        unsettled[split_vertices] = False
+        unsettled[vertices[~splitting]] = False
+
+    return [coordinates[start:end][keep[start:end]] for start, end in zip(starts, ends)]
+
+def coordinates_array(routes: list) -> pa.Array:
+    """
+    Converts routes into an Arrow array of float32 (latitude, longitude) pairs per route.
+
+    Args:
+        routes (list): Routes, each an array of (latitude, longitude) rows.
+
+    Returns:
+        pa.Array: Array of type `coordinates_type`, one item per route.
+    """
+    offsets = np.concatenate(([0], np.cumsum([len(route) for route in routes]))).astype(np.int32)
+    values = [np.empty((0, 2), dtype=np.float32)]
+    values.extend(np.asarray(route, dtype=np.float32).reshape(-1, 2) for route in routes)
+    values = np.concatenate(values)
+
+    return pa.ListArray.from_arrays(offsets, pa.FixedSizeListArray.from_arrays(values.ravel(), 2))
+
+def route_table(routes: dict, previous: Optional[pa.Table] = None) -> pa.Table:
+    """
+    Decodes and simplifies routes into a route table keyed by activity id.
+
+    Each route is stored at every detail level in `route_tolerances`, as float32 (latitude,
+    longitude) pairs, alongside a checksum of its encoded polyline. Routes whose polyline is
+    unchanged since a previous table are copied from it rather than decoded again.
+
+    Args:
+        routes (dict): Encoded polylines keyed by activity id.
+        previous (Optional[pa.Table]): A previously built route table to reuse routes from.
+
+    Returns:
+        pa.Table: The route table, with `id`, `checksum` and one coordinates column per detail level.
+    """
+    ids = list(routes)
+    checksums = {id: polyline_checksum(routes[id]) for id in ids}
+
+    # Locate routes that can be copied from the previous table
+    reused = {}
+    if previous is not None:
+        previous_checksums = zip(previous.column('id').to_pylist(), previous.column('checksum').to_pylist())
+        reused = {id: row for row, (id, checksum) in enumerate(previous_checksums) if checksums.get(id) == checksum}
+
+    # Decode and simplify new and changed routes
+    pending_ids = [id for id in ids if id not in reused]
+    decoded = decode_polylines([routes[id] for id in pending_ids])
+    pending = pa.table({'id': pa.array(pending_ids, pa.int64()),
+                        'checksum': pa.array([checksums[id] for id in pending_ids], pa.int64()),
+                        **{coordinates_column(level): coordinates_array(simplify_routes(decoded, tolerance))
+                           for level, tolerance in route_tolerances.items()}})
+
+    # Combine reused and new routes, ordered as the routes were given
+    table = pending if not reused else pa.concat_tables([previous.take(list(reused.values())), pending])
+    order = pc.index_in(pa.array(ids, pa.int64()), table.column('id'))
+
+    return table.take(order)
+
+def read_route_table(source: Union[str, bytes], level: Optional[str] = None) -> pa.Table:
+    """
+    Reads a route table written in the Arrow IPC file format.
+
+    Args:
+        source (Union[str, bytes]): Path of a local route file, or the route file contents.
+        level (Optional[str]): Detail level to select, alongside the ids. If None, every column is returned.
+
+    Returns:
+        pa.Table: The route table.
+    """
+    columns = None if level is None else ['id', coordinates_column(level)]
+
+    return read_stream_table(source, columns=columns)
@@ -0,0 +1,413 @@
+from datetime import datetime, timedelta, timezone
+from backend.functions import metrics
+from typing import Callable, Optional
+from urllib.parse import urlparse
+import threading
+import requests
+import logging
+import random
+import time
+import re
+
+# Define response status codes that should be retried
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Define HTTP methods that can safely be retried after a server or transport error
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+
+# Define transport errors that should be retried
+RETRY_EXCEPTIONS = (requests.ConnectionError, requests.Timeout)
+
+# Define rate limit header pairs returned by the Strava API (overall and read specific limits)
+RATE_LIMIT_HEADERS = [
+    ('X-RateLimit-Limit', 'X-RateLimit-Usage'),
+    ('X-ReadRateLimit-Limit', 'X-ReadRateLimit-Usage')
+]
+
+class CircuitOpenError(requests.RequestException):
+    """
+    Raised when a request is rejected because the circuit breaker is open.
+    """
+
+class CircuitBreaker:
+    """
+    A circuit breaker failing requests fast once the Strava API is clearly unavailable.
+
+    Consecutive failures (server errors and transport errors) are counted, and once
+    `failure_threshold` is reached the circuit opens and requests are rejected with a
+    `CircuitOpenError` without being sent. After `reset_timeout` seconds a single trial request
+    is let through: the circuit closes again if it succeeds and stays open if it fails.
+
+    Attributes:
+        failure_threshold (int): Number of consecutive failures that opens the circuit.
+        reset_timeout (float): Seconds the circuit stays open before a trial request is let through.
+        failures (int): Number of consecutive failures recorded.
+        opened_at (Optional[float]): Epoch time the circuit was opened (or last trialled), None if closed.
+    """
+    def __init__(
+            self,
+            failure_threshold: int = 5,
+            reset_timeout: float = 30.0,
+            clock: Callable[[], float] = time.time) -> None:
+        """
+        Initializes a closed circuit breaker.
+
+        Args:
+            failure_threshold (int): Number of consecutive failures that opens the circuit.
+            reset_timeout (float): Seconds the circuit stays open before a trial request is let through.
+            clock (Callable): Function returning the current epoch time in seconds.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def check(self, operation: str) -> None:
+        """
+        Checks a request may be sent.
+
+        Args:
+            operation (str): The operation about to be performed, used in the error message.
+
+        Raises:
+            CircuitOpenError: If the circuit is open.
+        """
+        with self._lock:
+            if self.opened_at is None:
+                return
+
+            # Let a single trial request through once the reset timeout has elapsed
+            if self.clock() - self.opened_at >= self.reset_timeout:
+                self.opened_at = self.clock()
+                return
+
+        raise CircuitOpenError(f'Circuit open after {self.failures} consecutive failures, not sending {operation}')
+
+    def record(self, success: bool) -> None:
+        """
+        Records the outcome of a request, opening or closing the circuit as required.
+
+        Args:
+            success (bool): Whether the request succeeded (any response other than a server error).
+        """
+        with self._lock:
+            if success:
+                self.failures = 0
+                self.opened_at = None
+                return
+
+            # Open circuit (or keep it open after a failed trial) once the threshold is reached
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+
+class RateLimitScheduler:
+    """
+    A central request scheduler that every outbound Strava API call is sent through.
+
+    The scheduler keeps a token bucket for each of Strava's rate limit windows (15 minutes and
+    daily), seeded from the `X-RateLimit-Limit` / `X-RateLimit-Usage` and `X-ReadRateLimit-Limit` /
+    `X-ReadRateLimit-Usage` response headers, following whichever pair has the least budget remaining
+    in each window. A token is reserved before each request is sent, so the number of in-flight requests never exceeds
+    the remaining budget, and callers are paused (rather than failed) until the window resets
+    once the budget has been spent.
+
+    Every request is sent with a (connect, read) timeout. Throttled (429) responses are retried
+    with jittered exponential backoff, as are server errors, timeouts and connection errors for
+    idempotent methods (a failed POST may already have been processed, so it is not retried).
+    Other error statuses raise a `requests.HTTPError`. A `CircuitBreaker` shared by every caller
+    rejects requests once Strava is clearly unavailable, so stages fail in seconds rather than
+    working through their retries for every activity. Every attempt is recorded in the active run
+    metrics (see `metrics.RunMetrics`) along with the rate limit usage it leaves.
+
+    Attributes:
+        session (requests.Session): The pooled HTTP session used to send requests.
+        logger (logging.Logger): Logger used to report pauses and retries.
+        max_concurrency (int): Maximum number of requests in flight at any one time.
+        max_retries (int): Maximum number of retries for a throttled or failed request.
+        timeout (tuple): Connect and read timeouts in seconds applied to every request.
+        breaker (CircuitBreaker): Circuit breaker shared by every request.
+        limits (list): Request limits for the 15 minute and daily windows.
+        usage (list): Requests used (or reserved) within the current 15 minute and daily windows.
+    """
+    def __init__(
+            self,
+            session: requests.Session,
+            logger: logging.Logger,
+            max_concurrency: int = 8,
+            max_retries: int = 5,
+            backoff_base: float = 1.0,
+            backoff_cap: float = 60.0,
+            timeout: tuple = (5, 30),
+            breaker: Optional[CircuitBreaker] = None,
+            limits: tuple = (100, 1000),
+            clock: Callable[[], float] = time.time,
+            sleep: Callable[[float], None] = time.sleep) -> None:
+        """
+        Initializes the scheduler with conservative default limits until headers are observed.
+
+        Args:
+            session (requests.Session): The pooled HTTP session used to send requests.
+            logger (logging.Logger): Logger used to report pauses and retries.
+            max_concurrency (int): Maximum number of requests in flight at any one time.
+            max_retries (int): Maximum number of retries for a throttled or failed request.
+            backoff_base (float): Base delay in seconds for exponential backoff.
+            backoff_cap (float): Maximum delay in seconds for a single backoff.
+            timeout (tuple): Connect and read timeouts in seconds applied to every request, unless
+                             a request sets its own.
+            breaker (Optional[CircuitBreaker]): Circuit breaker shared by every request. If None,
+                                                a breaker with default thresholds is used.
+            limits (tuple): Initial 15 minute and daily request limits.
+            clock (Callable): Function returning the current epoch time in seconds.
+            sleep (Callable): Function used to pause the calling thread.
+        """
+        self.session = session
+        self.logger = logger
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.timeout = timeout
+        self.breaker = breaker if breaker is not None else CircuitBreaker(clock=clock)
+        self.limits = list(limits)
+        self.usage = [0, 0]
+        self.clock = clock
+        self.sleep = sleep
+
+        # Configure concurrency controls
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._window_starts = self._current_window_starts()
+        self._binding_headers = [None, None]
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Sends a request once rate limit budget is available, retrying throttled and failed requests.
+
+        Args:
+            method (str): The HTTP method (e.g. 'GET').
+            url (str): The request url.
+            **kwargs: Additional keyword arguments passed to `requests.Session.request`.
+
+        Returns:
+            requests.Response: The successful response.
+
+        Raises:
+            requests.HTTPError: If the response has an error status that is not retried, or still
+                                fails once all retries are exhausted.
+            requests.RequestException: If a timeout or connection error is not retried, or still
+                                       occurs once all retries are exhausted.
+            CircuitOpenError: If the circuit breaker is open.
+        """
+        operation = request_operation(method, url)
+        kwargs.setdefault('timeout', self.timeout)
+        attempt = 0
+        while True:
+            response, reason = self.attempt(method, url, operation, attempt, **kwargs)
+            if response is not None:
+                return response
+
+            # Back off before retrying request
+            delay = self.backoff_delay(attempt)
+            self.logger.info(f'Request to {url} failed ({reason}), retrying in {delay:.1f}s')
+            self.sleep(delay)
+            attempt += 1
+
+    def attempt(self, method: str, url: str, operation: str, attempt: int, **kwargs) -> tuple:
+        """
+        Sends a single attempt at a request.
+
+        Args:
+            method (str): The HTTP method (e.g. 'GET').
+            url (str): The request url.
+            operation (str): The operation name the attempt is recorded under.
+            attempt (int): The zero-based attempt number.
+            **kwargs: Additional keyword arguments passed to `requests.Session.request`.
+
+        Returns:
+            tuple: The response and None if it is final, or None and the failure reason if the
+                   request should be retried.
+
+        Raises:
+            requests.RequestException: If the attempt failed and should not be retried.
+        """
+        can_retry = attempt < self.max_retries
+
+        # Fail fast while the circuit is open, then wait for rate limit budget and a free concurrency slot
+        self.breaker.check(operation)
+        self.acquire()
+        try:
+            with self._slots, metrics.measure('http', operation) as sample:
+                sample.update(retry=attempt > 0)
+                response = self.session.request(method, url, **kwargs)
+                self.update_from_headers(response.headers)
+                sample.update(size=len(response.content), status=response.status_code,
+                              rate_limit=(list(self.usage), list(self.limits)))
+
+        # Retry timeouts and connection errors of idempotent requests
+        except RETRY_EXCEPTIONS as error:
+            self.breaker.record(success=False)
+            if not (can_retry and method.upper() in IDEMPOTENT_METHODS):
+                raise
+            return None, type(error).__name__
+
+        # Record outcome with the circuit breaker, only server errors counting as failures
+        self.breaker.record(success=response.status_code < 500)
+
+        # Retry throttled responses, and server errors of idempotent requests
+        if can_retry and is_retryable(method, response.status_code):
+            return None, response.status_code
+
+        # Raise error statuses that are not retried
+        if response.status_code >= 400:
+            response.raise_for_status()
+
+        return response, None
+
+    def acquire(self) -> None:
+        """
+        Reserves a token from every rate limit window, pausing until a window resets if exhausted.
+        """
+        while True:
+            with self._lock:
+                self._roll_windows()
+
+                # Reserve a token if every window has budget remaining
+                wait = self._seconds_until_budget()
+                if wait == 0:
+                    self.usage = [used + 1 for used in self.usage]
+                    return
+
+            # Pause until the exhausted window resets
+            self.logger.info(f'Rate limit budget exhausted, pausing for {wait:.0f}s')
+            self.sleep(wait)
+
+    def update_from_headers(self, headers: dict) -> None:
+        """
+        Updates the token buckets using the rate limit headers returned by the Strava API.
+
+        Each window follows the header pair (overall or read) with the least budget remaining
+        (limit less usage), as that is the budget requests run out of first. Header usage is
+        authoritative for completed requests, whilst local reservations also account for requests
+        still in flight, so the larger of the two is kept while the same header pair is followed.
+
+        Args:
+            headers (dict): The response headers.
+        """
+        # Collect every limit and usage pair reported in the response
+        reported = [(limit_header,
+                     parse_rate_limit_header(headers.get(limit_header)),
+                     parse_rate_limit_header(headers.get(usage_header)))
+                    for limit_header, usage_header in RATE_LIMIT_HEADERS]
+        reported = [(header, limits, usage) for header, limits, usage in reported if limits and usage]
+        if not reported:
+            return
+
+        # Track the limit and usage of the header pair with the least remaining budget in each window
+        with self._lock:
+            self._roll_windows()
+            for i in range(2):
+                header, limits, usage = min(reported, key=lambda pair: pair[1][i] - pair[2][i])
+                used = max(usage[i], self.usage[i]) if header == self._binding_headers[i] else usage[i]
+                self.limits[i], self.usage[i], self._binding_headers[i] = limits[i], used, header
+
+    def backoff_delay(self, attempt: int) -> float:
+        """
+        Calculates a jittered exponential backoff delay.
+
+        Args:
+            attempt (int): The zero-based retry attempt.
+
+        Returns:
+            float: Delay in seconds, drawn uniformly up to the capped exponential delay.
+        """
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def _seconds_until_budget(self) -> float:
+        """
+        Calculates how long to wait until every rate limit window has budget remaining.
+        """
+        window_ends = self._current_window_ends()
+        waits = [window_ends[i] - self.clock() for i in range(2) if self.usage[i] >= self.limits[i]]
+
+        return max(max(waits), 1) if waits else 0
+
+    def _roll_windows(self) -> None:
+        """
+        Resets usage for any rate limit window that has rolled over since it was last checked.
+        """
+        window_starts = self._current_window_starts()
+        for i in range(2):
+            if window_starts[i] != self._window_starts[i]:
+                self.usage[i] = 0
+        self._window_starts = window_starts
+
+    def _current_window_starts(self) -> list:
+        """
+        Returns the start of the current 15 minute (quarter hour) and daily (UTC midnight) windows.
+        """
+        now = datetime.fromtimestamp(self.clock(), tz=timezone.utc)
+        quarter_start = now.replace(minute=now.minute - now.minute % 15, second=0, microsecond=0)
+        day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        return [quarter_start.timestamp(), day_start.timestamp()]
+
+    def _current_window_ends(self) -> list:
+        """
+        Returns the end of the current 15 minute and daily windows.
+        """
+        window_starts = self._current_window_starts()
+
+        return [window_starts[0] + timedelta(minutes=15).total_seconds(),
+                window_starts[1] + timedelta(days=1).total_seconds()]
+
+def is_retryable(method: str, status_code: int) -> bool:
+    """
+    Checks whether a response should be retried.
+
+    Throttled responses were rejected before being processed, so are retried for any method,
+    whilst server errors are only retried for idempotent methods.
+
+    Args:
+        method (str): The HTTP method.
+        status_code (int): The response status code.
+
+    Returns:
+        bool: True if the request should be retried.
+    """
+    if status_code == 429:
+        return True
+
+    return status_code in RETRY_STATUS_CODES and method.upper() in IDEMPOTENT_METHODS
+
+def request_operation(method: str, url: str) -> str:
+    """
+    Names the operation a request performs, replacing ids in the url path so requests to an endpoint share a name.
+
+    Args:
+        method (str): The HTTP method (e.g. 'GET').
+        url (str): The request url.
+
+    Returns:
+        str: The operation name (e.g. 'GET /api/v3/activities/{id}/streams').
+    """
+    return f'{method} {re.sub(r"/[0-9]+(?=/|$)", "/{id}", urlparse(url).path)}'
+
+def parse_rate_limit_header(value: Optional[str]) -> Optional[list]:
+    """
+    Parses a Strava rate limit header of the form "<15 minute value>,<daily value>".
+
+    Args:
+        value (Optional[str]): The header value.
+
+    Returns:
+        Optional[list]: The 15 minute and daily values, or None if the header is missing or malformed.
+    """
+    try:
+        values = [int(v) for v in value.split(',')]
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+    return values if len(values) == 2 else None
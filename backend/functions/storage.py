@@ -0,0 +1,511 @@
+from azure.storage.blob import BlobServiceClient, ContainerClient, BlobClient, BlobBlock, ContentSettings
+from azure.storage.blob import BlobLeaseClient, ExponentialRetry
+from backend.functions.local_storage import LocalBlobServiceClient, LOCAL_CONNECTION_PREFIX
+from backend.functions.metrics import measure, in_current_context
+from azure.core.pipeline.transport import RequestsTransport
+from azure.core.exceptions import ResourceNotFoundError, ResourceExistsError, HttpResponseError
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional, Union
+import threading
+import requests
+import hashlib
+import base64
+import gzip
+import time
+import zlib
+import io
+
+# Define the size of each block staged by block blob writers
+BLOCK_SIZE = 4 * 1024 * 1024
+
+# Define blob metadata key holding the SHA-256 hash of a blob's (uncompressed) content
+CONTENT_HASH_KEY = 'content_sha256'
+
+# Define pooled client caches, keyed by connection string
+_client_lock = threading.Lock()
+_service_clients = {}
+_container_clients = {}
+
+def get_blob_service_client(connection_string: str, pool_size: int = 32) -> BlobServiceClient:
+    """
+    Returns the shared BlobServiceClient for a connection string, creating it on first use.
+
+    The client is created once per connection string and sends every request through a single
+    keep-alive HTTP session, so repeated uploads and downloads reuse open connections rather than
+    re-parsing the connection string and negotiating TLS each time. Every request has connect
+    and read timeouts, and timeouts, connection errors and server errors are retried with
+    exponential backoff by the client's retry policy (the default policy waits 15 seconds or
+    more between attempts). Connection strings of the form `file://<directory>` are served by a
+    filesystem stand-in instead of Azure.
+
+    Args:
+        connection_string (str): Azure Blob Storage connection string.
+        pool_size (int): Maximum number of pooled connections, which bounds useful upload and
+                         download concurrency.
+
+    Returns:
+        BlobServiceClient: The pooled service client.
+    """
+    with _client_lock:
+        if connection_string in _service_clients:
+            return _service_clients[connection_string]
+
+        # Route local connection strings to the filesystem stand-in
+        if connection_string.startswith(LOCAL_CONNECTION_PREFIX):
+            _service_clients[connection_string] = LocalBlobServiceClient.from_connection_string(connection_string)
+
+        else:
+            # Configure a keep-alive session with a connection pool large enough for concurrent transfers
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+
+            # Construct service client sharing the pooled session, with request timeouts and retries
+            _service_clients[connection_string] = BlobServiceClient.from_connection_string(
+                connection_string,
+                transport=RequestsTransport(session=session, session_owner=False,
+                                            connection_timeout=10, read_timeout=60),
+                retry_policy=ExponentialRetry(initial_backoff=1, increment_base=2, retry_total=5))
+
+        return _service_clients[connection_string]
+
+def get_container_client(connection_string: str, container: str) -> ContainerClient:
+    """
+    Returns the shared ContainerClient for a container, creating it on first use.
+
+    Args:
+        connection_string (str): Azure Blob Storage connection string.
+        container (str): The name of the Azure Blob Storage container.
+
+    Returns:
+        ContainerClient: The pooled container client.
+    """
+    service_client = get_blob_service_client(connection_string)
+
+    with _client_lock:
+        key = (connection_string, container)
+        if key not in _container_clients:
+            _container_clients[key] = service_client.get_container_client(container)
+
+        return _container_clients[key]
+
+def split_container_path(container: str) -> tuple:
+    """
+    Splits a container path into the container name and a blob prefix.
+
+    A container path of the form `<container>/<prefix>` (e.g. `strava/athletes/<name>`) scopes
+    every blob read or written through the storage functions under the prefix, so several
+    datasets (such as one per athlete) can share a container.
+
+    Args:
+        container (str): The container name, optionally followed by a blob prefix.
+
+    Returns:
+        tuple: The container name and the blob prefix (an empty string if there is none).
+    """
+    name, _, prefix = container.partition('/')
+
+    return name, prefix.strip('/')
+
+def get_blob_client(connection_string: str, container: str, blob_name: str) -> BlobClient:
+    """
+    Returns a BlobClient that shares the pooled container client's HTTP pipeline.
+
+    Args:
+        connection_string (str): Azure Blob Storage connection string.
+        container (str): The name of the Azure Blob Storage container, optionally followed by a
+                         blob prefix (see `split_container_path`).
+        blob_name (str): The name of the blob.
+
+    Returns:
+        BlobClient: Client for the requested blob.
+    """
+    container, prefix = split_container_path(container)
+    blob_name = f'{prefix}/{blob_name}' if prefix else blob_name
+
+    return get_container_client(connection_string, container).get_blob_client(blob_name)
+
+def upload_blob(
+        connection_string: str,
+        container: str,
+        blob_name: str,
+        data: Union[str, bytes],
+        **kwargs) -> None:
+    """
+    Uploads data to a blob, overwriting any existing content.
+
+    Args:
+        connection_string (str): Azure Blob Storage connection string.
+        container (str): The name of the Azure Blob Storage container.
+        blob_name (str): The name of the blob.
+        data (Union[str, bytes]): The content to upload.
+        **kwargs: Additional keyword arguments passed to `BlobClient.upload_blob` (e.g. content_settings).
+    """
+    with measure('blob', 'upload') as sample:
+        get_blob_client(connection_string, container, blob_name).upload_blob(data, overwrite=True, **kwargs)
+        sample.update(size=len(data), status=201)
+
+def download_blob(connection_string: str, container: str, blob_name: str) -> Optional[bytes]:
+    """
+    Downloads the contents of a blob, decompressing blobs stored with a `gzip` content encoding.
+
+    The raw (still encoded) content is requested with `decompress=False` and decoded here, so
+    the result does not depend on the SDK's automatic content decoding.
+
+    Args:
+        connection_string (str): Azure Blob Storage connection string.
+        container (str): The name of the Azure Blob Storage container.
+        blob_name (str): The name of the blob.
+
+    Returns:
+        Optional[bytes]: The blob contents, or None if the blob does not exist.
+    """
+    with measure('blob', 'download') as sample:
+        try:
+            downloader = get_blob_client(connection_string, container, blob_name).download_blob(decompress=False)
+            data = downloader.readall()
+        except ResourceNotFoundError:
+            sample.update(status=404)
+            return None
+        sample.update(size=len(data), status=200)
+
+    # Decode compressed blobs
+    if downloader.properties.content_settings.content_encoding == 'gzip':
+        data = gzip.decompress(data)
+
+    return data
+
+def get_blob_metadata(connection_string: str, container: str, blob_name: str) -> Optional[dict]:
+    """
+    Returns the metadata of a blob, without downloading its content.
+
+    Args:
+        connection_string (str): Azure Blob Storage connection string.
+        container (str): The name of the Azure Blob Storage container.
+        blob_name (str): The name of the blob.
+
+    Returns:
+        Optional[dict]: The blob metadata, or None if the blob does not exist.
+    """
+    with measure('blob', 'get_properties') as sample:
+        try:
+            metadata = get_blob_client(connection_string, container, blob_name).get_blob_properties().metadata
+        except ResourceNotFoundError:
+            sample.update(status=404)
+            return None
+        sample.update(status=200)
+
+    return metadata or {}
+
+def content_hash(chunks: Iterable[Union[str, bytes]]) -> str:
+    """
+    Computes the SHA-256 hash of content provided as an iterable of chunks.
+
+    Args:
+        chunks (Iterable[Union[str, bytes]]): The content, in order, text is encoded as UTF-8.
+
+    Returns:
+        str: The hex digest of the content.
+    """
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+
+    return digest.hexdigest()
+
+def blob_content_matches(connection_string: str, container: str, blob_name: str, digest: str) -> bool:
+    """
+    Checks whether a blob was uploaded with content matching a hash, from its `CONTENT_HASH_KEY` metadata.
+
+    Args:
+        connection_string (str): Azure Blob Storage connection string.
+        container (str): The name of the Azure Blob Storage container.
+        blob_name (str): The name of the blob.
+        digest (str): The content hash, as returned by `content_hash`.
+
+    Returns:
+        bool: True if the blob exists and holds content with the same hash.
+    """
+    metadata = get_blob_metadata(connection_string, container, blob_name)
+
+    return metadata is not None and metadata.get(CONTENT_HASH_KEY) == digest
+
+def acquire_blob_lease(
+        connection_string: str,
+        container: str,
+        blob_name: str,
+        lease_duration: int = 15,
+        timeout: float = 60,
+        poll_interval: float = 0.5) -> BlobLeaseClient:
+    """
+    Acquires an exclusive lease on a blob, creating an empty blob first if it does not exist.
+
+    A lease serializes writers across processes: while it is held, the blob can only be written
+    by passing the lease (`lease=...`) to the upload. If another lease is active, acquisition is
+    retried until it is released, expires or `timeout` elapses.
+
+    Args:
+        connection_string (str): Azure Blob Storage connection string.
+        container (str): The name of the Azure Blob Storage container.
+        blob_name (str): The name of the blob.
+        lease_duration (int): Lease duration in seconds (15 to 60), after which an unreleased lease
+                              (e.g. of a crashed process) expires.
+        timeout (float): Maximum number of seconds to wait for another lease to be released.
+        poll_interval (float): Seconds between acquisition attempts.
+
+    Returns:
+        BlobLeaseClient: The acquired lease, which should be released once the blob is written.
+
+    Raises:
+        HttpResponseError: If the lease could not be acquired within the timeout.
+    """
+    blob_client = get_blob_client(connection_string, container, blob_name)
+
+    # Create blob so it can be leased, unless it exists (and may already be leased)
+    try:
+        blob_client.upload_blob(b'', overwrite=False)
+    except ResourceExistsError:
+        pass
+    except HttpResponseError as error:
+        if error.status_code != 412:
+            raise
+
+    # Retry while another lease is active
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return blob_client.acquire_lease(lease_duration=lease_duration)
+        except HttpResponseError as error:
+            if error.status_code != 409 or time.monotonic() >= deadline:
+                raise
+            time.sleep(poll_interval)
+
+def download_blobs(
+        connection_string: str,
+        container: str,
+        blob_names: list,
+        max_workers: int = 8) -> dict:
+    """
+    Downloads several blobs concurrently through the pooled client.
+
+    Args:
+        connection_string (str): Azure Blob Storage connection string.
+        container (str): The name of the Azure Blob Storage container.
+        blob_names (list): The names of the blobs to download.
+        max_workers (int): Maximum number of concurrent downloads.
+
+    Returns:
+        dict: Mapping of blob name to its contents (None for blobs that do not exist), in request order.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        contents = executor.map(in_current_context(lambda blob_name: download_blob(connection_string, container,
+                                                                                   blob_name)),
+                                blob_names)
+
+        return dict(zip(blob_names, contents))
+
+class BlockBlobWriter(io.RawIOBase):
+    """
+    A writable file object that streams data into a block blob.
+
+    Written data is buffered until `block_size` bytes are available, then staged as an
+    uncommitted block (`stage_block`), so at most one block is held in memory however much data
+    is written. Closing the writer commits the staged blocks (`commit_block_list`), making the
+    new content visible in a single step. Data that fits within a single block is uploaded with
+    one request instead. If the writer is used as a context manager and an error is raised, the
+    staged blocks are never committed and the existing blob is left unchanged.
+
+    With `compress` set, data is gzip compressed as it is written and the blob is committed with
+    a `gzip` content encoding, which `download_blob` (and HTTP clients) decode transparently.
+
+    Attributes:
+        blob_client (BlobClient): Client for the blob being written.
+        block_size (int): Number of bytes buffered before a block is staged.
+        block_ids (list): Ids of the blocks staged so far.
+    """
+    def __init__(
+            self,
+            blob_client: BlobClient,
+            block_size: int = BLOCK_SIZE,
+            compress: bool = False,
+            **kwargs) -> None:
+        """
+        Initializes the writer.
+
+        Args:
+            blob_client (BlobClient): Client for the blob being written.
+            block_size (int): Number of bytes buffered before a block is staged.
+            compress (bool): Whether to gzip compress the blob content.
+            **kwargs: Additional keyword arguments passed when committing the blob (e.g. content_settings).
+        """
+        super().__init__()
+        self.blob_client = blob_client
+        self.block_size = block_size
+        self.block_ids = []
+        self._buffer = bytearray()
+        self._commit_kwargs = kwargs
+        self._aborted = False
+        self._position = 0
+
+        # Configure gzip compression and record the content encoding
+        self._compressor = None
+        if compress:
+            self._compressor = zlib.compressobj(wbits=31)
+            content_settings = kwargs.get('content_settings')
+            self._commit_kwargs['content_settings'] = ContentSettings(
+                content_type=getattr(content_settings, 'content_type', None),
+                content_encoding='gzip')
+
+    def writable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        """
+        Returns the number of (uncompressed) bytes written so far.
+        """
+        return self._position
+
+    def write(self, data: Union[str, bytes]) -> int:
+        """
+        Buffers data, staging a block each time the buffer reaches the block size.
+
+        Args:
+            data (Union[str, bytes]): The data to write, text is encoded as UTF-8.
+
+        Returns:
+            int: Number of bytes written.
+        """
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self._position += len(data)
+        self._buffer.extend(self._compressor.compress(data) if self._compressor is not None else data)
+
+        # Stage full blocks
+        while len(self._buffer) >= self.block_size:
+            self._stage_block(bytes(self._buffer[:self.block_size]))
+            del self._buffer[:self.block_size]
+
+        return len(data)
+
+    def abort(self) -> None:
+        """
+        Closes the writer without committing, discarding any staged blocks.
+        """
+        self._aborted = True
+        self.close()
+
+    def close(self) -> None:
+        """
+        Commits the staged blocks, or uploads the buffered data if no block has been staged.
+        """
+        if self.closed:
+            return
+
+        try:
+            if self._aborted:
+                return
+
+            # Flush any remaining compressed data
+            if self._compressor is not None:
+                self._buffer.extend(self._compressor.flush())
+
+            # Upload small blobs in a single request
+            if len(self.block_ids) == 0:
+                with measure('blob', 'upload') as sample:
+                    self.blob_client.upload_blob(bytes(self._buffer), overwrite=True, **self._commit_kwargs)
+                    sample.update(size=len(self._buffer), status=201)
+                return
+
+            # Stage remaining data and commit every block
+            if len(self._buffer) > 0:
+                self._stage_block(bytes(self._buffer))
+            with measure('blob', 'commit_block_list') as sample:
+                self.blob_client.commit_block_list([BlobBlock(block_id=block_id) for block_id in self.block_ids],
+                                                   **self._commit_kwargs)
+                sample.update(status=201)
+
+        finally:
+            self._buffer = bytearray()
+            super().close()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+    def _stage_block(self, data: bytes) -> None:
+        """
+        Stages a block, using fixed-length ids as required by the Blob service.
+        """
+        block_id = base64.b64encode(f'{len(self.block_ids):08d}'.encode()).decode()
+        with measure('blob', 'stage_block') as sample:
+            self.blob_client.stage_block(block_id=block_id, data=data)
+            sample.update(size=len(data), status=201)
+        self.block_ids.append(block_id)
+
+def open_blob_writer(
+        connection_string: str,
+        container: str,
+        blob_name: str,
+        block_size: int = BLOCK_SIZE,
+        **kwargs) -> BlockBlobWriter:
+    """
+    Opens a writer that streams data into a blob through the pooled client.
+
+    Args:
+        connection_string (str): Azure Blob Storage connection string.
+        container (str): The name of the Azure Blob Storage container.
+        blob_name (str): The name of the blob.
+        block_size (int): Number of bytes buffered before a block is staged.
+        **kwargs: Additional keyword arguments passed to `BlockBlobWriter` (e.g. compress, content_settings).
+
+    Returns:
+        BlockBlobWriter: The blob writer, which must be closed to commit the blob.
+    """
+    return BlockBlobWriter(get_blob_client(connection_string, container, blob_name), block_size=block_size, **kwargs)
+
+def upload_blob_chunks(
+        connection_string: str,
+        container: str,
+        blob_name: str,
+        chunks: Iterable[Union[str, bytes]],
+        **kwargs) -> None:
+    """
+    Uploads an iterable of chunks to a blob without holding the full content in memory.
+
+    Args:
+        connection_string (str): Azure Blob Storage connection string.
+        container (str): The name of the Azure Blob Storage container.
+        blob_name (str): The name of the blob.
+        chunks (Iterable[Union[str, bytes]]): The content to upload, in order.
+        **kwargs: Additional keyword arguments passed to `BlockBlobWriter` (e.g. compress, content_settings).
+    """
+    with open_blob_writer(connection_string, container, blob_name, **kwargs) as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+
+def copy_blob(
+        connection_string: str,
+        source_container: str,
+        source_blob_name: str,
+        container: str,
+        blob_name: str,
+        **kwargs) -> None:
+    """
+    Copies a blob chunk by chunk through the pooled client, without decoding compressed content.
+
+    The raw (still encoded) content is requested with `decompress=False`, so a compressed blob
+    is copied byte for byte and stays valid under the content encoding it is committed with.
+
+    Args:
+        connection_string (str): Azure Blob Storage connection string.
+        source_container (str): The container of the blob to copy.
+        source_blob_name (str): The name of the blob to copy.
+        container (str): The container to copy the blob to.
+        blob_name (str): The name of the copy.
+        **kwargs: Additional keyword arguments passed when committing the copy (e.g. content_settings).
+    """
+    downloader = get_blob_client(connection_string, source_container, source_blob_name).download_blob(decompress=False)
+    upload_blob_chunks(connection_string, container, blob_name, downloader.chunks(), **kwargs)
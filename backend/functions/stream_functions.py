@@ -0,0 +1,267 @@
+from typing import Optional, Union
+import pyarrow as pa
+import numpy as np
+import math
+
+def compute_splits(
+        distance: list,
+        time: list,
+        heartrate: Optional[list] = None,
+        split_distance: float = 1000) -> list:
+    """
+    Computes splits of a fixed length from an activity's distance, time and heart rate streams.
+
+    A split ends at the first sample whose distance is at least `split_distance` beyond the
+    sample that started it, and the next split starts from that sample. Split boundaries are
+    located with `np.searchsorted` on the cumulative distance (one binary search per split rather
+    than a scan over every sample) and average heart rates are taken from a cumulative sum, so the
+    cost is dominated by a couple of vectorised passes over the stream.
+
+    Args:
+        distance (list): Cumulative distance stream in metres.
+        time (list): Elapsed time stream in seconds.
+        heartrate (Optional[list]): Heart rate stream; average heart rates are None if not provided.
+        split_distance (float): Split length in metres (e.g. 1000 for 1km, 1609.344 for 1 mile, 400 for 400m).
+
+    Returns:
+        list: One dictionary per completed split containing `split_number`, `start_time`, `end_time`,
+              `split_time` and `avg_hr`.
+    """
+    distance = np.asarray(distance, dtype=float)
+    time = np.asarray(time)
+
+    # Return no splits for streams without enough samples
+    if len(distance) < 2:
+        return []
+
+    # Locate split boundaries on the running maximum so that small GPS dips keep distance monotonic
+    running_distance = np.maximum.accumulate(distance)
+    boundaries = [0]
+    while True:
+        start = boundaries[-1]
+        end = start + 1 + int(np.searchsorted(running_distance[start + 1:], distance[start] + split_distance))
+        if end >= len(distance):
+            break
+        boundaries.append(end)
+
+    # Calculate split start and end indexes
+    boundaries = np.asarray(boundaries)
+    starts, ends = boundaries[:-1], boundaries[1:]
+
+    # Calculate average heart rate over each split using a cumulative sum
+    if heartrate is not None and len(heartrate) > 0:
+        cumulative_hr = np.concatenate(([0], np.cumsum(np.asarray(heartrate, dtype=float))))
+        avg_hr = ((cumulative_hr[ends] - cumulative_hr[starts]) / (ends - starts)).tolist()
+    else:
+        avg_hr = [None] * len(starts)
+
+    return [
+        {
+            "split_number": i + 1,
+            "start_time": start_time,
+            "end_time": end_time,
+            "split_time": end_time - start_time,
+            "avg_hr": split_hr
+        }
+        for i, (start_time, end_time, split_hr) in enumerate(zip(time[starts].tolist(), time[ends].tolist(), avg_hr))
+    ]
+
+def compute_best_efforts(distance: list, time: list, effort_distances: dict) -> dict:
+    """
+    Finds the fastest window of each effort distance within an activity's distance and time streams.
+
+    Every sample is tried as the start of a window, and the end of each window (the first
+    sample at least the effort distance further on) is located for every start at once with
+    `np.searchsorted` on the cumulative distance, a vectorised form of the two-pointer search.
+    The time the effort distance was reached is interpolated between the end sample and the
+    sample before it, so efforts are not rounded up to the sampling interval.
+
+    Args:
+        distance (list): Cumulative distance stream in metres.
+        time (list): Elapsed time stream in seconds.
+        effort_distances (dict): Effort distances in metres, keyed by effort name (e.g. {'5km': 5000}).
+
+    Returns:
+        dict: For each effort name, a dictionary containing the `start_time`, `end_time` and
+              `elapsed_time` of the fastest window, or None if the stream is shorter than the effort.
+    """
+    # Use the running maximum so that small GPS dips keep distance monotonic
+    distance = np.maximum.accumulate(np.asarray(distance, dtype=float))
+    time = np.asarray(time, dtype=float)
+
+    efforts = {}
+    for name, effort_distance in effort_distances.items():
+        # Locate the end of the window starting at each sample, dropping starts too close to the end of the stream
+        targets = distance + effort_distance
+        ends = np.searchsorted(distance, targets)
+        starts = np.flatnonzero(ends < len(distance))
+        if len(starts) == 0:
+            efforts[name] = None
+            continue
+
+        # Interpolate the time each window reached its effort distance
+        ends, previous = ends[starts], ends[starts] - 1
+        fraction = (targets[starts] - distance[previous]) / (distance[ends] - distance[previous])
+        end_times = time[previous] + fraction * (time[ends] - time[previous])
+
+        # Select the fastest window
+        best = int(np.argmin(end_times - time[starts]))
+        efforts[name] = {
+            "start_time": float(time[starts[best]]),
+            "end_time": float(end_times[best]),
+            "elapsed_time": float(end_times[best] - time[starts[best]])
+        }
+
+    return efforts
+
+def downsample_mean(columns: dict, points: int = 50) -> dict:
+    """
+    Downsample stream columns by averaging values over fixed-size chunks.
+
+    The chunk size is chosen so that at most `points` values are returned per column, and each
+    column is reduced in a single `np.add.reduceat` pass. Streams shorter than `points` are
+    returned unchanged (as floats).
+
+    Args:
+        columns (dict): Mapping of stream name to a numeric array or list; all columns share a length.
+        points (int): Maximum number of points to return per column.
+
+    Returns:
+        dict: Mapping of stream name to a list of downsampled values.
+    """
+    # Handle empty streams
+    length = min((len(values) for values in columns.values()), default=0)
+    if length == 0:
+        return {key: [] for key in columns}
+
+    # Calculate chunk boundaries and sizes
+    factor = max(1, math.ceil(length / points))
+    starts = np.arange(0, length, factor)
+    counts = np.diff(np.append(starts, length))
+
+    # Compute mean of every chunk for each column
+    return {
+        key: (np.add.reduceat(np.asarray(values[:length], dtype=float), starts) / counts).tolist()
+        for key, values in columns.items()
+    }
+
+def columns_to_rows(columns: dict) -> list:
+    """
+    Convert stream columns into a list of row dictionaries.
+
+    Args:
+        columns (dict): Mapping of stream name to a list of values.
+
+    Returns:
+        list: One dictionary per sample, keyed by stream name.
+    """
+    return [dict(zip(columns.keys(), row)) for row in zip(*columns.values())]
+
+def stream_table(columns: dict) -> pa.Table:
+    """
+    Converts stream columns into a compact, column-oriented Arrow table.
+
+    Integer streams (e.g. time, heart rate) are stored as int32 and floating point streams
+    (e.g. distance, velocity) as float32, so each sample costs four bytes per column rather
+    than a repeated key and a decimal string per value in JSON.
+
+    Args:
+        columns (dict): Mapping of stream name to a list of values.
+
+    Returns:
+        pa.Table: The stream table, with one column per stream.
+    """
+    arrays = {}
+    for key, values in columns.items():
+        array = pa.array(values)
+        if pa.types.is_integer(array.type):
+            array = array.cast(pa.int32())
+        elif pa.types.is_floating(array.type):
+            array = array.cast(pa.float32())
+        arrays[key] = array
+
+    return pa.table(arrays)
+
+def write_stream_table(table: pa.Table, sink) -> None:
+    """
+    Writes a stream table in the (uncompressed) Arrow IPC file format, which can be memory-mapped.
+
+    Args:
+        table (pa.Table): The stream table.
+        sink: Writable file object or path.
+    """
+    with pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+def read_stream_table(source: Union[str, bytes], columns: Optional[list] = None) -> pa.Table:
+    """
+    Reads a stream table written by `write_stream_table`.
+
+    Local files are memory-mapped and in-memory buffers are read without copying, so selecting
+    columns only touches the selected columns' data and nothing is parsed.
+
+    Args:
+        source (Union[str, bytes]): Path of a local stream file, or the stream file contents.
+        columns (Optional[list]): Streams to select, streams the table does not hold are ignored.
+                                  If None, every stream is returned.
+
+    Returns:
+        pa.Table: The stream table.
+    """
+    source = pa.memory_map(source) if isinstance(source, str) else pa.BufferReader(source)
+    table = pa.ipc.open_file(source).read_all()
+
+    if columns is not None:
+        table = table.select([column for column in columns if column in table.column_names])
+
+    return table
+
+def stream_splits(table: pa.Table, split_distance: float = 1000) -> list:
+    """
+    Derives splits from a stream table (see `compute_splits`).
+
+    Args:
+        table (pa.Table): Stream table holding distance, time and (optionally) heart rate streams.
+        split_distance (float): Split length in metres.
+
+    Returns:
+        list: One dictionary per completed split.
+    """
+    return compute_splits(distance=table.column('distance').to_numpy(),
+                          time=table.column('time').to_numpy(),
+                          heartrate=table.column('heartrate').to_numpy() if 'heartrate' in table.column_names else None,
+                          split_distance=split_distance)
+
+def stream_view(table: pa.Table, points: int = 50) -> list:
+    """
+    Derives a downsampled view of a stream table (see `downsample_mean`).
+
+    Args:
+        table (pa.Table): The stream table.
+        points (int): Maximum number of points in the view.
+
+    Returns:
+        list: One dictionary per downsampled point, keyed by stream name.
+    """
+    columns = {name: table.column(name).to_numpy() for name in table.column_names}
+
+    return columns_to_rows(downsample_mean(columns, points=points))
+
+def stream_best_efforts(table: pa.Table, effort_distances: dict) -> dict:
+    """
+    Derives the fastest window of each effort distance from a stream table (see `compute_best_efforts`).
+
+    Args:
+        table (pa.Table): Stream table holding distance and time streams.
+        effort_distances (dict): Effort distances in metres, keyed by effort name.
+
+    Returns:
+        dict: The fastest window of each effort, or None for every effort if the table has no
+              distance or time stream (e.g. manually uploaded activities).
+    """
+    if not {'distance', 'time'}.issubset(table.column_names):
+        return {name: None for name in effort_distances}
+
+    return compute_best_efforts(distance=table.column('distance').to_numpy(),
+                                time=table.column('time').to_numpy(),
+                                effort_distances=effort_distances)
@@ -0,0 +1,68 @@
+import pandas as pd
+
+# Define columns of the activity tag index, exported alongside the activity data
+tag_columns = ['pb_distance', 'is_wcp', 'wcp_distance']
+
+# Define activity name tags parsed into the tag index
+PB_DISTANCE_PATTERN = r'\[(5km|10km|HM)\]'
+WCP_DISTANCE_PATTERN = r'\[WCP\s*-\s*([\d.]+)\]'
+
+def add_activity_tags(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Parses activity name tags into the structured tag index columns.
+
+    Activity names are tagged by hand in Strava, with `[5km]`, `[10km]` and `[HM]` marking pb
+    efforts and `WCP` (typically `[WCP - <distance>]`) marking Wales Coast Path activities. Names
+    are parsed once with vectorised regular expressions into:
+
+    - `pb_distance`: The pb effort distance ('5km', '10km' or 'HM'), or null.
+    - `is_wcp`: Whether the activity is part of the Wales Coast Path.
+    - `wcp_distance`: The Wales Coast Path distance recorded in the tag, or null.
+
+    Rows that already carry a tag index (e.g. read back from a previous export) are left
+    unchanged, so names are only ever parsed once.
+
+    Args:
+        df (pd.DataFrame): Activity data with a `name` column.
+
+    Returns:
+        pd.DataFrame: The activity data with the tag index columns.
+    """
+    df = df.copy()
+    for column in tag_columns:
+        df[column] = df[column].astype('object') if column in df else None
+
+    # Parse names of untagged rows
+    untagged = df['is_wcp'].isna()
+    names = df.loc[untagged, 'name'].astype(str)
+    df.loc[untagged, 'pb_distance'] = names.str.extract(PB_DISTANCE_PATTERN, expand=False)
+    df.loc[untagged, 'is_wcp'] = names.str.contains('WCP', regex=False)
+    df.loc[untagged, 'wcp_distance'] = pd.to_numeric(names.str.extract(WCP_DISTANCE_PATTERN, expand=False),
+                                                     errors='coerce')
+
+    # Apply column types
+    return df.astype({'pb_distance': 'object', 'is_wcp': 'bool', 'wcp_distance': 'float'})
+
+def pb_effort_ids(activity_data: list) -> list:
+    """
+    Returns the ids of pb effort activities from tagged activity data.
+
+    Args:
+        activity_data (list): Activity records carrying the tag index.
+
+    Returns:
+        list: The ids of activities with a pb effort distance.
+    """
+    return [record['id'] for record in activity_data if pd.notna(record['pb_distance'])]
+
+def coastal_path_activities(activity_data: list) -> list:
+    """
+    Returns the Wales Coast Path activities from tagged activity data.
+
+    Args:
+        activity_data (list): Activity records carrying the tag index.
+
+    Returns:
+        list: The records of Wales Coast Path activities.
+    """
+    return [record for record in activity_data if record['is_wcp']]
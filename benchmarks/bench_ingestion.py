@@ -0,0 +1,61 @@
+# Import dependencies
+from benchmarks.fake_strava import FakeStravaServer, SyntheticAthlete
+from backend.functions.storage import get_blob_service_client
+import argparse
+import tempfile
+import logging
+import runpy
+import time
+import sys
+import os
+
+def run_ingestion(server: FakeStravaServer, connection_string: str) -> dict:
+    """
+    Run collect_data.py end to end against the fake api and filesystem blob storage, returning
+    the wall time, number of requests and bytes uploaded by the run
+    """
+    blob_client = get_blob_service_client(connection_string)
+    requests_before, bytes_before = server.request_count, blob_client.bytes_uploaded
+
+    # Execute the ingestion script
+    start = time.perf_counter()
+    sys.argv = ["backend.collect_data"]
+    runpy.run_module("backend.collect_data", run_name="__main__")
+    wall_time = time.perf_counter() - start
+
+    return {
+        "wall_time": wall_time,
+        "requests": server.request_count - requests_before,
+        "bytes_uploaded": blob_client.bytes_uploaded - bytes_before
+    }
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Benchmark collect_data.py against a local Strava API stand-in")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 50_000],
+                        help="Number of activities in each synthetic history")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds each api response is delayed by")
+    args = parser.parse_args()
+
+    # Silence the ingestion logger
+    logging.getLogger("BASIC").disabled = True
+
+    # Run a full sync followed by an incremental sync (with nothing new to collect) for each history
+    for size in args.sizes:
+        with FakeStravaServer(SyntheticAthlete(activity_count=size), latency=args.latency) as server, \
+                tempfile.TemporaryDirectory() as directory:
+            connection_string = f"file://{directory}"
+            os.environ.update({
+                "client_id": "benchmark",
+                "client_secret": "benchmark",
+                "refresh_token": "benchmark",
+                "blob_connection_string": connection_string,
+                "strava_api_url": server.url,
+                "force_full_sync": "false"
+            })
+
+            for label in ["full", "incremental"]:
+                result = run_ingestion(server, connection_string)
+                print(f"{size:>6} activities, {label:>11} sync: {result['wall_time']:7.2f} s, "
+                      f"{result['requests']:>5} requests, {result['bytes_uploaded'] / 1e6:7.2f} MB uploaded")
@@ -0,0 +1,51 @@
+# Import dependencies
+from backend.functions.stream_functions import compute_splits
+import numpy as np
+import timeit
+
+def legacy_splits(distance: list, time: list, heartrate: list, split_distance: float) -> list:
+    """
+    Original pure python split loop, kept as the benchmark baseline
+    """
+    splits = []
+    start = 0
+    for i in range(1, len(distance)):
+        if distance[i] - distance[start] >= split_distance:
+            splits.append({
+                "split_number": len(splits) + 1,
+                "start_time": time[start],
+                "end_time": time[i],
+                "split_time": time[i] - time[start],
+                "avg_hr": sum(heartrate[start:i]) / len(heartrate[start:i]) if heartrate else None
+            })
+            start = i
+    return splits
+
+def synthetic_stream(samples: int, seed: int = 0) -> tuple:
+    """
+    Generate a synthetic half-marathon length stream sampled once a second
+    """
+    rng = np.random.default_rng(seed)
+    distance = np.cumsum(rng.uniform(0.0, 21097.5 * 2 / samples, size=samples)).tolist()
+    time = list(range(samples))
+    heartrate = rng.integers(130, 185, size=samples).tolist()
+    return distance, time, heartrate
+
+
+if __name__ == "__main__":
+
+    # Benchmark each split length across half-marathon length streams, from python lists (as decoded
+    # from the JSON API response) and from numpy arrays (as loaded from a columnar stream store)
+    for samples in [7_500, 25_000, 50_000]:
+        distance, time, heartrate = synthetic_stream(samples)
+        arrays = tuple(np.asarray(stream) for stream in (distance, time, heartrate))
+        for label, split_distance in [("1km", 1000), ("1 mile", 1609.344), ("400m", 400)]:
+            legacy = min(timeit.repeat(lambda: legacy_splits(distance, time, heartrate, split_distance),
+                                       number=5, repeat=3)) / 5
+            from_lists = min(timeit.repeat(lambda: compute_splits(distance, time, heartrate, split_distance),
+                                           number=5, repeat=3)) / 5
+            from_arrays = min(timeit.repeat(lambda: compute_splits(*arrays, split_distance),
+                                            number=5, repeat=3)) / 5
+            print(f"{samples:>6} samples, {label:>6} splits: legacy {legacy * 1000:6.2f} ms, "
+                  f"vectorised (lists) {from_lists * 1000:6.2f} ms ({legacy / from_lists:4.1f}x), "
+                  f"vectorised (arrays) {from_arrays * 1000:6.2f} ms ({legacy / from_arrays:4.1f}x)")
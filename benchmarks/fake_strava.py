@@ -0,0 +1,266 @@
+# Import dependencies
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from datetime import datetime, timedelta, timezone
+from collections import Counter
+import numpy as np
+import threading
+import json
+import time
+import re
+
+# Define an encoded segment polyline returned for every starred segment
+SEGMENT_POLYLINE = "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+
+# Define pb effort tags and the distance (in metres) of the activities they are given to
+PB_EFFORTS = [("[5km]", 5000.0), ("[10km]", 10000.0), ("[HM]", 21097.5)]
+
+class SyntheticAthlete:
+    """
+    A synthetic athlete with a deterministic activity history.
+
+    Activities are spaced a day apart ending at `end_date`. Every `pb_every`th activity is a pb
+    effort (cycling through 5km, 10km and half marathon) and every `wcp_every`th a Wales Coast
+    Path activity, so the share of activities requiring stream and detail requests matches a
+    real history regardless of its length.
+    """
+    def __init__(
+            self,
+            activity_count: int,
+            segment_count: int = 40,
+            pb_every: int = 50,
+            wcp_every: int = 25,
+            end_date: datetime = datetime(2025, 1, 1, tzinfo=timezone.utc)) -> None:
+        self.activity_count = activity_count
+        self.segment_count = segment_count
+        self.pb_every = pb_every
+        self.wcp_every = wcp_every
+        self.end_date = end_date
+
+    def start_date(self, activity_id: int) -> datetime:
+        """
+        Returns the start date of an activity, with activity ids increasing over time
+        """
+        return self.end_date - timedelta(days=self.activity_count - activity_id) + timedelta(hours=8)
+
+    def activity(self, activity_id: int) -> dict:
+        """
+        Returns the summary representation of an activity
+        """
+        name, distance = "Morning Run", 8000.0
+        if activity_id % self.pb_every == 0:
+            tag, distance = PB_EFFORTS[(activity_id // self.pb_every) % len(PB_EFFORTS)]
+            name = f"Race {tag}"
+        elif activity_id % self.wcp_every == 0:
+            name = f"WCP Day {activity_id // self.wcp_every}"
+
+        return {
+            "id": activity_id,
+            "name": name,
+            "distance": distance,
+            "moving_time": int(distance * 0.3),
+            "total_elevation_gain": 25.0,
+            "type": "Run",
+            "start_date": self.start_date(activity_id).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "kudos_count": activity_id % 7,
+            "comment_count": activity_id % 3,
+            "athlete_count": 1,
+            "map": {"summary_polyline": SEGMENT_POLYLINE}
+        }
+
+    def activity_detail(self, activity_id: int) -> dict:
+        """
+        Returns the detailed representation of an activity, including an official time description
+        """
+        activity = self.activity(activity_id)
+        minutes, seconds = divmod(activity["moving_time"], 60)
+        return {**activity, "description": f"Official result [Chip - {minutes}:{seconds:02d}]"}
+
+    def activities(self, page: int, per_page: int, after: int = None) -> list:
+        """
+        Returns a page of activities; newest first, or oldest first when filtered with `after`
+        """
+        ids = list(range(self.activity_count, 0, -1))
+        if after is not None:
+            ids = [i for i in reversed(ids) if self.start_date(i).timestamp() > after]
+
+        return [self.activity(i) for i in ids[(page - 1) * per_page:page * per_page]]
+
+    def streams(self, activity_id: int, keys: list) -> dict:
+        """
+        Returns an activity's streams sampled once a second, keyed by type
+        """
+        activity = self.activity(activity_id)
+        samples = activity["moving_time"]
+        rng = np.random.default_rng(activity_id)
+        velocity = rng.uniform(0.8, 1.2, size=samples) * activity["distance"] / samples
+
+        columns = {
+            "time": np.arange(samples).tolist(),
+            "distance": np.round(np.cumsum(velocity), 1).tolist(),
+            "velocity_smooth": np.round(velocity, 2).tolist(),
+            "heartrate": rng.integers(130, 185, size=samples).tolist()
+        }
+
+        return {key: {"data": columns[key], "series_type": "distance", "original_size": samples}
+                for key in keys if key in columns}
+
+    def starred_segments(self, page: int, per_page: int) -> list:
+        """
+        Returns a page of starred segments, half of which are Wales Coast Path segments
+        """
+        ids = range(1, self.segment_count + 1)[(page - 1) * per_page:page * per_page]
+        return [{"id": i, "name": f"WCP Segment {i}" if i % 2 else f"Hill Climb {i}"} for i in ids]
+
+    def segment(self, segment_id: int) -> dict:
+        """
+        Returns the detailed representation of a segment
+        """
+        return {"id": segment_id, "name": f"Segment {segment_id}", "map": {"polyline": SEGMENT_POLYLINE}}
+
+class FakeStravaServer:
+    """
+    A local stand-in for the Strava API serving a synthetic athlete.
+
+    Serves the token, activity listing, activity detail, activity stream, starred segment and
+    segment endpoints used by the backend. Every response waits `latency` seconds and reports
+    `X-RateLimit-*` / `X-ReadRateLimit-*` headers from the configured limits; requests beyond a
+    limit are rejected with a 429, as the real API does. Request counts (by endpoint) and bytes
+    served are recorded for benchmarking.
+
+    Attributes:
+        athlete (SyntheticAthlete): The athlete whose data is served.
+        latency (float): Seconds each response is delayed by.
+        rate_limits (tuple): 15 minute and daily request limits.
+        request_counts (Counter): Number of requests served per endpoint.
+        bytes_served (int): Total size of every response body.
+    """
+    def __init__(
+            self,
+            athlete: SyntheticAthlete,
+            latency: float = 0.0,
+            rate_limits: tuple = (100_000, 1_000_000),
+            host: str = "127.0.0.1",
+            port: int = 0) -> None:
+        self.athlete = athlete
+        self.latency = latency
+        self.rate_limits = rate_limits
+        self.request_counts = Counter()
+        self.bytes_served = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        """
+        Base url of the fake API
+        """
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api/v3"
+
+    @property
+    def request_count(self) -> int:
+        """
+        Total number of requests served
+        """
+        return sum(self.request_counts.values())
+
+    def __enter__(self) -> 'FakeStravaServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def route(self, method: str, path: str, query: dict) -> tuple:
+        """
+        Resolves a request to the endpoint name and response payload (None if not found)
+        """
+        page, per_page = int(query.get("page", 1)), int(query.get("per_page", 30))
+        if method == "POST" and path == "/oauth/token":
+            return "token", {"access_token": "fake-access-token", "refresh_token": "fake-refresh-token",
+                             "expires_at": int(time.time()) + 21600}
+        if path == "/athlete/activities":
+            after = int(query["after"]) if "after" in query else None
+            return "activities", self.athlete.activities(page=page, per_page=per_page, after=after)
+        if path == "/segments/starred":
+            return "starred_segments", self.athlete.starred_segments(page=page, per_page=per_page)
+
+        match = re.fullmatch(r"/(activities|segments)/(\d+)(/streams)?", path)
+        if match and match.group(1) == "activities" and match.group(3):
+            return "streams", self.athlete.streams(int(match.group(2)), query.get("keys", "").split(","))
+        if match and match.group(1) == "activities":
+            return "activity", self.athlete.activity_detail(int(match.group(2)))
+        if match and not match.group(3):
+            return "segment", self.athlete.segment(int(match.group(2)))
+
+        return "not_found", None
+
+    def respond(self, method: str, raw_path: str) -> tuple:
+        """
+        Handles a request, returning its status code, headers and body
+        """
+        time.sleep(self.latency)
+
+        # Resolve endpoint, keeping the last value of any repeated query parameter
+        url = urlparse(raw_path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        endpoint, payload = self.route(method, url.path.removeprefix("/api/v3"), query)
+
+        # Record request against the rate limits
+        with self._lock:
+            self.request_counts[endpoint] += 1
+            usage = self.request_count
+        limited = usage > min(self.rate_limits)
+        headers = {
+            "X-RateLimit-Limit": ",".join(str(limit) for limit in self.rate_limits),
+            "X-RateLimit-Usage": f"{usage},{usage}",
+            "X-ReadRateLimit-Limit": ",".join(str(limit) for limit in self.rate_limits),
+            "X-ReadRateLimit-Usage": f"{usage},{usage}"
+        }
+
+        # Generate response
+        if limited:
+            status, payload = 429, {"message": "Rate Limit Exceeded"}
+        elif payload is None:
+            status, payload = 404, {"message": "Record Not Found"}
+        else:
+            status = 200
+        body = json.dumps(payload).encode()
+        with self._lock:
+            self.bytes_served += len(body)
+
+        return status, headers, body
+
+    def _handler(self) -> type:
+        """
+        Builds the request handler class bound to this server
+        """
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                self.send(*server.respond("GET", self.path))
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                self.send(*server.respond("POST", self.path))
+
+            def send(self, status: int, headers: dict, body: bytes):
+                self.send_response(status)
+                for key, value in {**headers, "Content-Type": "application/json",
+                                   "Content-Length": str(len(body))}.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -1,14 +1,22 @@
 # Import python dependencies
+from backend.functions.route_functions import read_route_table, coordinates_column, coordinates_type
+from backend.functions.rollups import rollup_filename, rollup_columns
+from backend.functions.storage import download_blob, download_blobs
+from backend.functions.stream_functions import read_stream_table
 from streamlit_components.data_functions import BlobData
-from azure.storage.blob import BlobServiceClient
 from folium.plugins import Fullscreen
 from typing import Tuple
+import pyarrow.compute as pc
 import streamlit as st
 import datetime as dt
+import pyarrow as pa
 import pandas as pd
 import polyline
 import folium
-import json
+import io
+
+# Define CSV datasets the ingest publishes a Parquet copy of (see `ApiService.export_activity_data`)
+parquet_datasets = ['activity_data.csv', 'coastal_path_data.csv']
 
 class Variables:
     """
@@ -43,7 +51,57 @@ class StravaData(BlobData):
 
     This class can be extended to include methods and properties
     specific to fetching, processing, and managing Strava activity data.
+
+    When a CSV dataset published with a Parquet copy (see `parquet_datasets`) is requested and
+    the copy exists (e.g. `activity_data.parquet`), the typed Parquet file is loaded instead, so
+    dates arrive already parsed and activity types as categoricals. Otherwise CSV blobs are read
+    through the pooled blob client, which decompresses gzip encoded blobs transparently. Datasets
+    without a Parquet copy are read as CSV straight away, without requesting a missing blob.
     """
+    def __init__(
+        self,
+        blob_connection_string: str,
+        container_name: str,
+        blob_name: str
+    ) -> None:
+        """
+        Loads the requested blob into `self.df`, preferring the Parquet copy of CSV datasets that have one.
+
+        Args:
+            blob_connection_string (str): Azure Blob Storage connection string.
+            container_name (str): Name of the blob container.
+            blob_name (str): Name of the blob to load.
+        """
+        # Read non CSV blobs with the base class
+        if not blob_name.endswith('.csv'):
+            super().__init__(blob_connection_string=blob_connection_string,
+                             container_name=container_name,
+                             blob_name=blob_name)
+            return
+
+        self.blob_connection_string = blob_connection_string
+        self.container_name = container_name
+
+        # Attempt to download Parquet copy of CSV datasets published with one
+        parquet_blob_name = blob_name.removesuffix('.csv') + '.parquet'
+        parquet_bytes = None
+        if blob_name in parquet_datasets:
+            parquet_bytes = download_blob(connection_string=blob_connection_string,
+                                          container=container_name,
+                                          blob_name=parquet_blob_name)
+
+        # Load typed data from Parquet
+        if parquet_bytes is not None:
+            self.blob_name = parquet_blob_name
+            self.df = pd.read_parquet(io.BytesIO(parquet_bytes))
+            return
+
+        # Fall back to reading the (possibly compressed) CSV blob if no Parquet copy exists
+        self.blob_name = blob_name
+        self.df = pd.read_csv(io.BytesIO(download_blob(connection_string=blob_connection_string,
+                                                       container=container_name,
+                                                       blob_name=blob_name)))
+
     def filter_data_by_date_range(
         self,
         min_date: str,
@@ -142,18 +200,28 @@ class StravaData(BlobData):
         self.df = self.df[list(mapping_dict.values())]
 
 def generate_heatmap(
-    data: StravaData
-) -> None:
+    data: StravaData,
+    vars: Variables,
+    detail: str = 'medium'
+) -> bool:
     """
     Generates an interactive folium heatmap of Strava activity routes and updates
     the Streamlit session state with the map HTML for display and download.
 
-    The function decodes GPS polylines from Strava activity data and plots them on
-    a map centered around a fixed location. Activities with zero distance or invalid
-    data are ignored. Fullscreen control is added to the map.
+    Routes are read from the route file published by the ingest, where every activity's
+    polyline has already been decoded and simplified, so generating the heatmap only
+    selects the routes of the filtered activities at the requested detail level and plots
+    them on a map centered around a fixed location. Activities without GPS data have no
+    route. Fullscreen control is added to the map.
 
     Args:
-        data (StravaData): An instance containing Strava activity data with decoded polylines.
+        data (StravaData): An instance containing the (filtered) Strava activity data.
+        vars (Variables): Config object containing the blob connection string.
+        detail (str): Route detail level ('full', 'medium' or 'low').
+
+    Returns:
+        bool: True if the heatmap was generated, False if none of the activities has a route
+              (e.g. no route file has been published yet).
 
     Side Effects:
         - Writes the generated map HTML to `st.session_state.buffer`.
@@ -162,27 +230,20 @@ def generate_heatmap(
     # Construct folium object
     m = folium.Map(tiles='cartodb positron', location=[51.4837, 0], zoom_start=6)
 
-    # Iterate through activity data and collect polylines
-    for _, row in data.return_dataframe().iterrows():
-
-        try:
-            # Filter out activities with no gps data
-            if row['distance'] > 0:
-
-                # Collect polyline data
-                curve = row['map']
-
-                # Decode polyline data
-                data = polyline.decode(curve)
+    # Select routes of the filtered activities at the requested detail level
+    routes = read_route_table_from_blob(vars=vars, container_name='strava', level=detail)
+    routes = routes.filter(pc.is_in(routes.column('id'), pa.array(data.return_dataframe()['id'], pa.int64())))
 
-                # Add polyline data to folium object
-                folium.PolyLine(data,
-                                color='#fc4c02',
-                                weight=1,
-                                opacity=0.7).add_to(m)
+    # Skip heatmap if there are no routes to plot
+    coordinates = routes.column(coordinates_column(detail)).to_pylist()
+    if len(coordinates) == 0:
+        return False
 
-        except BaseException:
-            pass
+    # Add every route to the folium object as a single multi-line layer
+    folium.PolyLine(coordinates,
+                    color='#fc4c02',
+                    weight=1,
+                    opacity=0.7).add_to(m)
 
     # Add full screen functionality to folium object
     Fullscreen(position="topleft").add_to(m)
@@ -197,6 +258,8 @@ def generate_heatmap(
     # Make download available
     st.session_state.download_disabled = False
 
+    return True
+
 def generate_coastal_path_heatmap(
     vars: Variables
 ) -> folium.Map._repr_html_:
@@ -258,13 +321,14 @@ def sum_coastal_path_distance(data: StravaData) -> Tuple[float, pd.DataFrame]:
     """
     Extract and sum Welsh Coastal Path (WCP) distances from Strava activity data.
 
-    Looks for patterns like "[WCP - X]" in activity names, where X is a distance value.
+    Uses the `wcp_distance` column of the activity tag index, parsed from tags like
+    "[WCP - X]" in activity names during ingest, where X is a distance value.
     Returns the total distance and a yearly summary based on activity start dates.
 
     Parameters
     ----------
     data : StravaData
-        A StravaData object with 'name' and 'start_date' fields.
+        A StravaData object with 'wcp_distance' and 'start_date' fields.
 
     Returns
     -------
@@ -276,11 +340,8 @@ def sum_coastal_path_distance(data: StravaData) -> Tuple[float, pd.DataFrame]:
     # Return dataframe from StravaData object
     df = data.return_dataframe()
 
-    # Use regex to extract the number after 'WCP - ' and before ']'
-    df['wcp_value'] = df['name'].str.extract(r'\[WCP\s*-\s*([\d.]+)\]', expand=False)
-
-    # Convert to numeric (in case some are NaN or strings)
-    df['wcp_value'] = pd.to_numeric(df['wcp_value'], errors='coerce')
+    # Collect coastal path distance from the tag index
+    df['wcp_value'] = pd.to_numeric(df['wcp_distance'], errors='coerce')
 
     # Make sure start_date is a datetime
     df['start_date'] = pd.to_datetime(df['start_date'])
@@ -293,34 +354,88 @@ def sum_coastal_path_distance(data: StravaData) -> Tuple[float, pd.DataFrame]:
 
     return float(df['wcp_value'].sum()), distance_per_year
 
-def read_json_from_blob(vars: Variables, container_name: str, blob_name: str) -> list:
+def read_stream_tables_from_blob(
+        vars: Variables,
+        container_name: str,
+        blob_names: list,
+        columns: list = None) -> dict:
+    """
+    Read several activity stream tables from Azure Blob Storage concurrently.
+
+    Stream tables are stored as Arrow IPC files, which are read without copying or parsing, so
+    only the selected columns are materialised.
+
+    Args:
+        vars (Variables): Config object containing the blob connection string.
+        container_name (str): Name of the blob container.
+        blob_names (list): Names of the stream blobs.
+        columns (list): Streams to select, or None for every stream.
+
+    Returns:
+        dict: Stream tables keyed by blob name (None for streams that have not been collected).
     """
-    Read and parse a JSON blob from Azure Blob Storage.
+    # Download blobs concurrently through the pooled client
+    downloaded_blobs = download_blobs(connection_string=vars.blob_connection_string,
+                                      container=container_name,
+                                      blob_names=blob_names)
+
+    # Read stream tables
+    return {blob_name: read_stream_table(downloaded_bytes, columns=columns) if downloaded_bytes is not None else None
+            for blob_name, downloaded_bytes in downloaded_blobs.items()}
+
+def read_rollup_from_blob(vars: Variables, container_name: str, resolution: str) -> pd.DataFrame:
+    """
+    Read an activity rollup table published by the ingest from Azure Blob Storage.
 
     Args:
         vars (Variables): Config object containing the blob connection string.
         container_name (str): Name of the blob container.
-        blob_name (str): Name of the JSON blob.
+        resolution (str): The rollup resolution ('yearly', 'monthly' or 'weekly').
 
     Returns:
-        list: Parsed JSON content.
+        pd.DataFrame: Activity count and summed distance (m), elevation gain (m), moving time (s)
+                      and kudos count per period (identified by its start date) and activity type,
+                      or an empty rollup if none has been published yet.
+    """
+    # Download rollup through the pooled client shared with the backend
+    downloaded_bytes = download_blob(connection_string=vars.blob_connection_string,
+                                     container=container_name,
+                                     blob_name=rollup_filename(resolution))
+
+    # Return empty rollup if the rollup has not been published
+    if downloaded_bytes is None:
+        return pd.DataFrame(columns=rollup_columns).astype({'period': 'datetime64[ns]'})
+
+    return pd.read_csv(io.BytesIO(downloaded_bytes), parse_dates=['period'])
+
+def read_route_table_from_blob(
+        vars: Variables,
+        container_name: str,
+        level: str,
+        blob_name: str = 'routes/routes.arrow') -> pa.Table:
     """
-    # Connect to Blob Storage
-    blob_service_client = BlobServiceClient.from_connection_string(
-        vars.blob_connection_string
-    )
-
-    # Define blob container client
-    blob_client = blob_service_client.get_blob_client(
-        container=container_name,
-        blob=blob_name
-    )
-
-    # Download and parse JSON
-    downloaded_bytes = blob_client.download_blob().readall()
-    data = json.loads(downloaded_bytes)
-
-    return data
+    Read the decoded and simplified activity routes published by the ingest from Azure Blob Storage.
+
+    Args:
+        vars (Variables): Config object containing the blob connection string.
+        container_name (str): Name of the blob container.
+        level (str): Route detail level to select ('full', 'medium' or 'low').
+        blob_name (str): Name of the route file blob.
+
+    Returns:
+        pa.Table: Activity ids and their routes, as lists of (latitude, longitude) pairs, or an empty
+                  table if no route file has been published yet.
+    """
+    # Download route file through the pooled client shared with the backend
+    downloaded_bytes = download_blob(connection_string=vars.blob_connection_string,
+                                     container=container_name,
+                                     blob_name=blob_name)
+
+    # Return empty route table if the route file has not been published
+    if downloaded_bytes is None:
+        return pa.table({'id': pa.array([], pa.int64()), coordinates_column(level): pa.array([], coordinates_type)})
+
+    return read_route_table(downloaded_bytes, level=level)
 
 def seconds_to_mmss(seconds):
     """
@@ -20,26 +20,26 @@ def render_page_logo() -> None:
     st.logo(image='./assets/strava_text.png',
             size='large')
 
-def homepage_metrics(activity_data: pd.DataFrame,
+def homepage_metrics(yearly_rollup: pd.DataFrame,
                      vars: Variables) -> None:
     """
     Generates and displays a homepage metrics component in Streamlit summarizing
     activity data over the current and previous years for selected activity types.
 
-    The function calculates the total distance (in kilometers) and number of entries
-    for each activity type ('Run', 'Ride', 'Swim', 'Golf', 'Walk') across two years,
-    then visualizes the current year's distance along with the difference compared
-    to the previous year using Streamlit metric components.
+    The function reads the total distance (in kilometers) and number of entries
+    for each activity type ('Run', 'Ride', 'Swim', 'Golf', 'Walk') across two years
+    from the yearly rollup published by the ingest, then visualizes the current year's
+    distance along with the difference compared to the previous year using Streamlit
+    metric components.
 
     Args:
-        activity_data (pd.DataFrame): DataFrame containing Strava activity data,
-            expected to have 'type', 'start_date', and 'distance' columns.
+        yearly_rollup (pd.DataFrame): Yearly activity rollup, expected to have 'period',
+            'type', 'count' and 'distance' columns.
         vars (Variables): An instance containing date-related variables such as current
             and previous year.
     """
     # Define activity types of interest
     activity_types = ['Run', 'Ride', 'Swim', 'Golf', 'Walk']
-    activity_data['start_date'] = pd.to_datetime(activity_data['start_date'], errors='coerce')
 
     # Iterate through all activity types to get the previous 2 years of data
     data = {}
@@ -49,10 +49,10 @@ def homepage_metrics(activity_data: pd.DataFrame,
         yearly_data = {}
         for year in [vars.current_year, vars.previous_year]:
 
-            filtered_df = activity_data[(activity_data['type'] == type) & (activity_data['start_date'].dt.year == year)]
+            filtered_df = yearly_rollup[(yearly_rollup['type'] == type) & (yearly_rollup['period'].dt.year == year)]
 
             yearly_data[year] = {
-                'entries': len(filtered_df),
+                'entries': int(filtered_df['count'].sum()),
                 'distance': filtered_df['distance'].sum()/1000
             }
 
@@ -6,6 +6,7 @@ from functions.mapping import activity_df_column_map
 from functions.data_functions import (
     generate_coastal_path_heatmap,
     sum_coastal_path_distance,
+    read_rollup_from_blob,
     generate_heatmap,
     StravaData,
     Variables
@@ -16,7 +17,7 @@ import pandas as pd
 import datetime
 
 def render_home_page(
-    data: StravaData,
+    yearly_rollup: pd.DataFrame,
     vars: Variables
 ) -> None:
     """
@@ -27,7 +28,7 @@ def render_home_page(
     indicating metadata about the activity data file stored in Azure Blob Storage.
 
     Args:
-        data (StravaData): An instance containing Strava activity data and related methods.
+        yearly_rollup (pd.DataFrame): Yearly activity rollup published by the ingest.
         vars (Variables): An instance containing configuration variables, including current year and storage
             credentials.
 
@@ -38,8 +39,13 @@ def render_home_page(
     st.title('STRAVA DASHBOARD')
     st.header(f'Yearly distance stats to date ({vars.current_year})')
 
+    # Render info component if no activity rollup has been published
+    if yearly_rollup.empty:
+        st.info('No activity data has been published yet')
+        return
+
     # Render homepage metrics ui component
-    homepage_metrics(activity_data=data.return_dataframe(),
+    homepage_metrics(yearly_rollup=yearly_rollup,
                      vars=vars)
 
     # Render data source metadata badge
@@ -131,7 +137,8 @@ def render_activity_overview(
                  hide_index=True)
 
 def render_heatmap(
-    data: StravaData
+    data: StravaData,
+    vars: Variables
 ) -> None:
     """
     Renders the Heatmap page in Streamlit, allowing users to filter activities by type
@@ -141,12 +148,14 @@ def render_heatmap(
     Features include:
     - Multi-select filter for activity types.
     - Date inputs for selecting start and end dates.
+    - Route detail selector, choosing how far the pre-decoded routes are simplified.
     - Button to generate the heatmap based on current filters.
     - Download button enabled once the heatmap is generated.
     - Feedback messages and loading spinner during heatmap generation.
 
     Args:
         data (StravaData): An instance containing Strava activity data and filtering methods.
+        vars (Variables): An instance containing configuration variables, including storage credentials.
 
     Side Effects:
         - Modifies `data.df` via filtering methods.
@@ -192,6 +201,12 @@ def render_heatmap(
         # Render start date range input button
         end = st.date_input("End Date", datetime.datetime.today())
 
+        # Render route detail input
+        detail = st.segmented_control(label='Route Detail',
+                                      options=['low', 'medium', 'full'],
+                                      default='medium',
+                                      format_func=str.title)
+
     data.filter_column_by_list(column_name='type', filter_values=options)
     data.filter_data_by_date_range(min_date=start, max_date=end, column_name='start_date')
 
@@ -201,13 +216,15 @@ def render_heatmap(
         # Render spinner for when heatmap is being created
         with st.spinner('Generating Heatmap'):
 
-            generate_heatmap(data=data)
+            heatmap_generated = generate_heatmap(data=data, vars=vars, detail=detail or 'medium')
 
-            # Reload page
+        # Reload page, or render info component if there are no routes to plot
+        if heatmap_generated:
             st.rerun()
+        st.info('No routes found for the selected activities')
 
 def render_progress_page(
-    data: StravaData
+    vars: Variables
 ) -> None:
     """
     Renders the Progress Overview page in Streamlit, providing interactive controls
@@ -218,28 +235,31 @@ def render_progress_page(
     - Multi-select input to filter activities by type.
     - Selection between bar and line chart types.
     - Choice of metric to visualize (e.g., Distance, Count, Kudos Count, Total Elevation Gain, Moving Time).
-    - Plot resolution selector (Yearly or Monthly) affecting aggregation and date slider format.
+    - Plot resolution selector (Yearly or Monthly) selecting the rollup plotted and date slider format.
     - Date range slider to filter data temporally.
-    - Aggregation and filtering of activity data based on user inputs.
+    - Filtering of the activity rollups published by the ingest based on user inputs.
     - Visualization rendered using Plotly, displayed in the Streamlit app.
 
     Args:
-        data (StravaData): An instance containing Strava activity data and data manipulation methods.
+        vars (Variables): An instance containing configuration variables, including storage credentials.
 
     Side Effects:
-        - Modifies `data.df` in-place (distance conversion).
         - Renders multiple Streamlit UI components and interactive plots.
     """
-    data.convert_distance_into_km(column_name='distance')
-    # Convert distance from meters to kilometers
-    # activity_data['distance'] = activity_data['distance'] / 1000
+    # Read in yearly activity rollup, which covers every activity type
+    rollups = {'Yearly': read_rollup_from_blob(vars=vars, container_name='strava', resolution='yearly')}
 
     # Collect a list of unique activity types
-    all_activity_types = data.return_dataframe()['type'].unique().tolist()
+    all_activity_types = rollups['Yearly']['type'].unique().tolist()
 
     # Render page title
     st.title('Progress Overview')
 
+    # Render info component if no activity rollup has been published
+    if rollups['Yearly'].empty:
+        st.info('No activity data has been published yet')
+        return
+
     # Define the range for the slider
     start_date = datetime.datetime(2016, 1, 1)
     end_date = datetime.datetime(datetime.datetime.now().year, 12, 31)
@@ -271,12 +291,10 @@ def render_progress_page(
                                                options=['Yearly', 'Monthly'],
                                                default='Yearly')
 
-        # Map granularity input to chart resolution
+        # Map granularity input to date slider format
         if plot_resolution == 'Yearly':
-            resolution = 'Y'
             date_slider_format = 'YYYY'
         elif plot_resolution == 'Monthly':
-            resolution = 'M'
             date_slider_format = 'MM/YYYY'
 
     # Render date slider component in final column
@@ -289,26 +307,18 @@ def render_progress_page(
             format=date_slider_format
         )
 
-    df = data.return_dataframe()
-    df['start_date'] = pd.to_datetime(df['start_date'])
-
-    if metric == 'Count':
-        grouped_df = df \
-            .groupby([df['start_date'].dt.to_period(resolution), 'type'])['type'] \
-            .count().reset_index(name='count')
+    # Read in activity rollup at the selected resolution
+    if plot_resolution not in rollups:
+        rollups[plot_resolution] = read_rollup_from_blob(vars=vars, container_name='strava',
+                                                         resolution=plot_resolution.lower())
+    grouped_df = rollups[plot_resolution].rename(columns={'period': 'start_date'})
 
-    # Aggregate data by distance
-    else:
-        grouped_df = df \
-            .groupby([df['start_date'].dt.to_period(resolution), 'type']) \
-            .sum(numeric_only=True).reset_index()
+    # Convert distance from meters to kilometers
+    grouped_df['distance'] = (grouped_df['distance'] / 1000).round(2)
 
     # Filter by activity type
     grouped_df = grouped_df[grouped_df['type'].isin(selected_activity_type)]
 
-    # Convert 'date' back to datetime for plotting purposes
-    grouped_df['start_date'] = grouped_df['start_date'].dt.to_timestamp()
-
     # Filter by date range
     grouped_df = grouped_df[
         (grouped_df['start_date'] >= date_range[0]) & (grouped_df['start_date'] <= date_range[1])]
@@ -1,5 +1,6 @@
 # Import dependencies
-from functions.data_functions import StravaData, Variables, read_json_from_blob, seconds_to_mmss
+from functions.data_functions import StravaData, Variables, read_stream_tables_from_blob, seconds_to_mmss
+from backend.functions.stream_functions import stream_splits, stream_view
 from streamlit_components.plot_functions import PlotlyPlotter
 import streamlit as st
 import pandas as pd
@@ -13,18 +14,25 @@ def render_running_pb_section(data: StravaData, vars: Variables) -> None:
     st.title("Running PB Effort Overview")
 
     # Render distance selectbox
-    distance = st.selectbox(label="Distance", options=["5km", "10km", "Half Marathon"], index=2)
+    distance = st.selectbox(label="Distance", options=["1km", "5km", "10km", "Half Marathon"], index=3)
 
     # Filter dataframe based on user selected option
-    distance_map = {"5km": "5km", "10km": "10km", "Half Marathon": "HM"}
+    distance_map = {"1km": "1km", "5km": "5km", "10km": "10km", "Half Marathon": "HM"}
     df = data.return_dataframe()
-    df = df[df["name"].str.contains(distance_map[distance])]
+    df = df[df["pb_distance"] == distance_map[distance]]
+
+    # Label official results and best efforts detected in run streams
+    source_map = {"official": "Official", "stream": "Detected"}
+    df["source"] = df["source"].map(source_map).fillna("Official") if "source" in df else "Official"
 
     # Convert columns
     df["date"] = pd.to_datetime(df["start_date"])
     df["time_delta"] = pd.to_timedelta(df["time"])
     df["minutes"] = df["time_delta"].dt.total_seconds() / 60
 
+    # Order official and detected efforts by date, so the progression is plotted in time order
+    df = df.sort_values("date")
+
     # Render plot of pb efforts over time
     if len(df) > 0:
         # Define columns to store user inputs
@@ -43,11 +51,13 @@ def render_running_pb_section(data: StravaData, vars: Variables) -> None:
                     labels={
                         "minutes": "Minutes",
                         "date": "Date",
-                        "time": "Time"
+                        "time": "Time",
+                        "source": "Source"
                     },
                     text="time",
                     hover_data={
                         "time": True,
+                        "source": True,
                         "minutes": False,
                         "date": True,
                         "name": False
@@ -65,51 +75,74 @@ def render_running_pb_section(data: StravaData, vars: Variables) -> None:
         with columns[-1]:
             with st.container(border=True):
                 df = df.sort_values("minutes").reset_index()
-                leaderboard_df = df[["name", "time", "date"]]
+                leaderboard_df = df[["name", "time", "date", "source"]]
                 leaderboard_df = leaderboard_df.rename(
-                    columns={"name": "Activity Name", "time": "Time", "date": "Date"})
+                    columns={"name": "Activity Name", "time": "Time", "date": "Date", "source": "Source"})
 
                 st.dataframe(leaderboard_df, hide_index=True)
 
-        # Collect activity names for specific distance
-        efforts = df[df['name'].str.contains(distance_map[distance], na=False)]["name"]
+        # Collect activity ids for specific distance, labelled by name and date as untagged runs often share a name
+        labels = {id: f"{name} ({date:%d/%m/%Y})" for id, name, date in zip(df["id"], df["name"], df["date"])}
 
         # Define 3 column objects
         columns = st.columns([6, 1, 1])
 
         # Render multiselect object within first column
         with columns[0]:
-            activities = st.multiselect(label="Activities To Analysis", options=efforts)
+            activities = st.multiselect(label="Activities To Analysis", options=list(labels), format_func=labels.get)
 
         # Render plot metric pills within final column
         with columns[-1]:
             plot_metric = st.pills(label="Plot Breakdown", options=["Splits", "Raw"], default="Splits")
 
+        # Render raw data detail pills within middle column, mapping detail to downsampled points
+        detail_map = {"Low": 50, "Medium": 200, "High": 1000}
+        with columns[1]:
+            detail = st.pills(label="Detail", options=list(detail_map), default="Low", disabled=plot_metric != "Raw")
+
         # Filter effort data by selected activities
-        effort_df = df[df["name"].isin(activities)]
+        effort_df = df[df["id"].isin(activities)]
 
         # If activities have been selected, render the following section
         if len(effort_df) > 0:
 
-            # Create activity name and index dictionary to collect data from blob
-            activities = effort_df.set_index("name")["id"].to_dict()
+            # Create activity label and id dictionary to collect data from blob
+            activities = {labels[id]: id for id in effort_df["id"]}
+
+            # Read the streams required by the plot for the selected activities from blob concurrently
+            stream_columns = {"Raw": ["distance", "velocity_smooth"], "Splits": ["distance", "time", "heartrate"]}
+            streams = read_stream_tables_from_blob(vars=vars,
+                                                   container_name="strava",
+                                                   blob_names=[f"stream/{id}.arrow" for id in activities.values()],
+                                                   columns=stream_columns["Raw" if plot_metric == "Raw" else "Splits"])
 
             # Define empty dataframe and iterate through selected activities
             all_effort_df = pd.DataFrame()
             for activity_name, activity_id in activities.items():
 
-                # Read activity stream from blob
-                data = read_json_from_blob(vars=vars,
-                                           container_name="strava",
-                                           blob_name=f"stream/{activity_id}.json")
+                # Collect activity stream read from blob, skipping streams not collected yet
+                table = streams[f"stream/{activity_id}.arrow"]
+                if table is None:
+                    continue
+
+                # Derive raw data view at the selected resolution, or 1km splits, from the full resolution stream
+                if plot_metric == "Raw":
+                    plot_data = stream_view(table, points=detail_map.get(detail, 50))
+                else:
+                    plot_data = stream_splits(table, split_distance=1000)
 
                 # Fetch data of interest and write to a dataframe + append activity name column
-                single_effort_df = pd.DataFrame(data[plot_metric.lower()])
+                single_effort_df = pd.DataFrame(plot_data)
                 single_effort_df["Activity Name"] = activity_name
 
                 # Concat activity data to all effort dataframe
                 all_effort_df = pd.concat([all_effort_df, single_effort_df], ignore_index=True)
 
+            # Render message on screen if none of the selected activities has a stream collected yet
+            if all_effort_df.empty:
+                st.info("No stream data collected for the selected activities yet")
+                return
+
             # If plot metric is splits, create splits string for plot
             if plot_metric == "Splits":
                 all_effort_df["split_str"] = (
@@ -1,13 +1,13 @@
 # Import dependencies
+from functions.data_functions import read_rollup_from_blob, Variables
 from streamlit_components.plot_functions import PlotlyPlotter
-from functions.data_functions import StravaData, Variables
 from dateutil.relativedelta import relativedelta
 import streamlit as st
 import pandas as pd
 
-def render_running_pb_section(data: StravaData, vars: Variables) -> None:
+def render_running_pb_section(vars: Variables) -> None:
     """
-    Function to render triathlon progress dashboard component
+    Function to render triathlon progress dashboard component from the weekly activity rollup
     """
     # Render page title
     st.title("Triathlon Training Overview")
@@ -32,15 +32,14 @@ def render_running_pb_section(data: StravaData, vars: Variables) -> None:
     with columns[-1]:
         metric = st.pills(label="Metric", options=["Total Distance", "Activity Count"], default="Total Distance")
 
-    # Filter data by selected date range
-    data.filter_data_by_date_range(min_date=date_range[0],
-                                   max_date=date_range[1],
-                                   column_name='start_date')
-
-    # Return dataframe object and perform transformations ready for processing
-    df = data.return_dataframe()
-    df["start_date"] = pd.to_datetime(df["start_date"])
-    df["week"] = df["start_date"].dt.to_period("W").apply(lambda r: r.start_time)
+    # Read in weekly activity rollup and filter it to the weeks starting within the selected date range
+    df = read_rollup_from_blob(vars=vars, container_name="strava", resolution="weekly")
+    df = df.rename(columns={"period": "week"})
+    if not df.empty:
+        df = df[(df["week"] >= pd.Timestamp(date_range[0])) & (df["week"] <= pd.Timestamp(date_range[1]))]
+    if df.empty:
+        st.info("No activity data has been published for the selected date range")
+        return
 
     # Define sport columns and iterate through each column
     columns = st.columns(3)
@@ -53,9 +52,9 @@ def render_running_pb_section(data: StravaData, vars: Variables) -> None:
                 # Filter data to include column sport
                 sport_df = df[df["type"].str.contains(sport_map[sport], na=False)]
 
-                # Aggregate data by week
+                # Combine weekly totals of every activity type of the sport
                 weekly_summary = (sport_df.groupby("week").agg(
-                    total_distance=("distance", "sum"), activity_count=("distance", "count")))
+                    total_distance=("distance", "sum"), activity_count=("count", "sum")))
 
                 # Ensure all weeks are present
                 all_weeks = pd.date_range(start=df["week"].min(), end=df["week"].max(), freq="W-MON")
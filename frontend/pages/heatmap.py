@@ -47,4 +47,4 @@ if st.user.is_logged_in:
                                   blob_name='activity_data.csv')
 
     # Render heatmap ui section
-    render_heatmap(data=activity_data_df)
+    render_heatmap(data=activity_data_df, vars=vars)
@@ -6,7 +6,7 @@ from streamlit_components.ui_components import (
     configure_page_config
 )
 from functions.data_functions import (
-    StravaData,
+    read_rollup_from_blob,
     Variables
 )
 from functions.ui_components import (
@@ -33,10 +33,8 @@ if st.user.is_logged_in:
     # Render page logo
     render_page_logo()
 
-    # Read in activity data from blob storage
-    activity_data_df = StravaData(blob_connection_string=vars.blob_connection_string,
-                                  container_name='strava',
-                                  blob_name='activity_data.csv')
+    # Read in yearly activity rollup from blob storage
+    yearly_rollup_df = read_rollup_from_blob(vars=vars, container_name='strava', resolution='yearly')
 
     # Render home page
-    render_home_page(data=activity_data_df, vars=vars)
+    render_home_page(yearly_rollup=yearly_rollup_df, vars=vars)
@@ -6,7 +6,6 @@ from streamlit_components.ui_components import (
     configure_page_config,
 )
 from functions.data_functions import (
-    StravaData,
     Variables
 )
 from functions.ui_components import (
@@ -33,9 +32,5 @@ if st.user.is_logged_in:
     # Render page logo
     render_page_logo()
 
-    activity_data_df = StravaData(blob_connection_string=vars.blob_connection_string,
-                                  container_name='strava',
-                                  blob_name='activity_data.csv')
-
-    # Render progress page
-    render_progress_page(data=activity_data_df)
+    # Render progress page from the activity rollups
+    render_progress_page(vars=vars)
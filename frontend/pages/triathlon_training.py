@@ -1,7 +1,7 @@
 # Import dependencies
 from pages.frontend_sections.triathlon import render_running_pb_section
 from streamlit_components.ui_components import configure_page_config
-from functions.data_functions import StravaData, Variables
+from functions.data_functions import Variables
 
 from functions.ui_components import render_page_logo
 import streamlit as st
@@ -23,10 +23,5 @@ if st.user.is_logged_in:
     # Render page logo
     render_page_logo()
 
-    # Read in activity data
-    activity_data_df = StravaData(blob_connection_string=vars.blob_connection_string,
-                                  container_name='strava',
-                                  blob_name='activity_data.csv')
-
-    # Render triathlon training dashboard
-    render_running_pb_section(data=activity_data_df, vars=vars)
+    # Render triathlon training dashboard from the weekly activity rollup
+    render_running_pb_section(vars=vars)
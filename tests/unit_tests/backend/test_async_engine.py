@@ -0,0 +1,61 @@
+# Import dependencies
+from backend.functions.async_engine import AsyncIngestionEngine
+import threading
+import unittest
+import time
+
+class TestAsyncIngestionEngine(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Configure engine for each test
+        """
+        self.engine = AsyncIngestionEngine(max_concurrency=4)
+
+    def test_map_keeps_item_order(self):
+        """
+        Test mapped results are returned in item order regardless of completion order
+        """
+        # Execute function
+        results = self.engine.map(lambda item: time.sleep(0.01 * (5 - item)) or item * 2, range(5))
+
+        # Assert result
+        self.assertEqual(results, [0, 2, 4, 6, 8])
+
+    def test_map_bounded_by_max_concurrency(self):
+        """
+        Test no more than max_concurrency units of work run at once
+        """
+        lock = threading.Lock()
+        state = {"running": 0, "peak": 0}
+
+        def work(item):
+            with lock:
+                state["running"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+            time.sleep(0.01)
+            with lock:
+                state["running"] -= 1
+
+        # Execute function
+        self.engine.map(work, range(20))
+
+        # Assert result
+        self.assertLessEqual(state["peak"], 4)
+
+    def test_map_raises_after_all_items_finish(self):
+        """
+        Test an error is raised only once every other item has finished
+        """
+        finished = []
+
+        def work(item):
+            if item == 0:
+                raise ValueError("failed")
+            time.sleep(0.02)
+            finished.append(item)
+
+        # Execute function and assert result
+        with self.assertRaises(ValueError):
+            self.engine.map(work, range(4))
+        self.assertEqual(sorted(finished), [1, 2, 3])
@@ -0,0 +1,80 @@
+# Import dependencies
+from backend.functions.athletes import load_athlete_registry, athlete_container
+from backend.functions.data_functions import Variables
+from unittest.mock import patch
+from backend.functions import storage
+import tempfile
+import unittest
+import json
+import os
+
+# Define example athlete registry
+REGISTRY = {
+    "rhys": {"client_id": "1", "client_secret": "secret-1", "refresh_token": "token-1"},
+    "club-member_2": {"client_id": "2", "client_secret": "secret-2", "refresh_token": "token-2"}
+}
+
+class TestAthleteRegistry(unittest.TestCase):
+
+    def test_registry_loaded_from_json_or_file(self):
+        """
+        Test the registry is read from a JSON document or the path of a JSON file
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "athletes.json")
+            with open(path, "w") as file:
+                json.dump(REGISTRY, file)
+
+            # Execute function
+            from_file = load_athlete_registry(path)
+            from_json = load_athlete_registry(json.dumps(REGISTRY))
+
+        # Assert result
+        self.assertEqual(from_file, REGISTRY)
+        self.assertEqual(from_json, REGISTRY)
+
+    def test_invalid_registries_rejected(self):
+        """
+        Test empty registries, unsafe athlete names and missing credentials are rejected
+        """
+        invalid_registries = [{}, {"../rhys": REGISTRY["rhys"]}, {"rhys": {"client_id": "1", "client_secret": "s"}}]
+
+        # Assert result
+        for registry in invalid_registries:
+            with self.subTest(registry=registry):
+                with self.assertRaises(ValueError):
+                    load_athlete_registry(json.dumps(registry))
+
+    @patch.dict(os.environ, {"client_id": "configured", "athlete_registry": json.dumps(REGISTRY)})
+    def test_variables_for_athlete(self):
+        """
+        Test athlete variables hold the athlete's credentials and blob prefix, leaving the configured variables as is
+        """
+        vars = Variables()
+
+        # Execute function
+        athlete_vars = vars.for_athlete("rhys")
+
+        # Assert result
+        self.assertEqual((athlete_vars.client_id, athlete_vars.refresh_token), ("1", "token-1"))
+        self.assertEqual(athlete_vars.container, "strava/athletes/rhys")
+        self.assertEqual((vars.client_id, vars.container), ("configured", "strava"))
+        with self.assertRaises(ValueError):
+            vars.for_athlete("unknown")
+
+    @patch.dict(storage._container_clients, clear=True)
+    @patch.dict(storage._service_clients, clear=True)
+    def test_athlete_blobs_stored_under_prefix(self):
+        """
+        Test blobs of an athlete's container path are stored under their prefix within the container
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            connection_string = f"file://{directory}"
+
+            # Execute function
+            storage.upload_blob(connection_string, athlete_container("strava", "rhys"), "activity_data.csv", b"id\n1\n")
+
+            # Assert result
+            self.assertEqual(storage.download_blob(connection_string, "strava", "athletes/rhys/activity_data.csv"),
+                             b"id\n1\n")
+            self.assertIsNone(storage.download_blob(connection_string, "strava", "activity_data.csv"))
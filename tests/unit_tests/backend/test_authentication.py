@@ -1,7 +1,12 @@
 # Import dependencies
-from backend.functions.authentication import exchange_code_for_token
+from backend.functions.authentication import exchange_code_for_token, TokenCache
 from unittest.mock import patch, MagicMock
+from backend.functions import storage
+import threading
+import requests
+import tempfile
 import unittest
+import time
 
 class TestExchangeCodeForToken(unittest.TestCase):
 
@@ -61,3 +66,124 @@ class TestExchangeCodeForToken(unittest.TestCase):
         # Assert result
         with self.assertRaises(Exception):
             exchange_code_for_token("client_id", "client_secret", "code")
+
+@patch.dict(storage._container_clients, clear=True)
+@patch.dict(storage._service_clients, clear=True)
+class TestTokenCache(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Configure filesystem blob storage for each test
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        self.connection_string = f"file://{self.directory.name}"
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_cached_token_reused_until_expiry(self):
+        """
+        Test a cached token is reused across caches until it is about to expire
+        """
+        refresh = MagicMock(return_value={"access_token": "abc123", "expires_at": time.time() + 21600,
+                                          "refresh_token": "rotated"})
+
+        # Execute function
+        first = TokenCache(self.connection_string, "strava").get(refresh_token="configured", refresh=refresh)
+        second = TokenCache(self.connection_string, "strava").get(refresh_token="configured", refresh=refresh)
+
+        # Assert result
+        refresh.assert_called_once_with("configured")
+        self.assertEqual(first, second)
+        self.assertEqual(second["access_token"], "abc123")
+
+    def test_expiring_token_refreshed_with_rotated_refresh_token(self):
+        """
+        Test a token within the expiry margin is refreshed using the rotated refresh token
+        """
+        refresh = MagicMock(side_effect=[
+            {"access_token": "abc123", "expires_at": time.time() + 300, "refresh_token": "rotated"},
+            {"access_token": "def456", "expires_at": time.time() + 21600}
+        ])
+        cache = TokenCache(self.connection_string, "strava", expiry_margin=600)
+
+        # Execute function
+        cache.get(refresh_token="configured", refresh=refresh)
+        tokens = cache.get(refresh_token="configured", refresh=refresh)
+
+        # Assert result
+        self.assertEqual(refresh.call_args_list[1].args, ("rotated",))
+        self.assertEqual(tokens["access_token"], "def456")
+        self.assertEqual(tokens["refresh_token"], "rotated")
+
+    def test_concurrent_refreshes_serialized(self):
+        """
+        Test workers with their own caches refresh only once between them
+        """
+        barrier = threading.Barrier(4, timeout=5)
+
+        def refresh(refresh_token):
+            time.sleep(0.05)
+            return {"access_token": "abc123", "expires_at": time.time() + 21600}
+
+        refresh = MagicMock(side_effect=refresh)
+        results = []
+
+        def worker():
+            cache = TokenCache(self.connection_string, "strava")
+            barrier.wait()
+            results.append(cache.get(refresh_token="configured", refresh=refresh)["access_token"])
+
+        # Execute function
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Assert result
+        self.assertEqual(refresh.call_count, 1)
+        self.assertEqual(results, ["abc123"] * 4)
+
+    def test_rejected_or_outdated_refresh_token_replaced_by_configured(self):
+        """
+        Test the configured refresh token is used once the cached one is rejected, or the configured one changes
+        """
+        def refresh(refresh_token):
+            if refresh_token == "revoked":
+                raise requests.HTTPError("400 Client Error: Bad Request")
+            return {"access_token": f"token-{refresh_token}", "expires_at": time.time() + 300,
+                    "refresh_token": "revoked"}
+
+        refresh = MagicMock(side_effect=refresh)
+        cache = TokenCache(self.connection_string, "strava", expiry_margin=600)
+
+        # Execute function
+        cache.get(refresh_token="configured", refresh=refresh)
+        rejected = cache.get(refresh_token="configured", refresh=refresh)
+        reauthorized = cache.get(refresh_token="reauthorized", refresh=refresh)
+
+        # Assert result
+        self.assertEqual([call.args[0] for call in refresh.call_args_list],
+                         ["configured", "revoked", "configured", "reauthorized"])
+        self.assertEqual(rejected["access_token"], "token-configured")
+        self.assertEqual(reauthorized["access_token"], "token-reauthorized")
+
+    def test_rejected_access_token_not_reused(self):
+        """
+        Test a cached access token is refreshed once rejected, or once the configured refresh token changes
+        """
+        refresh = MagicMock(side_effect=lambda refresh_token: {"access_token": f"token-{refresh.call_count}",
+                                                               "expires_at": time.time() + 21600})
+        cache = TokenCache(self.connection_string, "strava")
+
+        # Execute function
+        first = cache.get(refresh_token="configured", refresh=refresh)
+        reused = cache.get(refresh_token="configured", refresh=refresh)
+        renewed = cache.get(refresh_token="configured", refresh=refresh, rejected_access_token="token-1")
+        reauthorized = cache.get(refresh_token="reauthorized", refresh=refresh)
+
+        # Assert result
+        self.assertEqual([first["access_token"], reused["access_token"], renewed["access_token"],
+                          reauthorized["access_token"]], ["token-1", "token-1", "token-2", "token-3"])
+        self.assertEqual(refresh.call_args.args, ("reauthorized",))
@@ -0,0 +1,55 @@
+# Import dependencies
+from backend.functions.best_efforts import best_effort_progression, format_effort_time, pb_effort_columns
+import unittest
+
+class TestBestEfforts(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Configure activity data, newest first, along with the best efforts detected in each activity
+        """
+        self.activity_data = [
+            {"id": 4, "name": "Tempo", "start_date": "2024-01-04T08:00:00Z", "pb_distance": None},
+            {"id": 3, "name": "Parkrun [5km]", "start_date": "2024-01-03T08:00:00Z", "pb_distance": "5km"},
+            {"id": 2, "name": "Easy", "start_date": "2024-01-02T08:00:00Z", "pb_distance": None},
+            {"id": 1, "name": "Long", "start_date": "2024-01-01T08:00:00Z", "pb_distance": None}
+        ]
+        self.best_efforts = {
+            "1": {"1km": 250.0, "5km": 1400.0, "10km": 2900.0, "HM": None},
+            "2": {"1km": 260.0, "5km": None, "10km": None, "HM": None},
+            "3": {"1km": 230.0, "5km": 1250.0, "10km": None, "HM": None},
+            "4": {"1km": 225.4, "5km": 1300.0, "10km": None, "HM": None}
+        }
+
+    def test_progression_of_personal_bests(self):
+        """
+        Test only efforts faster than every earlier effort are kept, with efforts of activities tagged
+        for the distance counting towards the progression without being exported
+        """
+        # Execute function
+        df = best_effort_progression(activity_data=self.activity_data, best_efforts=self.best_efforts)
+
+        # Assert result
+        self.assertEqual(df.columns.tolist(), pb_effort_columns)
+        self.assertEqual(df[["id", "pb_distance", "time"]].values.tolist(),
+                         [[1, "1km", "0:04:10"], [3, "1km", "0:03:50"], [4, "1km", "0:03:45"],
+                          [1, "5km", "0:23:20"], [1, "10km", "0:48:20"]])
+        self.assertEqual(set(df["source"]), {"stream"})
+
+    def test_activities_without_best_efforts(self):
+        """
+        Test activities whose streams have not been searched are left out
+        """
+        # Execute function
+        df = best_effort_progression(activity_data=self.activity_data, best_efforts={})
+
+        # Assert result
+        self.assertEqual(len(df), 0)
+        self.assertEqual(df.columns.tolist(), pb_effort_columns)
+
+    def test_format_effort_time(self):
+        """
+        Test elapsed times are formatted as hours, minutes and seconds
+        """
+        self.assertEqual(format_effort_time(1199.6), "0:20:00")
+        self.assertEqual(format_effort_time(5712.2), "1:35:12")
@@ -0,0 +1,573 @@
+# Import dependencies
+from backend.functions.data_functions import (
+    stream_parameters_hash,
+    format_activity_data,
+    iter_json_chunks,
+    merge_activity_data,
+    requires_full_sync,
+    build_sync_state,
+    ApiService
+)
+from backend.functions.stream_functions import stream_table, read_stream_table, write_stream_table
+from backend.functions.best_efforts import best_effort_distances
+from backend.functions.scheduler import CircuitOpenError
+from datetime import datetime, timedelta, timezone
+from backend.functions.tags import add_activity_tags
+from unittest.mock import patch, MagicMock
+from backend.functions import storage
+import pandas as pd
+import tempfile
+import unittest
+import requests
+import json
+import io
+
+def activity(id: int, start_date: str, name: str = "Morning Run") -> dict:
+    """
+    Helper to generate a raw Strava activity record
+    """
+    return {
+        "id": id,
+        "name": name,
+        "distance": 5000.0,
+        "moving_time": 1500,
+        "total_elevation_gain": 10.0,
+        "type": "Run",
+        "start_date": start_date,
+        "kudos_count": 1,
+        "comment_count": 0,
+        "athlete_count": 1,
+        "map": {"summary_polyline": "abc"}
+    }
+
+class TestActivitySync(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Configure api service and variables for each test
+        """
+        self.app = ApiService(client_id="id", client_secret="secret", refresh_token="token", logger=MagicMock())
+        self.app.access_token = "access"
+        self.vars = MagicMock(full_sync_interval_days=7)
+
+    def test_merge_activity_data_prefers_new_records(self):
+        """
+        Test merged activity data is de-duplicated by id and ordered newest first
+        """
+        existing_df = pd.DataFrame([
+            {**activity(2, "2024-01-02T08:00:00Z", name="Old Name"), "map": "abc"},
+            {**activity(1, "2024-01-01T08:00:00Z"), "map": "abc"}
+        ])
+        new_df = pd.DataFrame([
+            {**activity(3, "2024-01-03T08:00:00Z"), "map": "abc"},
+            {**activity(2, "2024-01-02T08:00:00Z", name="New Name"), "map": "abc"}
+        ])
+
+        # Execute function
+        df = merge_activity_data(existing_df=existing_df, new_df=new_df)
+
+        # Assert result
+        self.assertEqual(df["id"].tolist(), [3, 2, 1])
+        self.assertEqual(df.loc[df["id"] == 2, "name"].item(), "New Name")
+
+    def test_merge_activity_data_keeps_existing_tags(self):
+        """
+        Test previously exported activities keep their tag index, leaving only new activities to be tagged
+        """
+        existing_df = format_activity_data([
+            {**activity(2, "2024-01-02T08:00:00Z", name="Coast [WCP - 12.5]"), "map": "abc"},
+            {**activity(1, "2024-01-01T08:00:00Z", name="Parkrun [5km]"), "map": "abc"}
+        ])
+        new_df = pd.DataFrame([{**activity(3, "2024-01-03T08:00:00Z", name="Race [10km]"), "map": "abc"}])
+
+        # Execute function
+        df = merge_activity_data(existing_df=existing_df, new_df=new_df)
+
+        # Assert result
+        self.assertEqual(df["is_wcp"].tolist()[1:], [True, False])
+        self.assertEqual(df[["id", "pb_distance"]].dropna().values.tolist(), [[1, "5km"]])
+        self.assertTrue(pd.isna(df.loc[0, "is_wcp"]))
+        self.assertEqual(add_activity_tags(df)[["id", "pb_distance"]].dropna().values.tolist(),
+                         [[3, "10km"], [1, "5km"]])
+
+    def test_requires_full_sync(self):
+        """
+        Test full sync is required without state or when the last full sync is stale, allowing for runs starting early
+        """
+        recent = datetime.now(timezone.utc).isoformat()
+        stale = (datetime.now(timezone.utc) - timedelta(days=8)).isoformat()
+        early = (datetime.now(timezone.utc) - timedelta(days=28, minutes=-30)).isoformat()
+        previous_week = (datetime.now(timezone.utc) - timedelta(days=21, minutes=30)).isoformat()
+        state = {"latest_start_date": "2024-01-01T08:00:00Z", "latest_activity_id": 1}
+
+        # Assert result
+        self.assertTrue(requires_full_sync(None, 7))
+        self.assertTrue(requires_full_sync({**state, "last_full_sync": stale}, 7))
+        self.assertFalse(requires_full_sync({**state, "last_full_sync": recent}, 7))
+        self.assertTrue(requires_full_sync({**state, "last_full_sync": early}, 28))
+        self.assertFalse(requires_full_sync({**state, "last_full_sync": previous_week}, 28))
+
+    def test_sync_activity_data_incremental(self):
+        """
+        Test incremental sync only requests activities after the high-water mark
+        """
+        existing_df = pd.DataFrame([{**activity(1, "2024-01-01T08:00:00Z"), "map": "abc"}])
+        state = build_sync_state(df=existing_df, last_full_sync=datetime.now(timezone.utc).isoformat())
+
+        # Mock blob reads and activity collection
+        self.app.collect_sync_state = MagicMock(return_value=state)
+        self.app.read_blob_data = MagicMock(return_value=existing_df.to_csv(index=False).encode())
+        self.app.collect_all_activity_data = MagicMock(return_value=[activity(2, "2024-01-05T08:00:00Z")])
+
+        # Execute function
+        data = self.app.sync_activity_data(vars=self.vars, container="strava",
+                                           output_filename="activity_data.csv",
+                                           state_filename="sync_state.json")
+
+        # Assert result
+        self.app.collect_all_activity_data.assert_called_once_with(
+            access_token=None,
+            after=int(pd.Timestamp("2024-01-01T08:00:00Z").timestamp()) - 1)
+        self.assertEqual([record["id"] for record in data], [2, 1])
+        self.assertEqual(self.app.sync_state["latest_activity_id"], 2)
+        self.assertEqual(self.app.sync_state["last_full_sync"], state["last_full_sync"])
+
+    def test_sync_activity_data_full_without_state(self):
+        """
+        Test a full sync is performed when no sync state has been exported
+        """
+        # Mock blob reads and activity collection
+        self.app.collect_sync_state = MagicMock(return_value=None)
+        self.app.read_blob_data = MagicMock(return_value=None)
+        self.app.collect_all_activity_data = MagicMock(return_value=[activity(1, "2024-01-01T08:00:00Z")])
+
+        # Execute function
+        data = self.app.sync_activity_data(vars=self.vars, container="strava",
+                                           output_filename="activity_data.csv",
+                                           state_filename="sync_state.json")
+
+        # Assert result
+        self.app.collect_all_activity_data.assert_called_once_with(access_token=None, window=1)
+        self.assertEqual(data[0]["map"], "abc")
+        self.assertEqual(self.app.sync_state["latest_start_date"], "2024-01-01T08:00:00Z")
+
+    def test_get_activity_data_after_parameter(self):
+        """
+        Test the after parameter is forwarded to the activity listing endpoint
+        """
+        self.app.scheduler = MagicMock()
+        self.app.scheduler.request.return_value.json.return_value = []
+
+        # Execute function
+        self.app.get_activity_data(page=2, after=1700000000)
+
+        # Assert result
+        self.assertEqual(self.app.scheduler.request.call_args.kwargs["params"],
+                         {"per_page": 200, "page": 2, "after": 1700000000})
+
+    def test_rejected_access_token_renewed(self):
+        """
+        Test requests rejected with an expired access token are retried with a token renewed only once
+        """
+        unauthorized = requests.HTTPError("401 Client Error", response=MagicMock(status_code=401))
+        self.app.scheduler = MagicMock()
+        self.app.scheduler.request.side_effect = [unauthorized, MagicMock(**{"json.return_value": []})] * 2
+        self.app.refresh_access_token = MagicMock(return_value={"access_token": "renewed", "expires_at": 0})
+
+        # Execute function
+        self.app.get_activity_data(page=1)
+        self.app.get_activity_data(page=2, access_token="access")
+
+        # Assert result
+        headers = [call.kwargs["headers"]["Authorization"] for call in self.app.scheduler.request.call_args_list]
+        self.assertEqual(headers, ["Bearer access", "Bearer renewed"] * 2)
+        self.app.refresh_access_token.assert_called_once_with("token")
+        self.assertEqual(self.app.access_token, "renewed")
+
+    def test_collect_all_activity_data_windowed(self):
+        """
+        Test windowed page collection keeps page order and stops at the first empty page
+        """
+        pages = {1: [{"id": 1}, {"id": 2}], 2: [{"id": 3}], 3: [{"id": 4}], 4: [], 5: [{"id": 99}]}
+        self.app.get_activity_data = MagicMock(side_effect=lambda page, **kwargs: pages.get(page, []))
+
+        # Execute function
+        data = self.app.collect_all_activity_data(per_page=2, window=3)
+
+        # Assert result
+        self.assertEqual([record["id"] for record in data], [1, 2, 3, 4])
+        self.assertEqual(sorted(call.kwargs["page"] for call in self.app.get_activity_data.call_args_list),
+                         [1, 2, 3, 4, 5, 6])
+
+class TestActivityStreams(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Configure api service with mocked blob access for each test
+        """
+        self.app = ApiService(client_id="id", client_secret="secret", refresh_token="token", logger=MagicMock())
+        self.app.access_token = "access"
+        self.app.export_data_as_json = MagicMock()
+        self.app.export_stream_table = MagicMock()
+        self.app.collect_activity_stream = MagicMock(
+            return_value=stream_table({"time": list(range(601)), "distance": [i * 2.5 for i in range(601)]}))
+        self.activity_data = format_activity_data([activity(3, "2024-01-03T08:00:00Z", name="Easy Run"),
+                                                   activity(2, "2024-01-02T08:00:00Z", name="Long Run [HM]"),
+                                                   activity(1, "2024-01-01T08:00:00Z", name="Parkrun [5km]")]
+                                                  ).to_dict(orient="records")
+
+    def manifest(self, activities: dict, best_efforts: dict) -> bytes:
+        """
+        Helper to generate a stream manifest blob
+        """
+        return json.dumps({"activities": activities, "best_efforts": best_efforts,
+                           "best_effort_distances": best_effort_distances}).encode()
+
+    def test_streams_skipped_when_manifest_up_to_date(self):
+        """
+        Test no stream endpoints are hit when every stream has been exported and searched for best efforts
+        """
+        best_efforts = {id: {"1km": 240.0} for id in ["1", "2", "3"]}
+        self.app.read_blob_data = MagicMock(return_value=self.manifest(
+            {id: stream_parameters_hash() for id in ["1", "2", "3"]}, best_efforts))
+
+        # Execute function
+        result = self.app.collect_activity_stream_data(activity_data=self.activity_data, vars=MagicMock())
+
+        # Assert result
+        self.assertEqual(result, best_efforts)
+        self.app.collect_activity_stream.assert_not_called()
+        self.app.export_data_as_json.assert_not_called()
+
+    def test_streams_collected_for_new_and_invalidated_activities(self):
+        """
+        Test streams are collected for new activities and those exported with stale parameters, tagged activities
+        first and untagged runs up to the backfill limit, and their best efforts are recorded
+        """
+        self.app.read_blob_data = MagicMock(return_value=self.manifest({"1": "stale"}, {}))
+
+        # Execute function
+        self.app.collect_activity_stream_data(activity_data=self.activity_data, vars=MagicMock(), backfill_limit=0)
+        tagged_ids = sorted(call.kwargs["activity_id"] for call in self.app.collect_activity_stream.call_args_list)
+        exported_manifest = self.app.export_data_as_json.call_args.kwargs["data"]
+        self.app.read_blob_data.return_value = json.dumps(exported_manifest).encode()
+        result = self.app.collect_activity_stream_data(activity_data=self.activity_data, vars=MagicMock())
+
+        # Assert result
+        self.assertEqual(tagged_ids, [1, 2])
+        self.assertEqual(self.app.collect_activity_stream.call_args.kwargs["activity_id"], 3)
+        self.assertEqual(sorted(call.kwargs["output_filename"] for call in self.app.export_stream_table.call_args_list),
+                         ["stream/1.arrow", "stream/2.arrow", "stream/3.arrow"])
+        exported_manifest = self.app.export_data_as_json.call_args_list[-1].kwargs["data"]
+        self.assertEqual(exported_manifest["activities"],
+                         {"1": stream_parameters_hash(), "2": stream_parameters_hash(), "3": stream_parameters_hash()})
+        self.assertEqual(result["3"], {"1km": 400.0, "5km": None, "10km": None, "HM": None})
+
+    def test_best_efforts_detected_from_stored_streams(self):
+        """
+        Test best efforts missing from the manifest are detected from stored streams without hitting the api
+        """
+        stream = io.BytesIO()
+        write_stream_table(stream_table({"time": [0, 100, 200, 300], "distance": [0.0, 400.0, 900.0, 1300.0]}), stream)
+        manifest = self.manifest({id: stream_parameters_hash() for id in ["1", "2", "3"]},
+                                 {"1": {"1km": 240.0}, "2": {"1km": 250.0}})
+        self.app.read_blob_data = MagicMock(side_effect=lambda blob_name, **kwargs:
+                                            stream.getvalue() if blob_name == "stream/3.arrow" else manifest)
+
+        # Execute function
+        result = self.app.collect_activity_stream_data(activity_data=self.activity_data, vars=MagicMock())
+
+        # Assert result
+        self.app.collect_activity_stream.assert_not_called()
+        self.assertEqual(result["3"]["1km"], 225.0)
+        self.assertEqual(result["1"], {"1km": 240.0})
+
+    def test_stream_failures_reported_per_activity(self):
+        """
+        Test a failed activity is recorded and skipped, whilst an open circuit stops the stage
+        """
+        self.app.read_blob_data = MagicMock(return_value=None)
+        table = self.app.collect_activity_stream.return_value
+
+        def collect_activity_stream(activity_id, **kwargs):
+            if activity_id == 1:
+                raise requests.HTTPError("503 Server Error")
+            return table
+
+        self.app.collect_activity_stream.side_effect = collect_activity_stream
+
+        # Execute function
+        self.app.collect_activity_stream_data(activity_data=self.activity_data, vars=MagicMock())
+
+        # Assert result
+        self.assertEqual(list(self.app.failures["streams"]), ["1"])
+        exported_manifest = self.app.export_data_as_json.call_args.kwargs["data"]
+        self.assertEqual(exported_manifest["activities"],
+                         {"2": stream_parameters_hash(), "3": stream_parameters_hash()})
+        self.app.collect_activity_stream.side_effect = CircuitOpenError("open")
+        with self.assertRaises(CircuitOpenError):
+            self.app.collect_activity_stream_data(activity_data=self.activity_data, vars=MagicMock())
+
+    def test_unavailable_streams_skipped_in_future_runs(self):
+        """
+        Test activities without a stream, or with an invalid stream response, are recorded as unavailable and
+        not collected again, with invalid responses reported as failures
+        """
+        self.app.read_blob_data = MagicMock(return_value=None)
+        del self.app.collect_activity_stream
+        payloads = {2: [{"message": "error"}], 3: {}}
+
+        def request(method, url, **kwargs):
+            activity_id = int(url.split("/")[-2])
+            if activity_id == 1:
+                raise requests.HTTPError("404 Client Error", response=MagicMock(status_code=404))
+            return MagicMock(**{"json.return_value": payloads[activity_id]})
+
+        self.app.scheduler = MagicMock()
+        self.app.scheduler.request.side_effect = request
+
+        # Execute function
+        self.app.collect_activity_stream_data(activity_data=self.activity_data, vars=MagicMock())
+        exported_manifest = self.app.export_data_as_json.call_args.kwargs["data"]
+        self.app.read_blob_data.return_value = json.dumps(exported_manifest).encode()
+        request_count = self.app.scheduler.request.call_count
+        self.app.collect_activity_stream_data(activity_data=self.activity_data, vars=MagicMock())
+
+        # Assert result
+        self.assertEqual(exported_manifest["unavailable"], {id: stream_parameters_hash() for id in ["1", "2", "3"]})
+        self.assertEqual(exported_manifest["activities"], {})
+        self.assertEqual(list(self.app.failures["streams"]), ["2"])
+        self.assertEqual(self.app.scheduler.request.call_count, request_count)
+        self.app.export_stream_table.assert_not_called()
+
+class TestPbEfforts(unittest.TestCase):
+
+    def test_pb_efforts_resume_from_run_journal(self):
+        """
+        Test pb effort activities completed by a failed attempt at the run are not requested again
+        """
+        journal = MagicMock(**{"completed_units.return_value": {"1": {"id": 1, "time": "20:00"}}})
+        app = ApiService(client_id="id", client_secret="secret", refresh_token="token", logger=MagicMock(),
+                         journal=journal)
+        app.access_token = "access"
+        app.scheduler = MagicMock()
+        app.scheduler.request.return_value.json.return_value = {"id": 2, "description": "Result [Chip - 45:00]"}
+        activity_data = format_activity_data([activity(1, "2024-01-01T08:00:00Z", name="Parkrun [5km]"),
+                                              activity(2, "2024-01-02T08:00:00Z", name="Race [10km]")]
+                                             ).to_dict(orient="records")
+
+        # Execute function
+        df = app.collect_pb_effort_activities(activity_data=activity_data)
+
+        # Assert result
+        app.scheduler.request.assert_called_once()
+        self.assertEqual(df["time"].tolist(), ["20:00", "45:00"])
+        journal.complete_unit.assert_called_once_with("pb_efforts", 2,
+                                                      {"id": 2, "time": "45:00", "pb_distance": "10km",
+                                                       "source": "official"})
+
+    def test_failed_pb_efforts_keep_published_results(self):
+        """
+        Test activities that fail to be collected, including those without a description, keep their published
+        official result rather than being dropped from the pb effort data
+        """
+        app = ApiService(client_id="id", client_secret="secret", refresh_token="token", logger=MagicMock())
+        app.access_token = "access"
+        app.scheduler = MagicMock()
+        app.scheduler.request.side_effect = lambda method, url, **kwargs: MagicMock(**{"json.return_value": {
+            "id": int(url.split("/")[-1]), "description": None if url.endswith("/1") else "Result [Chip - 45:00]"}})
+        published = "id,name,start_date,time,pb_distance,source\n1,Parkrun,2024-01-01,20:00,5km,official\n" + \
+            "1,Parkrun,2024-01-01,0:04:00,1km,stream\n"
+        app.read_blob_data = MagicMock(return_value=published.encode())
+        activity_data = format_activity_data([activity(1, "2024-01-01T08:00:00Z", name="Parkrun [5km]"),
+                                              activity(2, "2024-01-02T08:00:00Z", name="Race [10km]")]
+                                             ).to_dict(orient="records")
+
+        # Execute function
+        df = app.collect_pb_effort_activities(activity_data=activity_data, vars=MagicMock())
+
+        # Assert result
+        self.assertEqual(list(app.failures["pb_efforts"]), ["1"])
+        self.assertEqual(df[["id", "time", "source"]].values.tolist(), [[2, "45:00", "official"],
+                                                                        [1, "20:00", "official"]])
+
+class TestWcpSegments(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Configure api service with mocked segment requests for each test
+        """
+        self.app = ApiService(client_id="id", client_secret="secret", refresh_token="token", logger=MagicMock())
+        self.app.access_token = "access"
+        self.app.export_data_as_json = MagicMock()
+        self.app.collect_wcp_polyline = MagicMock(side_effect=lambda id, **kwargs: f"polyline-{id}")
+        self.segments = [{"id": i, "name": f"WCP Segment {i}" if i % 2 else f"Hill {i}"} for i in range(1, 6)]
+        self.app.get_starred_segments = MagicMock(
+            side_effect=lambda per_page, page, **kwargs: self.segments[(page - 1) * per_page:page * per_page])
+
+    def test_wcp_segments_paginated(self):
+        """
+        Test every page of starred segments is read and polylines are cached
+        """
+        self.app.read_blob_data = MagicMock(return_value=None)
+
+        # Execute function
+        df = self.app.collect_wcp_segments(vars=MagicMock(), per_page=2)
+
+        # Assert result
+        self.assertEqual(self.app.get_starred_segments.call_count, 3)
+        self.assertEqual(df["id"].tolist(), [1, 3, 5])
+        self.assertEqual(df["polyline"].tolist(), ["polyline-1", "polyline-3", "polyline-5"])
+        self.assertEqual(self.app.export_data_as_json.call_args.kwargs["data"],
+                         {"1": "polyline-1", "3": "polyline-3", "5": "polyline-5"})
+
+    def test_wcp_segments_cached(self):
+        """
+        Test a run without newly starred segments costs a single listing request
+        """
+        cache = {"1": "cached-1", "3": "cached-3", "5": "cached-5"}
+        self.app.read_blob_data = MagicMock(return_value=json.dumps(cache).encode())
+
+        # Execute function
+        df = self.app.collect_wcp_segments(vars=MagicMock())
+
+        # Assert result
+        self.app.get_starred_segments.assert_called_once()
+        self.app.collect_wcp_polyline.assert_not_called()
+        self.app.export_data_as_json.assert_not_called()
+        self.assertEqual(df["polyline"].tolist(), ["cached-1", "cached-3", "cached-5"])
+
+    def test_failed_polylines_keep_published_rows(self):
+        """
+        Test a segment whose polyline fails to be collected keeps its previously published row
+        """
+        published = "id,name,polyline\n3,WCP Segment 3,published-3\n"
+        self.app.read_blob_data = MagicMock(side_effect=lambda blob_name, **kwargs:
+                                            published.encode() if blob_name == "wcp_segments.csv" else None)
+
+        def collect_wcp_polyline(id, **kwargs):
+            if id == 3:
+                raise requests.HTTPError("503 Server Error")
+            return f"polyline-{id}"
+
+        self.app.collect_wcp_polyline.side_effect = collect_wcp_polyline
+
+        # Execute function
+        df = self.app.collect_wcp_segments(vars=MagicMock())
+
+        # Assert result
+        self.assertEqual(df.values.tolist(), [[1, "WCP Segment 1", "polyline-1"], [5, "WCP Segment 5", "polyline-5"],
+                                              [3, "WCP Segment 3", "published-3"]])
+
+@patch.dict(storage._container_clients, clear=True)
+@patch.dict(storage._service_clients, clear=True)
+class TestActivityExport(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Configure api service with filesystem blob storage for each test
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        self.vars = MagicMock(storage_account_conneciton_string=f"file://{self.directory.name}")
+        self.app = ApiService(client_id="id", client_secret="secret", refresh_token="token", logger=MagicMock())
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_export_activity_data_publishes_typed_parquet(self):
+        """
+        Test activity data is exported as CSV alongside a typed Parquet copy
+        """
+        data = [activity(1, "2024-01-01T08:00:00Z"), activity(2, "2024-01-02T08:00:00Z")]
+
+        # Execute function
+        self.app.export_activity_data(data=data, vars=self.vars, container="strava",
+                                      output_filename="activity_data.csv")
+
+        # Assert result
+        df = pd.read_parquet(io.BytesIO(self.read("activity_data.parquet")))
+        self.assertEqual(str(df["start_date"].dtype), "datetime64[ns, UTC]")
+        self.assertEqual(str(df["type"].dtype), "category")
+        self.assertEqual(df["map"].tolist(), ["abc", "abc"])
+        self.assertEqual(pd.read_csv(io.BytesIO(self.read("activity_data.csv")))["id"].tolist(), [1, 2])
+
+    def test_export_activity_data_in_chunks(self):
+        """
+        Test chunked exports match an export of the whole dataset
+        """
+        data = [activity(i, f"2024-01-{i:02d}T08:00:00Z", name=f"Day [WCP - {i}]") for i in range(1, 8)]
+
+        # Execute function
+        self.app.export_activity_data(data=data, vars=self.vars, container="strava",
+                                      output_filename="chunked.csv", chunk_size=3)
+        self.app.export_activity_data(data=data, vars=self.vars, container="strava", output_filename="whole.csv")
+
+        # Assert result
+        self.assertEqual(self.read("chunked.csv"), self.read("whole.csv"))
+        pd.testing.assert_frame_equal(pd.read_parquet(io.BytesIO(self.read("chunked.parquet"))),
+                                      pd.read_parquet(io.BytesIO(self.read("whole.parquet"))))
+
+    def test_unchanged_artifacts_not_uploaded(self):
+        """
+        Test artifacts whose content hash matches the published blob are not uploaded again
+        """
+        data = [activity(1, "2024-01-01T08:00:00Z"), activity(2, "2024-01-02T08:00:00Z")]
+        client = storage.get_blob_service_client(self.vars.storage_account_conneciton_string)
+        export = lambda data: self.app.export_activity_data(data=data, vars=self.vars,  # noqa: E731
+                                                            container="strava", output_filename="activity_data.csv")
+
+        # Execute function
+        export(data)
+        upload_count = client.upload_count
+        export(data)
+        unchanged_upload_count = client.upload_count
+        unchanged_report = dict(self.app.artifact_changes)
+        export(data + [activity(3, "2024-01-03T08:00:00Z")])
+
+        # Assert result
+        self.assertEqual(unchanged_upload_count, upload_count)
+        self.assertEqual(unchanged_report, {"strava/activity_data.csv": False, "strava/activity_data.parquet": False})
+        self.assertEqual(self.app.artifact_changes,
+                         {"strava/activity_data.csv": True, "strava/activity_data.parquet": True})
+        self.assertEqual(pd.read_csv(io.BytesIO(self.read("activity_data.csv")))["id"].tolist(), [1, 2, 3])
+
+    def test_unchanged_json_recorded(self):
+        """
+        Test JSON exports record whether they changed for the run report
+        """
+        # Execute function
+        self.app.export_data_as_json(data={"a": 1}, vars=self.vars, container="strava", output_filename="state.json")
+        changed_report = dict(self.app.artifact_changes)
+        self.app.export_data_as_json(data={"a": 1}, vars=self.vars, container="strava", output_filename="state.json")
+
+        # Assert result
+        self.assertEqual(changed_report, {"strava/state.json": True})
+        self.assertEqual(self.app.artifact_changes, {"strava/state.json": False})
+        self.assertEqual(json.loads(self.read("state.json")), {"a": 1})
+
+    def test_export_stream_table_round_trip(self):
+        """
+        Test stream tables are exported as Arrow files that read back without parsing
+        """
+        table = stream_table({"time": [0, 1, 2], "distance": [0.0, 3.1, 6.2]})
+
+        # Execute function
+        self.app.export_stream_table(table=table, vars=self.vars, container="strava", output_filename="stream/1.arrow")
+
+        # Assert result
+        self.assertTrue(read_stream_table(self.read("stream/1.arrow")).equals(table))
+
+    def test_iter_json_chunks_matches_json_dumps(self):
+        """
+        Test incrementally serialized JSON matches json.dumps
+        """
+        data = {"splits": [], "raw": [{"time": i, "hr": 150.5} for i in range(25)], "pyramid": {"50": [1, None]}}
+
+        # Assert result
+        self.assertEqual("".join(iter_json_chunks(data, chunk_size=4)), json.dumps(data))
+
+    def read(self, blob_name: str) -> bytes:
+        """
+        Helper to read an exported blob
+        """
+        return storage.download_blob(self.vars.storage_account_conneciton_string, "strava", blob_name)
@@ -0,0 +1,83 @@
+# Import dependencies
+from backend.functions.storage import download_blob, upload_blob, get_blob_metadata
+from datetime import datetime, timedelta, timezone
+from backend.functions.journal import RunJournal
+from azure.storage.blob import ContentSettings
+from unittest.mock import patch, MagicMock
+from backend.functions import storage
+import tempfile
+import unittest
+import json
+
+@patch.dict(storage._container_clients, clear=True)
+@patch.dict(storage._service_clients, clear=True)
+class TestRunJournal(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Configure filesystem blob storage for each test
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        self.connection_string = f"file://{self.directory.name}"
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def journal(self) -> RunJournal:
+        """
+        Helper to load the run journal
+        """
+        return RunJournal(connection_string=self.connection_string, container="strava", logger=MagicMock())
+
+    def test_failed_run_resumes_completed_stages_and_units(self):
+        """
+        Test a rerun skips completed stages and units recorded by a failed run
+        """
+        journal = self.journal()
+        journal.run_stage("activity_sync", lambda: {"activity_data": [1, 2]})
+        journal.complete_unit("pb_efforts", 1, {"id": 1})
+        journal.save()
+
+        # Execute function
+        resumed = self.journal()
+        stage = MagicMock()
+
+        # Assert result
+        self.assertEqual(resumed.state["run_id"], journal.state["run_id"])
+        self.assertEqual(resumed.run_stage("activity_sync", stage), {"activity_data": [1, 2]})
+        stage.assert_not_called()
+        self.assertEqual(resumed.completed_units("pb_efforts"), {"1": {"id": 1}})
+
+    def test_artifacts_only_published_once_run_succeeds(self):
+        """
+        Test staged artifacts replace published artifacts on publish, after which a new run starts
+        """
+        upload_blob(self.connection_string, "strava", "activity_data.csv", "old")
+        journal = self.journal()
+
+        # Execute function
+        with journal.open_artifact(container="strava", blob_name="activity_data.csv",
+                                   content_settings=ContentSettings(content_type="text/csv"),
+                                   metadata={"content_sha256": "abc"}) as writer:
+            writer.write("new")
+
+        # Assert result
+        self.assertEqual(download_blob(self.connection_string, "strava", "activity_data.csv"), b"old")
+        journal.publish()
+        self.assertEqual(download_blob(self.connection_string, "strava", "activity_data.csv"), b"new")
+        self.assertEqual(get_blob_metadata(self.connection_string, "strava", "activity_data.csv"),
+                         {"content_sha256": "abc"})
+        self.assertNotEqual(self.journal().state["run_id"], journal.state["run_id"])
+
+    def test_stale_run_not_resumed(self):
+        """
+        Test an unpublished run older than the maximum age is not resumed
+        """
+        journal = self.journal()
+        journal.state["started_at"] = (datetime.now(timezone.utc) - timedelta(days=2)).isoformat()
+        journal.save()
+
+        # Assert result
+        self.assertEqual(self.journal().state["stages"], {})
+        self.assertEqual(json.loads(download_blob(self.connection_string, "strava", "runs/journal.json"))["run_id"],
+                         journal.state["run_id"])
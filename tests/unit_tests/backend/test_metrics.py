@@ -0,0 +1,85 @@
+# Import dependencies
+from backend.functions.async_engine import AsyncIngestionEngine
+from backend.functions.scheduler import RateLimitScheduler
+from backend.functions.metrics import RunMetrics
+from unittest.mock import patch, MagicMock
+from backend.functions import metrics
+from backend.functions import storage
+import tempfile
+import unittest
+
+@patch.dict(storage._container_clients, clear=True)
+@patch.dict(storage._service_clients, clear=True)
+class TestRunMetrics(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Activate a run metrics collector for each test
+        """
+        self.metrics = RunMetrics().activate()
+
+    def tearDown(self):
+        self.metrics.deactivate()
+
+    def test_requests_aggregated_per_stage(self):
+        """
+        Test requests are aggregated per stage and operation, including units of work run on the engine pool
+        """
+        engine = AsyncIngestionEngine(max_concurrency=4)
+
+        def unit(item):
+            with metrics.measure("http", "GET /activities/{id}") as sample:
+                sample.update(size=100, status=200 if item else 404)
+
+        # Execute function
+        with metrics.stage("pb_efforts"):
+            engine.map(unit, range(5))
+        with metrics.measure("blob", "upload") as sample:
+            sample.update(size=10, status=201)
+        report = self.metrics.report(run_id="abc")
+
+        # Assert result
+        operation = report["stages"]["pb_efforts"]["http"]["GET /activities/{id}"]
+        self.assertEqual(operation["requests"], 5)
+        self.assertEqual(operation["bytes"], 500)
+        self.assertEqual(operation["statuses"], {"200": 4, "404": 1})
+        self.assertEqual(report["stages"]["unstaged"]["blob"]["upload"]["bytes"], 10)
+        self.assertEqual(report["run_id"], "abc")
+
+    def test_scheduler_records_retries_and_rate_limit_usage(self):
+        """
+        Test every attempt made by the scheduler is recorded along with its rate limit usage
+        """
+        headers = {"X-RateLimit-Limit": "200,2000", "X-RateLimit-Usage": "50,300"}
+        session = MagicMock()
+        session.request.side_effect = [MagicMock(status_code=429, headers=headers, content=b"{}"),
+                                       MagicMock(status_code=200, headers=headers, content=b"[1, 2]")]
+        scheduler = RateLimitScheduler(session=session, logger=MagicMock(), sleep=lambda seconds: None)
+
+        # Execute function
+        with metrics.stage("activity_sync"):
+            scheduler.request("GET", "https://www.strava.com/api/v3/activities/123/streams")
+
+        # Assert result
+        stage = self.metrics.report()["stages"]["activity_sync"]
+        operation = stage["http"]["GET /api/v3/activities/{id}/streams"]
+        self.assertEqual((operation["requests"], operation["retries"], operation["bytes"]), (2, 1, 8))
+        self.assertEqual(operation["statuses"], {"429": 1, "200": 1})
+        self.assertEqual(stage["rate_limit"], {"usage": [51, 301], "limits": [200, 2000]})
+
+    def test_blob_operations_recorded(self):
+        """
+        Test blob uploads and downloads are recorded, including downloads of missing blobs
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            connection_string = f"file://{directory}"
+
+            # Execute function
+            storage.upload_blob(connection_string, "strava", "data.csv", b"id\n1\n")
+            storage.download_blob(connection_string, "strava", "data.csv")
+            storage.download_blob(connection_string, "strava", "missing.csv")
+
+            # Assert result
+            blob = self.metrics.report()["stages"]["unstaged"]["blob"]
+            self.assertEqual(blob["upload"]["bytes"], 5)
+            self.assertEqual(blob["download"]["statuses"], {"200": 1, "404": 1})
@@ -0,0 +1,106 @@
+# Import dependencies
+from backend.functions.pipeline import Pipeline
+from unittest.mock import MagicMock
+import threading
+import unittest
+
+class TestPipeline(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Configure pipeline for each test
+        """
+        self.pipeline = Pipeline(logger=MagicMock())
+
+    def test_independent_stages_run_concurrently(self):
+        """
+        Test stages sharing an input run concurrently once the stage producing it has finished
+        """
+        barrier = threading.Barrier(2, timeout=5)
+
+        def streams(activity_data):
+            barrier.wait()
+
+        def export(activity_data):
+            barrier.wait()
+            return {"rows": len(activity_data)}
+
+        self.pipeline.add_stage("sync", lambda: {"activity_data": [1, 2]}, outputs=["activity_data"])
+        self.pipeline.add_stage("streams", streams, inputs=["activity_data"])
+        self.pipeline.add_stage("export", export, inputs=["activity_data"], outputs=["rows"])
+
+        # Execute function
+        outputs = self.pipeline.run()
+
+        # Assert result
+        self.assertEqual(outputs, {"activity_data": [1, 2], "rows": 2})
+        self.assertEqual(set(self.pipeline.timings), {"sync", "streams", "export"})
+
+    def test_selected_stage_runs_with_dependencies_only(self):
+        """
+        Test running a single stage also runs the stages producing its inputs, and nothing else
+        """
+        calls = []
+
+        @self.pipeline.stage(outputs=["activity_data"])
+        def sync():
+            calls.append("sync")
+            return {"activity_data": [1]}
+
+        @self.pipeline.stage(inputs=["activity_data"])
+        def pb_efforts(activity_data):
+            calls.append("pb_efforts")
+
+        @self.pipeline.stage()
+        def segments():
+            calls.append("segments")
+
+        # Execute function
+        self.pipeline.run(["pb_efforts"])
+
+        # Assert result
+        self.assertEqual(calls, ["sync", "pb_efforts"])
+
+    def test_stages_run_through_journal(self):
+        """
+        Test stages run through the run journal, so completed stages can be skipped
+        """
+        journal = MagicMock()
+        journal.run_stage.side_effect = lambda stage, function: {"activity_data": ["from journal"]}
+        pipeline = Pipeline(logger=MagicMock(), journal=journal)
+        pipeline.add_stage("sync", MagicMock(), outputs=["activity_data"])
+
+        # Execute function
+        outputs = pipeline.run()
+
+        # Assert result
+        self.assertEqual(outputs, {"activity_data": ["from journal"]})
+        pipeline.stages["sync"].function.assert_not_called()
+
+    def test_failed_stage_skips_dependents(self):
+        """
+        Test a failed stage raises its error and stages depending on it are not run
+        """
+        dependent = MagicMock()
+        self.pipeline.add_stage("sync", MagicMock(side_effect=ValueError("failed")), outputs=["activity_data"])
+        self.pipeline.add_stage("export", dependent, inputs=["activity_data"])
+
+        # Execute function and assert result
+        with self.assertRaises(ValueError):
+            self.pipeline.run()
+        dependent.assert_not_called()
+
+    def test_invalid_graphs_rejected(self):
+        """
+        Test missing inputs, missing outputs and duplicate producers are rejected
+        """
+        self.pipeline.add_stage("sync", lambda: {}, outputs=["activity_data"])
+
+        # Execute function and assert result
+        with self.assertRaises(ValueError):
+            self.pipeline.add_stage("resync", lambda: {}, outputs=["activity_data"])
+        with self.assertRaises(ValueError):
+            self.pipeline.run()
+        self.pipeline.add_stage("export", lambda rows: None, inputs=["rows"])
+        with self.assertRaises(ValueError):
+            self.pipeline.execution_order(["export"])
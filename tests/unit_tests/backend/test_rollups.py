@@ -0,0 +1,55 @@
+# Import dependencies
+from backend.functions.rollups import build_rollup, rollup_filename
+from backend.functions.data_functions import ApiService
+from unittest.mock import MagicMock
+import pandas as pd
+import unittest
+
+class TestRollups(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Configure activity data spanning a year and an ISO week boundary for each test
+        """
+        self.df = pd.DataFrame({
+            "start_date": ["2023-12-31T09:00:00Z", "2024-01-01T08:00:00Z", "2024-01-07T08:00:00Z",
+                           "2024-01-08T08:00:00Z"],
+            "type": ["Run", "Run", "Run", "Ride"],
+            "distance": [5000.0, 10000.0, 3000.0, 40000.0],
+            "total_elevation_gain": [10.0, 20.0, 5.0, 300.0],
+            "moving_time": [1500, 3000, 900, 5400],
+            "kudos_count": [1, 2, 0, 4]
+        })
+
+    def test_build_rollup_per_period_and_type(self):
+        """
+        Test activities are totalled per calendar year and ISO week (Monday to Sunday) and type
+        """
+        # Execute function
+        yearly = build_rollup(self.df, "yearly")
+        weekly = build_rollup(self.df, "weekly")
+
+        # Assert result
+        self.assertEqual(yearly[["period", "type", "count", "distance"]].values.tolist(),
+                         [[pd.Timestamp("2023-01-01"), "Run", 1, 5000.0],
+                          [pd.Timestamp("2024-01-01"), "Ride", 1, 40000.0],
+                          [pd.Timestamp("2024-01-01"), "Run", 2, 13000.0]])
+        self.assertEqual(weekly["period"].tolist(), [pd.Timestamp("2023-12-25"), pd.Timestamp("2024-01-01"),
+                                                     pd.Timestamp("2024-01-08")])
+        self.assertEqual(weekly["moving_time"].tolist(), [1500, 3900, 5400])
+
+    def test_export_rollups(self):
+        """
+        Test a rollup is exported for every resolution
+        """
+        app = ApiService(client_id="id", client_secret="secret", refresh_token="token", logger=MagicMock())
+        app.export_data_as_csv = MagicMock()
+
+        # Execute function
+        app.export_rollups(data=self.df.to_dict(orient="records"), vars=MagicMock(), container="strava")
+
+        # Assert result
+        exported = {call.kwargs["output_filename"]: call.kwargs["df"] for call in app.export_data_as_csv.call_args_list}
+        self.assertEqual(sorted(exported), sorted(rollup_filename(resolution)
+                                                  for resolution in ["yearly", "monthly", "weekly"]))
+        self.assertEqual(exported["rollups/monthly.csv"]["count"].sum(), 4)
@@ -0,0 +1,82 @@
+# Import dependencies
+from backend.functions.route_functions import decode_polylines, simplify_routes, route_table, read_route_table
+from backend.functions.data_functions import ApiService
+from unittest.mock import patch, MagicMock
+from backend.functions import storage
+import numpy as np
+import tempfile
+import unittest
+
+# Define example polyline from the encoded polyline algorithm format documentation
+EXAMPLE_POLYLINE = "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+
+class TestRouteFunctions(unittest.TestCase):
+
+    def test_decode_polylines(self):
+        """
+        Test several polylines are decoded at once, including empty polylines
+        """
+        # Execute function
+        decoded = decode_polylines([EXAMPLE_POLYLINE, "", EXAMPLE_POLYLINE])
+
+        # Assert result
+        expected = [[38.5, -120.2], [40.7, -120.95], [43.252, -126.453]]
+        np.testing.assert_allclose(decoded[0], expected)
+        self.assertEqual(decoded[1].shape, (0, 2))
+        np.testing.assert_allclose(decoded[2], expected)
+
+    def test_simplify_routes(self):
+        """
+        Test vertices within the tolerance of a route are removed, whilst the ends and distant vertices are kept
+        """
+        straight = np.array([[51.0, -3.0 + i * 0.001] for i in range(10)])
+        detour = straight.copy()
+        detour[4, 0] += 0.001
+
+        # Execute function
+        simplified = simplify_routes([straight, detour, straight[:2]], tolerance=10)
+
+        # Assert result
+        np.testing.assert_array_equal(simplified[0], straight[[0, -1]])
+        np.testing.assert_array_equal(simplified[1], detour[[0, 3, 4, 5, -1]])
+        np.testing.assert_array_equal(simplified[2], straight[:2])
+
+    def test_route_table_reuses_unchanged_routes(self):
+        """
+        Test routes with an unchanged polyline are copied from the previous table rather than decoded again
+        """
+        previous = route_table({1: EXAMPLE_POLYLINE, 2: EXAMPLE_POLYLINE})
+        previous = previous.set_column(3, "coordinates_medium", previous.column("coordinates_medium").take([1, 1]))
+
+        # Execute function
+        table = route_table({3: "_p~iF~ps|U", 2: EXAMPLE_POLYLINE}, previous=previous)
+
+        # Assert result
+        self.assertEqual(table.column("id").to_pylist(), [3, 2])
+        self.assertEqual(len(table.column("coordinates_full")[0]), 1)
+        self.assertEqual(table.column("coordinates_medium")[1], previous.column("coordinates_medium")[1])
+
+    @patch.dict(storage._container_clients, clear=True)
+    @patch.dict(storage._service_clients, clear=True)
+    def test_export_routes_round_trip(self):
+        """
+        Test routes of activities with GPS data are exported, and an unchanged route file is not uploaded again
+        """
+        app = ApiService(client_id="id", client_secret="secret", refresh_token="token", logger=MagicMock())
+        data = [{"id": 1, "distance": 5000.0, "map": EXAMPLE_POLYLINE},
+                {"id": 2, "distance": 0.0, "map": EXAMPLE_POLYLINE},
+                {"id": 3, "distance": 1000.0, "map": None}]
+
+        with tempfile.TemporaryDirectory() as directory:
+            vars = MagicMock(storage_account_conneciton_string=f"file://{directory}")
+
+            # Execute function
+            app.export_routes(data=data, vars=vars, container="strava", output_filename="routes/routes.arrow")
+            app.export_routes(data=data, vars=vars, container="strava", output_filename="routes/routes.arrow")
+
+            # Assert result
+            table = read_route_table(storage.download_blob(vars.storage_account_conneciton_string, "strava",
+                                                           "routes/routes.arrow"), level="low")
+            self.assertEqual(table.column_names, ["id", "coordinates_low"])
+            self.assertEqual(table.column("id").to_pylist(), [1])
+            self.assertEqual(app.artifact_changes, {"strava/routes/routes.arrow": False})
@@ -0,0 +1,136 @@
+# Import dependencies
+from backend.functions.scheduler import RateLimitScheduler, CircuitBreaker, CircuitOpenError, parse_rate_limit_header
+from unittest.mock import MagicMock
+from datetime import datetime, timezone
+import requests
+import unittest
+
+def response(status_code: int, headers: dict = {}) -> MagicMock:
+    """
+    Helper to generate a mocked response object
+    """
+    mock_response = MagicMock(status_code=status_code, headers=headers)
+    mock_response.raise_for_status.side_effect = requests.HTTPError(str(status_code))
+    return mock_response
+
+class TestRateLimitScheduler(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Configure scheduler with a fake clock for each test
+        """
+        self.now = datetime(2024, 1, 1, 10, 5, tzinfo=timezone.utc).timestamp()
+        self.sleeps = []
+
+        # Define fake sleep function that advances the clock
+        def sleep(seconds):
+            self.sleeps.append(seconds)
+            self.now += seconds
+
+        self.session = MagicMock()
+        self.scheduler = RateLimitScheduler(session=self.session, logger=MagicMock(), max_retries=2,
+                                            clock=lambda: self.now, sleep=sleep)
+
+    def test_parse_rate_limit_header(self):
+        """
+        Test parsing of the Strava rate limit headers
+        """
+        self.assertEqual(parse_rate_limit_header("200,2000"), [200, 2000])
+        self.assertIsNone(parse_rate_limit_header(None))
+        self.assertIsNone(parse_rate_limit_header("abc"))
+
+    def test_update_from_headers(self):
+        """
+        Test each window follows the limit and usage of the header pair with the least remaining budget
+        """
+        self.scheduler.update_from_headers({"X-RateLimit-Limit": "200,2000", "X-RateLimit-Usage": "150,300",
+                                            "X-ReadRateLimit-Limit": "100,1000", "X-ReadRateLimit-Usage": "40,250"})
+
+        # Assert result (15 minutes: 50 overall vs 60 read remaining, daily: 1700 overall vs 750 read remaining)
+        self.assertEqual(self.scheduler.limits, [200, 1000])
+        self.assertEqual(self.scheduler.usage, [150, 250])
+
+    def test_acquire_pauses_until_window_resets(self):
+        """
+        Test an exhausted 15 minute budget pauses until the next quarter hour
+        """
+        self.scheduler.update_from_headers({"X-RateLimit-Limit": "100,1000", "X-RateLimit-Usage": "100,500"})
+
+        # Execute function
+        self.scheduler.acquire()
+
+        # Assert result (10:05 -> 10:15) and usage reset for the new window
+        self.assertEqual(self.sleeps, [600])
+        self.assertEqual(self.scheduler.usage, [1, 501])
+
+    def test_request_retries_throttled_responses(self):
+        """
+        Test 429 and 5xx responses are retried before succeeding
+        """
+        self.session.request.side_effect = [response(429), response(503), response(200)]
+
+        # Execute function
+        result = self.scheduler.request("GET", "https://example.com")
+
+        # Assert result
+        self.assertEqual(result.status_code, 200)
+        self.assertEqual(self.session.request.call_count, 3)
+        self.assertEqual(len(self.sleeps), 2)
+
+    def test_request_raises_after_retries_exhausted(self):
+        """
+        Test an error is raised once retries are exhausted
+        """
+        self.session.request.return_value = response(500)
+
+        # Assert result
+        with self.assertRaises(requests.HTTPError):
+            self.scheduler.request("GET", "https://example.com")
+        self.assertEqual(self.session.request.call_count, 3)
+
+    def test_request_timeouts_retried_for_idempotent_methods_only(self):
+        """
+        Test timeouts are retried for GET requests, whilst a timed out POST is raised immediately
+        """
+        self.session.request.side_effect = [requests.Timeout(), response(200)]
+
+        # Execute function
+        result = self.scheduler.request("GET", "https://example.com")
+
+        # Assert result
+        self.assertEqual(result.status_code, 200)
+        self.assertEqual(self.session.request.call_args.kwargs["timeout"], (5, 30))
+        self.session.request.side_effect = [requests.Timeout(), response(200)]
+        with self.assertRaises(requests.Timeout):
+            self.scheduler.request("POST", "https://example.com")
+
+    def test_request_error_status_raised(self):
+        """
+        Test error statuses that are not retried raise an error
+        """
+        self.session.request.return_value = response(404)
+
+        # Assert result
+        with self.assertRaises(requests.HTTPError):
+            self.scheduler.request("GET", "https://example.com")
+        self.assertEqual(self.session.request.call_count, 1)
+
+    def test_circuit_breaker_fails_fast(self):
+        """
+        Test requests are rejected without being sent once the circuit opens, until a trial request succeeds
+        """
+        self.scheduler.breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30, clock=lambda: self.now)
+        self.session.request.return_value = response(503)
+
+        # Execute function
+        with self.assertRaises(requests.HTTPError):
+            self.scheduler.request("GET", "https://example.com")
+        with self.assertRaises(CircuitOpenError):
+            self.scheduler.request("GET", "https://example.com")
+
+        # Assert result
+        self.assertEqual(self.session.request.call_count, 3)
+        self.now += 30
+        self.session.request.return_value = response(200)
+        self.assertEqual(self.scheduler.request("GET", "https://example.com").status_code, 200)
+        self.assertIsNone(self.scheduler.breaker.opened_at)
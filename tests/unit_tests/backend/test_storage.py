@@ -0,0 +1,161 @@
+# Import dependencies
+from backend.functions import storage
+from azure.core.exceptions import ResourceNotFoundError
+from unittest.mock import patch, MagicMock
+import tempfile
+import unittest
+
+@patch.dict(storage._container_clients, clear=True)
+@patch.dict(storage._service_clients, clear=True)
+@patch("backend.functions.storage.BlobServiceClient.from_connection_string")
+class TestStorage(unittest.TestCase):
+
+    def test_service_client_cached_per_connection_string(self, mock_from_connection_string):
+        """
+        Test a single service client and container client is created per connection string
+        """
+        # Execute function
+        first = storage.get_container_client("conn", "strava")
+        second = storage.get_container_client("conn", "strava")
+        storage.get_container_client("other-conn", "strava")
+
+        # Assert result
+        self.assertIs(first, second)
+        self.assertEqual(mock_from_connection_string.call_count, 2)
+        self.assertEqual(mock_from_connection_string.return_value.get_container_client.call_count, 2)
+
+    def test_download_blob_missing(self, mock_from_connection_string):
+        """
+        Test downloading a missing blob returns None
+        """
+        blob_client = MagicMock()
+        blob_client.download_blob.side_effect = ResourceNotFoundError("missing")
+        container_client = mock_from_connection_string.return_value.get_container_client.return_value
+        container_client.get_blob_client.return_value = blob_client
+
+        # Assert result
+        self.assertIsNone(storage.download_blob("conn", "strava", "missing.json"))
+
+    def test_download_blobs_keeps_request_order(self, mock_from_connection_string):
+        """
+        Test concurrent downloads are returned keyed by blob name in request order
+        """
+        container_client = mock_from_connection_string.return_value.get_container_client.return_value
+        container_client.get_blob_client.side_effect = lambda blob_name: MagicMock(
+            **{"download_blob.return_value.readall.return_value": blob_name.encode()})
+
+        # Execute function
+        result = storage.download_blobs("conn", "strava", ["b.json", "a.json", "c.json"])
+
+        # Assert result
+        self.assertEqual(list(result.items()), [("b.json", b"b.json"), ("a.json", b"a.json"), ("c.json", b"c.json")])
+
+@patch.dict(storage._container_clients, clear=True)
+@patch.dict(storage._service_clients, clear=True)
+class TestLocalStorage(unittest.TestCase):
+
+    def test_file_connection_string_round_trip(self):
+        """
+        Test file:// connection strings upload to and download from the filesystem stand-in
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            connection_string = f"file://{directory}"
+
+            # Execute function
+            storage.upload_blob(connection_string, "strava", "stream/1.json", '{"splits": []}')
+            storage.upload_blob(connection_string, "strava", "stream/1.json", b'{"splits": [1]}')
+
+            # Assert result
+            self.assertEqual(storage.download_blob(connection_string, "strava", "stream/1.json"), b'{"splits": [1]}')
+            self.assertIsNone(storage.download_blob(connection_string, "strava", "missing.json"))
+            self.assertEqual(storage.get_blob_service_client(connection_string).bytes_uploaded, 29)
+
+    def test_block_blob_writer_stages_blocks(self):
+        """
+        Test written data is staged in blocks and only visible once committed
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            connection_string = f"file://{directory}"
+
+            # Execute function
+            with storage.open_blob_writer(connection_string, "strava", "data.csv", block_size=4) as writer:
+                writer.write("id,name\n")
+                writer.write(b"1,run\n")
+                self.assertIsNone(storage.download_blob(connection_string, "strava", "data.csv"))
+
+            # Assert result
+            self.assertEqual(len(writer.block_ids), 4)
+            self.assertEqual(storage.download_blob(connection_string, "strava", "data.csv"), b"id,name\n1,run\n")
+
+    def test_block_blob_writer_aborted_on_error(self):
+        """
+        Test a failed write leaves the existing blob unchanged
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            connection_string = f"file://{directory}"
+            storage.upload_blob(connection_string, "strava", "data.csv", "old")
+
+            # Execute function
+            with self.assertRaises(ValueError):
+                with storage.open_blob_writer(connection_string, "strava", "data.csv", block_size=4) as writer:
+                    writer.write("new data")
+                    raise ValueError("failed")
+
+            # Assert result
+            self.assertEqual(storage.download_blob(connection_string, "strava", "data.csv"), b"old")
+
+    def test_compressed_blob_decoded_on_download(self):
+        """
+        Test compressed blobs are stored gzip encoded and decompressed transparently on download
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            connection_string = f"file://{directory}"
+            data = "time,distance\n" + "".join(f"{i},{i * 3.1}\n" for i in range(1000))
+
+            # Execute function
+            storage.upload_blob_chunks(connection_string, "strava", "stream.csv", [data], compress=True,
+                                       content_settings=storage.ContentSettings(content_type="text/csv"))
+
+            # Assert result
+            properties = storage.get_blob_client(connection_string, "strava", "stream.csv").get_blob_properties()
+            self.assertEqual(properties.content_settings.content_encoding, "gzip")
+            self.assertEqual(properties.content_settings.content_type, "text/csv")
+            self.assertLess(properties.size, len(data) / 2)
+            self.assertEqual(storage.download_blob(connection_string, "strava", "stream.csv"), data.encode())
+
+    def test_compressed_blob_copied_unchanged(self):
+        """
+        Test a compressed blob is copied byte for byte, so the copy still decodes to the original content
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            connection_string = f"file://{directory}"
+            data = "id,name\n" + "".join(f"{i},Run {i}\n" for i in range(1000))
+            storage.upload_blob_chunks(connection_string, "strava", "staged.csv", [data], compress=True)
+
+            # Execute function
+            storage.copy_blob(connection_string, "strava", "staged.csv", "strava", "data.csv",
+                              content_settings=storage.ContentSettings(content_type="text/csv",
+                                                                       content_encoding="gzip"))
+
+            # Assert result
+            blob_client = storage.get_blob_client(connection_string, "strava", "data.csv")
+            self.assertEqual(blob_client.download_blob().readall(), data.encode())
+            self.assertEqual(storage.download_blob(connection_string, "strava", "data.csv"), data.encode())
+
+    def test_blob_content_matches_stored_hash(self):
+        """
+        Test blob content hashes are compared against the hash stored in the blob metadata
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            connection_string = f"file://{directory}"
+            digest = storage.content_hash(["id,name\n", b"1,Morning Run\n"])
+
+            # Execute function
+            storage.upload_blob(connection_string, "strava", "data.csv", "id,name\n1,Morning Run\n",
+                                metadata={storage.CONTENT_HASH_KEY: digest})
+
+            # Assert result
+            self.assertTrue(storage.blob_content_matches(connection_string, "strava", "data.csv", digest))
+            self.assertFalse(storage.blob_content_matches(connection_string, "strava", "data.csv",
+                                                          storage.content_hash(["id,name\n"])))
+            self.assertFalse(storage.blob_content_matches(connection_string, "strava", "missing.csv", digest))
@@ -0,0 +1,199 @@
+# Import dependencies
+from backend.functions.stream_functions import stream_table, write_stream_table, read_stream_table
+from backend.functions.stream_functions import compute_splits, downsample_mean, columns_to_rows
+from backend.functions.stream_functions import compute_best_efforts, stream_best_efforts
+from backend.functions.stream_functions import stream_splits, stream_view
+import pyarrow as pa
+import numpy as np
+import tempfile
+import unittest
+import os
+
+def legacy_splits(distance: list, time: list, heartrate: list, split_distance: float) -> list:
+    """
+    Reference implementation of the original pure python split loop
+    """
+    splits = []
+    start = 0
+    for i in range(1, len(distance)):
+        if distance[i] - distance[start] >= split_distance:
+            splits.append({
+                "split_number": len(splits) + 1,
+                "start_time": time[start],
+                "end_time": time[i],
+                "split_time": time[i] - time[start],
+                "avg_hr": sum(heartrate[start:i]) / len(heartrate[start:i]) if heartrate else None
+            })
+            start = i
+    return splits
+
+class TestComputeSplits(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Generate a synthetic 10km stream for each test
+        """
+        rng = np.random.default_rng(0)
+        self.time = list(range(3000))
+        self.distance = np.cumsum(rng.uniform(2.5, 4.0, size=3000)).tolist()
+        self.heartrate = rng.integers(120, 180, size=3000).tolist()
+
+    def test_matches_legacy_implementation(self):
+        """
+        Test vectorised splits match the original loop for several split lengths
+        """
+        for split_distance in [1000, 1609.344, 400]:
+            with self.subTest(split_distance=split_distance):
+                expected = legacy_splits(self.distance, self.time, self.heartrate, split_distance)
+                result = compute_splits(self.distance, self.time, self.heartrate, split_distance)
+
+                # Assert result
+                self.assertEqual(len(result), len(expected))
+                for split, expected_split in zip(result, expected):
+                    self.assertEqual({k: v for k, v in split.items() if k != "avg_hr"},
+                                     {k: v for k, v in expected_split.items() if k != "avg_hr"})
+                    self.assertAlmostEqual(split["avg_hr"], expected_split["avg_hr"])
+
+    def test_without_heartrate(self):
+        """
+        Test average heart rate is None when no heart rate stream is available
+        """
+        result = compute_splits(self.distance, self.time, [], 1000)
+
+        # Assert result
+        self.assertTrue(len(result) > 0)
+        self.assertTrue(all(split["avg_hr"] is None for split in result))
+
+    def test_short_streams(self):
+        """
+        Test streams too short to complete a split return no splits
+        """
+        self.assertEqual(compute_splits([], [], [], 1000), [])
+        self.assertEqual(compute_splits([0.0], [0], [150], 1000), [])
+        self.assertEqual(compute_splits([0.0, 500.0], [0, 100], [150, 150], 1000), [])
+
+def brute_force_best_effort(distance: list, time: list, effort_distance: float) -> float:
+    """
+    Reference implementation scanning forward from every start sample for the end of its window
+    """
+    best = None
+    for start in range(len(distance)):
+        for end in range(start + 1, len(distance)):
+            if distance[end] - distance[start] >= effort_distance:
+                fraction = (distance[start] + effort_distance - distance[end - 1]) / (distance[end] - distance[end - 1])
+                elapsed = time[end - 1] + fraction * (time[end] - time[end - 1]) - time[start]
+                best = elapsed if best is None else min(best, elapsed)
+                break
+    return best
+
+class TestBestEfforts(unittest.TestCase):
+
+    def test_matches_brute_force_search(self):
+        """
+        Test the vectorised window search matches scanning every window of a variable pace stream
+        """
+        rng = np.random.default_rng(1)
+        time = np.cumsum(rng.integers(1, 4, size=1500)).tolist()
+        distance = np.cumsum(rng.uniform(0.0, 12.0, size=1500)).tolist()
+
+        # Execute function
+        efforts = compute_best_efforts(distance, time, {"1km": 1000, "5km": 5000, "HM": 21097.5})
+
+        # Assert result
+        self.assertAlmostEqual(efforts["1km"]["elapsed_time"], brute_force_best_effort(distance, time, 1000))
+        self.assertAlmostEqual(efforts["5km"]["elapsed_time"], brute_force_best_effort(distance, time, 5000))
+        self.assertAlmostEqual(efforts["1km"]["end_time"] - efforts["1km"]["start_time"],
+                               efforts["1km"]["elapsed_time"])
+        self.assertIsNone(efforts["HM"])
+
+    def test_streams_without_distance(self):
+        """
+        Test streams without distance, and empty streams, have no best efforts
+        """
+        self.assertEqual(stream_best_efforts(stream_table({"time": [0, 1]}), {"1km": 1000}), {"1km": None})
+        self.assertEqual(compute_best_efforts([], [], {"1km": 1000}), {"1km": None})
+
+class TestDownsampleMean(unittest.TestCase):
+
+    def test_chunk_means(self):
+        """
+        Test columns are averaged over equal sized chunks with a shorter final chunk
+        """
+        columns = {"time": list(range(10)), "distance": [float(v) * 2 for v in range(10)]}
+
+        # Execute function
+        result = downsample_mean(columns, points=4)
+
+        # Assert result (chunks of 3: [0-2], [3-5], [6-8], [9])
+        self.assertEqual(result, {"time": [1.0, 4.0, 7.0, 9.0], "distance": [2.0, 8.0, 14.0, 18.0]})
+
+    def test_short_and_empty_streams(self):
+        """
+        Test streams shorter than the requested points are returned unchanged and empty streams are handled
+        """
+        self.assertEqual(downsample_mean({"time": [0, 1, 2]}, points=50), {"time": [0.0, 1.0, 2.0]})
+        self.assertEqual(downsample_mean({"time": []}, points=50), {"time": []})
+
+class TestStreamStore(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Configure full resolution stream columns for each test
+        """
+        self.columns = {
+            "time": list(range(1800)),
+            "distance": [i * 3.05 for i in range(1800)],
+            "velocity_smooth": [3.05] * 1800,
+            "heartrate": [140 + i % 30 for i in range(1800)]
+        }
+
+    def test_stream_table_typed_columns(self):
+        """
+        Test integer streams are stored as int32 and floating point streams as float32
+        """
+        # Execute function
+        table = stream_table(self.columns)
+
+        # Assert result
+        self.assertEqual(table.schema, pa.schema([("time", pa.int32()), ("distance", pa.float32()),
+                                                  ("velocity_smooth", pa.float32()), ("heartrate", pa.int32())]))
+        self.assertEqual(table.num_rows, 1800)
+
+    def test_round_trip_selects_columns(self):
+        """
+        Test stream tables read back from bytes and memory-mapped files, selecting only the requested columns
+        """
+        table = stream_table(self.columns)
+        sink = pa.BufferOutputStream()
+        write_stream_table(table, sink)
+        data = sink.getvalue().to_pybytes()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "1.arrow")
+            with open(path, "wb") as file:
+                file.write(data)
+
+            # Execute function
+            mapped = read_stream_table(path, columns=["velocity_smooth", "cadence"])
+            buffered = read_stream_table(data)
+
+            # Assert result
+            self.assertEqual(mapped.column_names, ["velocity_smooth"])
+            self.assertTrue(buffered.equals(table))
+
+    def test_derived_views_match_column_functions(self):
+        """
+        Test splits and downsampled views derived from a stream table match those computed from its columns
+        """
+        table = stream_table(self.columns)
+        columns = {name: table.column(name).to_numpy() for name in table.column_names}
+
+        # Execute function
+        splits = stream_splits(table, split_distance=1000)
+        view = stream_view(table, points=50)
+
+        # Assert result
+        self.assertEqual(splits, compute_splits(columns["distance"], columns["time"], columns["heartrate"], 1000))
+        self.assertEqual(len(splits), 5)
+        self.assertEqual(view, columns_to_rows(downsample_mean(columns, points=50)))
+        self.assertEqual(len(view), 50)
@@ -0,0 +1,48 @@
+# Import dependencies
+from backend.functions.tags import add_activity_tags, pb_effort_ids, coastal_path_activities
+import pandas as pd
+import unittest
+
+class TestActivityTags(unittest.TestCase):
+
+    def test_add_activity_tags(self):
+        """
+        Test pb effort and coastal path tags are parsed into structured columns
+        """
+        df = pd.DataFrame({"id": [1, 2, 3, 4],
+                           "name": ["Parkrun [5km]", "Race [HM]", "Day 3 [WCP - 21.4]", "Easy Run"]})
+
+        # Execute function
+        df = add_activity_tags(df)
+
+        # Assert result
+        self.assertEqual(df["pb_distance"].where(df["pb_distance"].notna(), None).tolist(), ["5km", "HM", None, None])
+        self.assertEqual(df["is_wcp"].tolist(), [False, False, True, False])
+        self.assertEqual(df["wcp_distance"].fillna(0).tolist(), [0, 0, 21.4, 0])
+
+    def test_tagged_rows_not_parsed_again(self):
+        """
+        Test rows that already carry a tag index keep their tags
+        """
+        df = pd.DataFrame({"id": [1, 2], "name": ["Renamed", "Day 1 [WCP - 10]"],
+                           "pb_distance": ["10km", None], "is_wcp": [False, None], "wcp_distance": [None, None]})
+
+        # Execute function
+        df = add_activity_tags(df)
+
+        # Assert result
+        self.assertEqual(df["pb_distance"].tolist()[0], "10km")
+        self.assertEqual(df["is_wcp"].tolist(), [False, True])
+        self.assertEqual(df["wcp_distance"].tolist()[1], 10.0)
+
+    def test_tag_index_filters(self):
+        """
+        Test pb effort and coastal path activities are selected from the tag index
+        """
+        records = add_activity_tags(pd.DataFrame({"id": [1, 2, 3],
+                                                  "name": ["Parkrun [5km]", "Day 3 [WCP - 21.4]", "Easy"]})
+                                    ).to_dict(orient="records")
+
+        # Assert result
+        self.assertEqual(pb_effort_ids(records), [1])
+        self.assertEqual([record["id"] for record in coastal_path_activities(records)], [2])